@@ -18,6 +18,11 @@ async def health_check():
         dict: Health status information including:
             - status: Overall health ("healthy" or "unhealthy")
             - services: List of individual service health statuses
+            - cache: Hit/miss counters and latency for each read tier, and
+              how many Banxico loads were coalesced by single-flight
+            - circuit_breaker: Banxico breaker state, shared fleet-wide with Redis
+            - rate_limiter: Banxico quota left in the fleet-wide token buckets
+            - scheduler: Background refresh jobs, their schedule and last run
             - checked_at: Timestamp of health check
 
     Response Examples:
@@ -1,28 +1,107 @@
-from fastapi import APIRouter, HTTPException, Query
+import base64
+import binascii
+import logging
+from collections.abc import AsyncIterator
+from datetime import date
+from typing import Literal
 
-from app.schemas.rates import ExchangeRateData
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.schemas.rates import (
+    BatchRateRequest,
+    BatchRateResponse,
+    ExchangeRateData,
+    RateQuery,
+)
 from app.services import rates as rate_service
+from app.services.database import database_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/rates", tags=["Rates"])
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def _cache_headers(encoded: rate_service.EncodedBody) -> dict[str, str]:
+    """Validator plus a max-age matching the remaining soft TTL of the data"""
+    return {
+        "ETag": encoded.etag,
+        "Cache-Control": f"public, max-age={encoded.max_age}",
+    }
+
+
+def _not_modified(if_none_match: str | None, resource: str) -> Response | None:
+    """
+    Answer a conditional request with 304 from the last body served, while
+    it is still fresh, before any cache tier or Banxico is consulted.
+
+    Endpoints read If-None-Match from request.headers rather than declaring
+    a Header() parameter, which FastAPI would resolve and validate per call.
+    """
+    if not if_none_match:
+        return None
+    encoded = rate_service.peek_fresh_body(resource)
+    if encoded is None or not _etag_matches(if_none_match, encoded.etag):
+        return None
+    return Response(status_code=304, headers=_cache_headers(encoded))
+
+
+def _json_response(
+    encoded: rate_service.EncodedBody,
+    trace: rate_service.ReadTrace,
+    if_none_match: str | None,
+) -> Response:
+    """
+    Serve a pre-encoded JSON body as is, skipping response_model validation
+    and re-serialization, with validators and the serving tier and timings
+    """
+    headers = _cache_headers(encoded)
+    if trace.tier:
+        headers["X-Cache-Tier"] = trace.tier
+    if trace.timings_ms:
+        headers["Server-Timing"] = trace.server_timing()
+    if _etag_matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=encoded.body, media_type="application/json", headers=headers
+    )
+
+
 @router.get(
     "/current",
     response_model=ExchangeRateData,
     summary="Get current USD/MXN exchange rate",
     description="Returns the most recent USD/MXN exchange rate from Banxico with 5-minute caching.",
 )
-async def get_current_rate():
+async def get_current_rate(request: Request):
     """
     Get the latest USD/MXN exchange rate.
 
     Returns:
         ExchangeRateData: Current exchange rate with date and source information
     """
-    rate = await rate_service.get_current_exchange_rate()
-    if not rate:
+    if_none_match = request.headers.get("if-none-match")
+    resource = rate_service.resource_key("current")
+    if not_modified := _not_modified(if_none_match, resource):
+        return not_modified
+
+    trace = rate_service.ReadTrace()
+    encoded = await rate_service.get_current_rate_body(trace=trace)
+    if not encoded:
         raise HTTPException(status_code=404, detail="No current rate available")
-    return rate
+    return _json_response(encoded, trace, if_none_match)
 
 
 @router.get(
@@ -32,12 +111,13 @@ async def get_current_rate():
     description="Returns historical USD/MXN exchange rates for the specified number of business days (excludes weekends).",
 )
 async def get_historical_rates(
+    request: Request,
     days: int = Query(
         default=10,
         ge=1,
         le=90,
         description="Number of business days to retrieve (1-90)",
-    )
+    ),
 ):
     """
     Get historical exchange rates for the last N business days (Monday-Friday).
@@ -49,7 +129,14 @@ async def get_historical_rates(
     Returns:
         List[ExchangeRateData]: List of exchange rates sorted by date (most recent first)
     """
-    return await rate_service.get_historical_rates(days=days)
+    if_none_match = request.headers.get("if-none-match")
+    resource = rate_service.resource_key("historical", days)
+    if not_modified := _not_modified(if_none_match, resource):
+        return not_modified
+
+    trace = rate_service.ReadTrace()
+    encoded = await rate_service.get_historical_rates_body(days=days, trace=trace)
+    return _json_response(encoded, trace, if_none_match)
 
 
 @router.get(
@@ -59,12 +146,13 @@ async def get_historical_rates(
     description="Returns the arithmetic mean of USD/MXN exchange rates over the specified number of business days.",
 )
 async def get_average_rate(
+    request: Request,
     days: int = Query(
         default=15,
         ge=1,
         le=90,
         description="Number of business days for average calculation (1-90)",
-    )
+    ),
 ):
     """
     Get the average exchange rate for the last N business days.
@@ -75,7 +163,190 @@ async def get_average_rate(
     Returns:
         float: Average exchange rate rounded to 4 decimal places
     """
-    rate = await rate_service.get_average_rate(days=days)
-    if rate is None:
+    if_none_match = request.headers.get("if-none-match")
+    resource = rate_service.resource_key("average", days)
+    if not_modified := _not_modified(if_none_match, resource):
+        return not_modified
+
+    trace = rate_service.ReadTrace()
+    encoded = await rate_service.get_average_rate_body(days=days, trace=trace)
+    if encoded is None:
         raise HTTPException(status_code=404, detail="No data to calculate average")
-    return round(rate, 4)
+    return _json_response(encoded, trace, if_none_match)
+
+
+def _batch_body(queries: list[RateQuery], items: list[rate_service.BatchItem]) -> bytes:
+    """Splice the cached sub-query bodies into one response without re-encoding"""
+    results = []
+    for query, item in zip(queries, items):
+        head = orjson.dumps(
+            {"endpoint": query.endpoint, "days": query.days, "status": item.status}
+        )[:-1]
+        if item.body is not None:
+            results.append(head + b',"data":' + item.body + b"}")
+        else:
+            results.append(head + b',"detail":' + orjson.dumps(item.detail) + b"}")
+    return b'{"results":[' + b",".join(results) + b"]}"
+
+
+@router.post(
+    "/batch",
+    response_model=BatchRateResponse,
+    summary="Run several rate queries in one request",
+    description="Resolves current, historical and average sub-queries with one cache round trip and at most one upstream fetch per cached dataset.",
+)
+async def get_rates_batch(request: BatchRateRequest):
+    """
+    Answer a list of sub-queries, e.g. a dashboard's current rate, 10-day
+    history and 15-day average, in one round trip.
+
+    Each result carries its own status: 200 with `data`, or the status and
+    `detail` the single endpoint would have answered with.
+
+    Returns:
+        BatchRateResponse: One result per sub-query, in request order
+    """
+    trace = rate_service.ReadTrace()
+    items = await rate_service.get_batch_bodies(
+        [(query.endpoint, query.days) for query in request.queries], trace=trace
+    )
+    headers = {"Server-Timing": trace.server_timing()} if trace.timings_ms else None
+    return Response(
+        content=_batch_body(request.queries, items),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+MAX_RANGE_PAGE_SIZE = 10000
+
+_RANGE_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _encode_cursor(after: date) -> str:
+    return base64.urlsafe_b64encode(after.isoformat().encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> date:
+    """Opaque keyset cursor: the last date of the previous page"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return date.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+async def _all_batches(
+    first: list[ExchangeRateData],
+    rest: AsyncIterator[list[ExchangeRateData]] | None,
+) -> AsyncIterator[list[ExchangeRateData]]:
+    yield first
+    if rest is not None:
+        async for batch in rest:
+            yield batch
+
+
+async def _range_chunks(
+    batches: AsyncIterator[list[ExchangeRateData]], output: str
+) -> AsyncIterator[bytes]:
+    """One encoded chunk per database batch"""
+    if output == "csv":
+        yield b"date,rate,source\r\n"
+    async for batch in batches:
+        if not batch:
+            continue
+        if output == "csv":
+            yield "".join(
+                f"{rate.date.isoformat()},{rate.rate!r},{rate.source}\r\n"
+                for rate in batch
+            ).encode()
+        else:
+            yield b"".join(
+                orjson.dumps(
+                    {"date": rate.date, "rate": rate.rate, "source": rate.source}
+                )
+                + b"\n"
+                for rate in batch
+            )
+
+
+@router.get(
+    "/range",
+    response_class=StreamingResponse,
+    summary="Stream USD/MXN exchange rates for any date range",
+    description="Streams stored rates between two dates, oldest first, as NDJSON or CSV, optionally paged with keyset cursors.",
+    responses={200: {"content": {media: {} for media in _RANGE_MEDIA_TYPES.values()}}},
+)
+async def get_rate_range(
+    start: date = Query(..., description="First day of the range (YYYY-MM-DD)"),
+    end: date | None = Query(
+        default=None, description="Last day of the range, inclusive; default today"
+    ),
+    format: Literal["ndjson", "csv"] = Query(
+        default="ndjson", description="Output format"
+    ),
+    limit: int | None = Query(
+        default=None,
+        ge=1,
+        le=MAX_RANGE_PAGE_SIZE,
+        description="Rows per page; omit to stream the whole range",
+    ),
+    cursor: str | None = Query(
+        default=None, description="X-Next-Cursor of the previous page"
+    ),
+):
+    """
+    Stream stored exchange rates between `start` and `end`, oldest first,
+    straight from Aurora's date index. Memory use is the same for a week or
+    twenty years.
+
+    With `limit`, a response followed by more rows carries an `X-Next-Cursor`
+    header; pass it back as `cursor` for the next page. A page is read in one
+    query before the response starts, so its cursor always matches the rows
+    sent; unpaged ranges read their first batch up front, so an unreachable
+    database is a 503 rather than a truncated 200.
+
+    Returns:
+        NDJSON lines or CSV rows of date, rate and source
+    """
+    end = end or date.today()
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if not rate_service.database_enabled():
+        raise HTTPException(
+            status_code=503, detail="Date range queries need the database"
+        )
+    after = _decode_cursor(cursor) if cursor else None
+
+    # One row past the page tells whether another page follows
+    size = limit + 1 if limit is not None else None
+    batches = database_service.iter_rate_batches(
+        start, end, after=after, limit=size, batch_size=size
+    )
+    try:
+        first = await anext(batches, [])
+    except Exception as e:
+        logger.error(f"Range query {start}..{end} failed: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable") from e
+
+    headers = {}
+    rest = batches
+    if limit is not None:
+        await batches.aclose()
+        rest = None
+        if len(first) > limit:
+            first = first[:limit]
+            headers["X-Next-Cursor"] = _encode_cursor(first[-1].date)
+    if format == "csv":
+        headers["Content-Disposition"] = (
+            f'attachment; filename="usd-mxn-{start.isoformat()}-{end.isoformat()}.csv"'
+        )
+
+    return StreamingResponse(
+        _range_chunks(_all_batches(first, rest), format),
+        media_type=_RANGE_MEDIA_TYPES[format],
+        headers=headers,
+    )
@@ -4,17 +4,23 @@ Core module for application configuration and utilities.
 
 This module provides:
 - Application configuration and settings management
-- Redis client for caching operations
+- Redis client for caching operations, with an optional in-process L1 tier
 - Circuit breaker pattern for fault tolerance
+- Single-flight coalescing of concurrent cache misses
 """
 
-from .circuit_breaker import CircuitBreaker, CircuitState
+from .circuit_breaker import CircuitBreaker, CircuitBreakerOpenError, CircuitState
 from .config import settings
+from .local_cache import LocalCache
 from .redis import redis_client
+from .single_flight import SingleFlight
 
 __all__ = [
     "settings",
     "redis_client",
+    "LocalCache",
     "CircuitBreaker",
+    "CircuitBreakerOpenError",
     "CircuitState",
+    "SingleFlight",
 ]
@@ -1,9 +1,19 @@
 # app/core/circuit_breaker.py
+import asyncio
 import logging
 import time
-from collections.abc import Callable
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from enum import Enum
-from typing import Any
+from typing import Any, NamedTuple
+
+from app.core.metrics import (
+    CIRCUIT_BREAKER_STATE,
+    CIRCUIT_BREAKER_TRANSITIONS,
+    labels,
+)
+from app.core.redis import redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,53 +24,422 @@ class CircuitState(str, Enum):
     HALF_OPEN = "HALF_OPEN"
 
 
+# Values exported by the circuit_breaker_state gauge
+_STATE_GAUGE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CircuitBreakerOpenError(Exception):
+    """Raised without calling the protected function while the breaker rejects"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SharedState(NamedTuple):
+    state: CircuitState
+    failure_count: int
+    opened_at: float
+
+
+# KEYS[1] state hash, KEYS[2] probe lock; ARGV threshold, now, force open, key ttl
+_RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local state = redis.call('HGET', KEYS[1], 'state') or 'CLOSED'
+if ARGV[3] == '1' or failures >= tonumber(ARGV[1]) then
+    state = 'OPEN'
+    redis.call('HSET', KEYS[1], 'state', state, 'opened_at', ARGV[2])
+    redis.call('DEL', KEYS[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {state, tostring(failures), redis.call('HGET', KEYS[1], 'opened_at') or '0'}
+"""
+
+_RECORD_SUCCESS_SCRIPT = """
+redis.call('HSET', KEYS[1], 'state', 'CLOSED', 'failures', 0)
+redis.call('DEL', KEYS[2])
+return 1
+"""
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisCircuitBreakerBackend:
+    """
+    Fleet-wide breaker state kept in a Redis hash.
+
+    Failures and resets are applied by Lua scripts so concurrent instances
+    never lose updates, and HALF_OPEN probes are claimed with SET NX so only
+    one instance in the fleet probes a recovering upstream.
+    """
+
+    KEY_TTL = 86400
+
+    def __init__(self, name: str, poll_interval: float = 1.0):
+        self.state_key = f"circuit:{name}"
+        self.probe_key = f"circuit:{name}:probe"
+        self.poll_interval = poll_interval
+        self._scripts: dict[tuple[int, str], Any] = {}
+
+    def _script(self, source: str):
+        client = redis_client.client
+        key = (id(client), source)
+        if key not in self._scripts:
+            self._scripts[key] = client.register_script(source)
+        return self._scripts[key]
+
+    @staticmethod
+    def _parse(state: Any, failures: Any, opened_at: Any) -> SharedState:
+        return SharedState(
+            state=CircuitState(_decode(state) or CircuitState.CLOSED.value),
+            failure_count=int(_decode(failures) or 0),
+            opened_at=float(_decode(opened_at) or 0.0),
+        )
+
+    async def load(self) -> SharedState | None:
+        try:
+            values = await redis_client.client.hmget(
+                self.state_key, "state", "failures", "opened_at"
+            )
+            return self._parse(*values)
+        except Exception as e:
+            logger.error(f"Failed to load shared circuit breaker state: {e}")
+            return None
+
+    async def record_failure(
+        self, threshold: int, force_open: bool
+    ) -> SharedState | None:
+        try:
+            result = await self._script(_RECORD_FAILURE_SCRIPT)(
+                keys=[self.state_key, self.probe_key],
+                args=[threshold, time.time(), int(force_open), self.KEY_TTL],
+            )
+            return self._parse(*result)
+        except Exception as e:
+            logger.error(f"Failed to record shared circuit breaker failure: {e}")
+            return None
+
+    async def record_success(self):
+        try:
+            await self._script(_RECORD_SUCCESS_SCRIPT)(
+                keys=[self.state_key, self.probe_key]
+            )
+        except Exception as e:
+            logger.error(f"Failed to reset shared circuit breaker: {e}")
+
+    async def acquire_probe(self, ttl: float) -> bool:
+        """Claim the fleet's single HALF_OPEN probe (granted if Redis is down)"""
+        try:
+            return bool(
+                await redis_client.client.set(
+                    self.probe_key, "1", nx=True, px=max(int(ttl * 1000), 1)
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to claim shared circuit breaker probe: {e}")
+            return True
+
+
+class CallOutcome(NamedTuple):
+    finished_at: float
+    failed: bool
+    slow: bool
+
+
+class CallTimer:
+    """Latency of a guarded call, the whole block unless stopped earlier"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration: float | None = None
+
+    def stop(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+    def elapsed(self) -> float:
+        if self.duration is not None:
+            return self.duration
+        return time.perf_counter() - self.started
+
+
 class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures by default.
+
+    Setting window_size (last N calls) and/or window_seconds (last T seconds)
+    switches to sliding-window mode instead: the breaker opens once at least
+    minimum_calls are in the window and either the failure rate or the rate of
+    calls slower than slow_call_duration reaches its threshold, so an upstream
+    that answers successfully but too slowly is cut off as well.
+    """
+
     def __init__(
         self,
         failure_threshold: int = 3,
         timeout_duration: int = 30,
         expected_exception: type[Exception] = Exception,
+        name: str = "default",
+        backend: RedisCircuitBreakerBackend | None = None,
+        window_size: int | None = None,
+        window_seconds: float | None = None,
+        minimum_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.5,
+        slow_call_duration: float | None = None,
     ):
         self.failure_threshold = failure_threshold
         self.timeout_duration = timeout_duration
         self.expected_exception = expected_exception
+        self.name = name
+        self.backend = backend
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.minimum_calls = minimum_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self._window: deque[CallOutcome] = deque()
+        self._poller: asyncio.Task | None = None
         self.failure_count = 0
         self.last_failure_time = 0.0
         self.state = CircuitState.CLOSED
+        labels(CIRCUIT_BREAKER_STATE, name).set(_STATE_GAUGE_VALUES[self.state])
+        self.rejected_count = 0
+        # Only one call may probe the upstream while HALF_OPEN
+        self._probe_in_flight = False
 
-    async def call(self, func: Callable, *args, **kwargs) -> Any:
+    def _before_call(self):
+        """Admit or reject a call; never awaits, so state changes are atomic"""
         if self.state == CircuitState.OPEN:
-            elapsed = time.time() - self.last_failure_time
-            if elapsed < self.timeout_duration:
-                logger.warning("Circuit breaker is OPEN – skipping call")
-                raise Exception("Circuit breaker is OPEN")
-            self.state = CircuitState.HALF_OPEN
+            remaining = self.timeout_duration - (time.time() - self.last_failure_time)
+            if remaining > 0:
+                self.rejected_count += 1
+                logger.debug("Circuit breaker is OPEN – skipping call")
+                raise CircuitBreakerOpenError("Circuit breaker is OPEN", remaining)
+            self._set_state(CircuitState.HALF_OPEN)
             logger.info("Circuit breaker transitioning to HALF_OPEN")
 
+        elif self.state == CircuitState.HALF_OPEN and self._probe_in_flight:
+            self.rejected_count += 1
+            logger.debug("Circuit breaker is HALF_OPEN – probe in flight")
+            raise CircuitBreakerOpenError(
+                "Circuit breaker is HALF_OPEN with a probe in flight", 1.0
+            )
+
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = True
+
+    def _set_state(self, state: CircuitState):
+        if state == self.state:
+            return
+        self.state = state
+        labels(CIRCUIT_BREAKER_STATE, self.name).set(_STATE_GAUGE_VALUES[state])
+        labels(CIRCUIT_BREAKER_TRANSITIONS, self.name, state.value).inc()
+
+    @property
+    def sliding_window(self) -> bool:
+        return bool(self.window_size or self.window_seconds)
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        async with self.attempt():
+            return await func(*args, **kwargs)
+
+    @asynccontextmanager
+    async def attempt(
+        self, before: Callable[[], Awaitable[Any]] | None = None
+    ) -> AsyncIterator[CallTimer]:
+        """
+        Guard a block as one call, for outcomes only known after several
+        awaits (e.g. a streamed body). An expected exception raised in the
+        block is a failure, normal exit a success; the yielded timer can be
+        stopped early so slow-call detection sees e.g. time to first byte.
+
+        `before` runs once the call is admitted and before the timer starts,
+        for work that must not happen while the breaker rejects calls but is
+        not part of the call (e.g. waiting for a quota token). Its errors
+        propagate without counting as a failure.
+        """
+        self._before_call()
+        probe = self._probe_in_flight
         try:
-            result = await func(*args, **kwargs)
-            self._reset()
-            return result
-        except self.expected_exception as e:
-            self._record_failure()
-            raise e
-        except Exception as e:
-            logger.warning(f"Unexpected error in circuit breaker: {e}")
-            raise
+            # Inside the try, so a caller cancelled while claiming the shared
+            # probe does not leave the local one flagged as in flight
+            if probe and self.backend is not None:
+                await self._claim_shared_probe()
+            if before is not None:
+                await before()
+            dirty = self.failure_count > 0 or self.state != CircuitState.CLOSED
+
+            timer = CallTimer()
+            try:
+                yield timer
+            except self.expected_exception:
+                await self._on_failure(probe, timer.elapsed())
+                raise
+            except Exception as e:
+                logger.warning(f"Unexpected error in circuit breaker: {e}")
+                raise
+        finally:
+            if probe:
+                self._probe_in_flight = False
+
+        await self._on_success(probe, dirty, timer.elapsed())
+
+    async def _on_failure(self, probe: bool, duration: float):
+        if self.sliding_window:
+            if self._record_call(True, duration) or probe:
+                await self._trip()
+            return
+
+        self._record_failure()
+        if self.backend is not None:
+            self._apply_shared(
+                await self.backend.record_failure(self.failure_threshold, probe)
+            )
+
+    async def _on_success(self, probe: bool, dirty: bool, duration: float):
+        if self.sliding_window:
+            tripped = self._record_call(False, duration)
+            # A slow probe means the upstream has not recovered yet
+            if tripped or (probe and self._is_slow(duration)):
+                await self._trip()
+                return
+            if self.state == CircuitState.CLOSED:
+                return
+
+        self._reset()
+        if dirty and self.backend is not None:
+            await self.backend.record_success()
+
+    def _is_slow(self, duration: float) -> bool:
+        return (
+            self.slow_call_duration is not None and duration >= self.slow_call_duration
+        )
+
+    def _record_call(self, failed: bool, duration: float) -> bool:
+        """Add a finished call to the sliding window; True if the rates trip it"""
+        now = time.time()
+        self._window.append(CallOutcome(now, failed, self._is_slow(duration)))
+        if self.window_size:
+            while len(self._window) > self.window_size:
+                self._window.popleft()
+        if self.window_seconds:
+            while self._window[0].finished_at < now - self.window_seconds:
+                self._window.popleft()
+
+        if len(self._window) < self.minimum_calls:
+            return False
+        failure_rate, slow_call_rate = self._window_rates()
+        return (
+            failure_rate >= self.failure_rate_threshold
+            or slow_call_rate >= self.slow_call_rate_threshold
+        )
+
+    def _window_rates(self) -> tuple[float, float]:
+        calls = len(self._window)
+        if not calls:
+            return 0.0, 0.0
+        failed = sum(outcome.failed for outcome in self._window)
+        slow = sum(outcome.slow for outcome in self._window)
+        return failed / calls, slow / calls
+
+    async def _trip(self):
+        """Open from sliding-window rates and start the next window afresh"""
+        failure_rate, slow_call_rate = self._window_rates()
+        logger.warning(
+            f"Circuit breaker '{self.name}' set to OPEN "
+            f"(failure rate {failure_rate:.0%}, slow call rate {slow_call_rate:.0%})"
+        )
+        self._set_state(CircuitState.OPEN)
+        self.last_failure_time = time.time()
+        self._window.clear()
+        if self.backend is not None:
+            self._apply_shared(
+                await self.backend.record_failure(self.failure_threshold, True)
+            )
+
+    async def _claim_shared_probe(self):
+        """Give up the local probe when another instance is already probing"""
+        if await self.backend.acquire_probe(self.timeout_duration):
+            return
+        self._probe_in_flight = False
+        # Stay OPEN until the next poll brings in the other instance's result
+        self._set_state(CircuitState.OPEN)
+        self.last_failure_time = (
+            time.time() - self.timeout_duration + self.backend.poll_interval
+        )
+        self.rejected_count += 1
+        raise CircuitBreakerOpenError(
+            "Circuit breaker is HALF_OPEN with a probe in flight",
+            self.backend.poll_interval,
+        )
+
+    def _apply_shared(self, shared: SharedState | None):
+        """Adopt the fleet-wide state; Redis is authoritative when reachable"""
+        if shared is None:
+            return
+        self.failure_count = shared.failure_count
+        if shared.state == CircuitState.OPEN:
+            if (
+                self.state == CircuitState.CLOSED
+                or shared.opened_at > self.last_failure_time
+            ):
+                if self.state != CircuitState.OPEN:
+                    logger.warning(f"Circuit breaker '{self.name}' opened by the fleet")
+                self._set_state(CircuitState.OPEN)
+                self.last_failure_time = shared.opened_at
+        elif self.state != CircuitState.CLOSED and not self._probe_in_flight:
+            logger.info(f"Circuit breaker '{self.name}' closed by the fleet")
+            self._set_state(CircuitState.CLOSED)
+
+    async def _poll_shared_state(self):
+        while True:
+            await asyncio.sleep(self.backend.poll_interval)
+            self._apply_shared(await self.backend.load())
+
+    async def start(self):
+        """Follow the shared state in the background (no-op without a backend)"""
+        if self.backend is None or self._poller is not None:
+            return
+        self._apply_shared(await self.backend.load())
+        self._poller = asyncio.create_task(self._poll_shared_state())
+
+    async def stop(self):
+        if self._poller is None:
+            return
+        self._poller.cancel()
+        try:
+            await self._poller
+        except asyncio.CancelledError:
+            pass
+        self._poller = None
 
     def _record_failure(self):
         self.failure_count += 1
         self.last_failure_time = time.time()
         logger.debug(f"Failure count: {self.failure_count}/{self.failure_threshold}")
-        if self.failure_count >= self.failure_threshold:
-            self.state = CircuitState.OPEN
+        # A failed HALF_OPEN probe reopens the breaker straight away
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.failure_count >= self.failure_threshold
+        ):
+            self._set_state(CircuitState.OPEN)
             logger.warning("Circuit breaker state set to OPEN")
 
     def _reset(self):
         if self.state != CircuitState.CLOSED:
             logger.info("Circuit breaker reset to CLOSED")
         self.failure_count = 0
-        self.state = CircuitState.CLOSED
+        self._set_state(CircuitState.CLOSED)
+        self._probe_in_flight = False
+        self._window.clear()
 
     def reset(self):
         """Manually reset breaker (optional external use)"""
@@ -69,3 +448,28 @@ class CircuitBreaker:
 
     def get_state(self) -> str:
         return self.state.value
+
+    def get_status(self) -> dict:
+        retry_after = 0.0
+        if self.state == CircuitState.OPEN:
+            elapsed = time.time() - self.last_failure_time
+            retry_after = round(max(self.timeout_duration - elapsed, 0.0), 3)
+        status = {
+            "name": self.name,
+            "state": self.state.value,
+            "backend": "redis" if self.backend is not None else "local",
+            "mode": "sliding_window" if self.sliding_window else "consecutive",
+            "failure_count": self.failure_count,
+            "failure_threshold": self.failure_threshold,
+            "rejected_count": self.rejected_count,
+            "retry_after_seconds": retry_after,
+        }
+        if self.sliding_window:
+            failure_rate, slow_call_rate = self._window_rates()
+            status["window"] = {
+                "calls": len(self._window),
+                "failure_rate": round(failure_rate, 4),
+                "slow_call_rate": round(slow_call_rate, 4),
+                "slow_call_seconds": self.slow_call_duration,
+            }
+        return status
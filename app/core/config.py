@@ -21,13 +21,32 @@ class Settings(BaseSettings):
     BANXICO_SERIES_ID: str = "SF43718"  # USD/MXN exchange rate
     BANXICO_TOKEN: str = ""
     BANXICO_TIMEOUT: int = 10
+    BANXICO_MAX_CONNECTIONS: int = 20
+    BANXICO_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    BANXICO_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept
+    BANXICO_HTTP2: bool = False
+    # Banxico SIE quota per token; shared by everything that uses the token
+    BANXICO_RATE_LIMIT_REQUESTS: int = 200
+    BANXICO_RATE_LIMIT_PERIOD: int = 300  # seconds
+    BANXICO_RATE_LIMIT_BURST: int = 20
+    BANXICO_DAILY_LIMIT_REQUESTS: int = 10000
+    BANXICO_DAILY_LIMIT_BURST: int = 1000
+    # Enforce the quotas fleet-wide through Redis before every Banxico call
+    BANXICO_RATE_LIMIT_ENABLED: bool = False
+    BANXICO_RATE_LIMIT_MAX_WAIT: float = 0.5  # seconds a caller waits for a token
 
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DECODE_RESPONSES: bool = True
-    REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_MAX_CONNECTIONS: int = 20  # includes the L1 invalidation subscriber
+    REDIS_POOL_TIMEOUT: float = 1.0  # seconds a command waits for a connection
+
+    L1_CACHE_ENABLED: bool = False  # in-process cache in front of Redis
+    L1_CACHE_MAX_ENTRIES: int = 1024
+    L1_CACHE_TTL: int = 30  # upper bound for any in-process entry
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
 
     DATABASE_HOST: str = "localhost"
     DATABASE_PORT: int = 3306
@@ -36,6 +55,20 @@ class Settings(BaseSettings):
     DATABASE_PASSWORD: str = ""
     DATABASE_MAX_CONNECTIONS: int = 20
     DATABASE_MIN_CONNECTIONS: int = 5
+    DATABASE_ENABLED: bool = False  # connect to Aurora on startup
+    DATABASE_BULK_CHUNK_SIZE: int = 500  # rows per multi-row upsert statement
+    DATABASE_STREAM_BATCH_SIZE: int = 1000  # rows per keyset query when streaming
+    DATABASE_INDEX_CHECK_INTERVAL: int = 30  # seconds between rate index checks
+
+    SYNC_ENABLED: bool = False  # run the Banxico -> Aurora sync in the scheduler
+    SYNC_INTERVAL: int = 3600
+    SYNC_INITIAL_DAYS: int = 365  # range fetched when the table is empty
+
+    BACKFILL_YEARS: int = 20
+    BACKFILL_CHUNK_DAYS: int = 365  # days per Banxico request
+    BACKFILL_CONCURRENCY: int = 4  # chunks fetched and written at once
+    BACKFILL_BURST: int = 10  # requests allowed back to back before pacing
+    BACKFILL_CHECKPOINT_PATH: str = ".backfill-checkpoint.json"
 
     AWS_REGION: str = "us-west-1"
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -44,20 +77,55 @@ class Settings(BaseSettings):
     DATABASE_SECRET_ARN: Optional[str] = None
     BANXICO_SECRET_ARN: Optional[str] = None
 
+    # Soft TTLs: entries older than this are served stale and refreshed in the
+    # background. Hard TTLs: entries are dropped and callers wait for Banxico.
     CACHE_CURRENT_RATE_TTL: int = 300  # 5 minutes
     CACHE_HISTORICAL_RATE_TTL: int = 3600  # 1 hour
-    CACHE_AVERAGE_RATE_TTL: int = 1800  # 30 minutes
+    CACHE_CURRENT_RATE_HARD_TTL: int = 21600  # 6 hours
+    CACHE_HISTORICAL_RATE_HARD_TTL: int = 86400  # 24 hours
+    CACHE_REFRESH_FAILURE_COOLDOWN: int = 30  # no refresh retry before, per key
+
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_CURRENT_INTERVAL: int = 240  # refresh before the 5 min soft TTL
+    SCHEDULER_HISTORICAL_INTERVAL: int = 3000  # refresh before the 1 h soft TTL
+    SCHEDULER_PUBLICATION_INTERVAL: int = 60  # cadence around publication time
+    SCHEDULER_FLEET_LEASE: bool = True  # one instance runs each job per interval
+    BANXICO_PUBLICATION_TIME_UTC: str = "18:00"  # FIX published ~12:00 CDMX
+    BANXICO_PUBLICATION_WINDOW_MINUTES: int = 60  # +/- around publication
 
     CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3
     CIRCUIT_BREAKER_TIMEOUT_DURATION: int = 30
+    CIRCUIT_BREAKER_BACKEND: str = "local"  # "local" or "redis" (fleet-wide)
+    CIRCUIT_BREAKER_POLL_INTERVAL: float = 1.0  # seconds between Redis syncs
+    # Sliding-window mode, enabled by a window size and/or duration (0 = off)
+    CIRCUIT_BREAKER_WINDOW_SIZE: int = 0  # last N calls
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 0.0  # last T seconds
+    CIRCUIT_BREAKER_MINIMUM_CALLS: int = 10
+    CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_RATE_THRESHOLD: float = 0.5
+    # Calls slower than this fraction of the latency budget count as slow
+    CIRCUIT_BREAKER_SLOW_CALL_BUDGET_RATIO: float = 0.8
+
+    BANXICO_LATENCY_BUDGET_MS: int = 2000  # per upstream call, within the SLO
 
     HEALTH_CHECK_TIMEOUT: int = 5
 
+    METRICS_ENABLED: bool = True  # Prometheus /metrics and request middleware
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = True
 
+    @property
+    def slow_call_duration(self) -> float:
+        """Seconds after which a Banxico call counts as slow for the breaker"""
+        return (
+            self.BANXICO_LATENCY_BUDGET_MS
+            * self.CIRCUIT_BREAKER_SLOW_CALL_BUDGET_RATIO
+            / 1000
+        )
+
     @property
     def database_url(self) -> str:
         """Construct database URL"""
@@ -1,5 +1,6 @@
 import datetime
 import logging
+import time
 from contextlib import asynccontextmanager
 
 from sqlalchemy import Column, DateTime, Float, Index, Integer, String
@@ -7,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.core.metrics import DB_SESSION_DURATION, labels
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,8 @@ class ExchangeRate(Base):
         Index("idx_date", "date"),
         Index("idx_date_source", "date", "source"),
         Index("idx_created_at", "created_at"),
+        # MAX(updated_at) tells the rate index whether stored rates changed
+        Index("idx_updated_at", "updated_at"),
     )
 
 
@@ -41,6 +45,8 @@ class DatabaseManager:
     def __init__(self):
         self.engine = None
         self.session_maker = None
+        # Set once create_tables has reached the database, not just configured it
+        self.ready = False
 
     async def init_db(self):
         """Initialize database connection"""
@@ -71,6 +77,7 @@ class DatabaseManager:
         try:
             async with self.engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+            self.ready = True
             logger.info("Database tables created/verified")
         except Exception as e:
             logger.error(f"Table creation failed: {e}")
@@ -78,6 +85,7 @@ class DatabaseManager:
 
     async def close_db(self):
         """Close database connection"""
+        self.ready = False
         if self.engine:
             await self.engine.dispose()
             logger.info("Database connection closed")
@@ -85,15 +93,21 @@ class DatabaseManager:
     @asynccontextmanager
     async def get_session(self):
         """Get database session with automatic cleanup"""
+        started = time.perf_counter()
+        outcome = "commit"
         async with self.session_maker() as session:
             try:
                 yield session
                 await session.commit()
             except Exception:
+                outcome = "rollback"
                 await session.rollback()
                 raise
             finally:
                 await session.close()
+                labels(DB_SESSION_DURATION, outcome).observe(
+                    time.perf_counter() - started
+                )
 
     async def health_check(self) -> bool:
         """Check database health"""
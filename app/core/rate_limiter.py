@@ -0,0 +1,228 @@
+# app/core/rate_limiter.py
+import asyncio
+import logging
+import math
+import time
+from typing import Any, NamedTuple
+
+from app.core.metrics import RATE_LIMITER_DECISIONS, RATE_LIMITER_REMAINING, labels
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class Quota(NamedTuple):
+    """At most ``requests`` calls in any ``period`` seconds"""
+
+    requests: int
+    period: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        # burst + rate * period == requests, so no window can exceed the quota
+        return (self.requests - self.burst) / self.period
+
+
+class RateLimitExceededError(Exception):
+    """Raised without making the call when the quota would be exceeded"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``capacity`` tokens refilled at ``rate`` per second.
+
+    ``acquire`` waits until a token is available, so concurrent callers are
+    spread out at the refill rate once the initial burst is spent. Over any
+    window of T seconds at most ``capacity + rate * T`` tokens are handed out.
+    """
+
+    def __init__(self, capacity: int, rate: float, name: str = "default"):
+        if capacity < 1 or rate <= 0:
+            raise ValueError("Token bucket needs capacity >= 1 and rate > 0")
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    @classmethod
+    def for_quota(
+        cls, requests: int, period: float, burst: int, name: str = "default"
+    ) -> "TokenBucket":
+        """Bucket that never exceeds ``requests`` in any ``period`` seconds"""
+        if not 0 < burst < requests:
+            raise ValueError("Burst must be between 0 and the quota")
+        return cls(burst, Quota(requests, period, burst).rate, name=name)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        # The lock queues waiters in arrival order while the head one sleeps
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                logger.debug(f"Token bucket '{self.name}' waiting {wait:.2f}s")
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            self.acquired += 1
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def get_stats(self) -> dict[str, float]:
+        return {
+            "capacity": self.capacity,
+            "rate": self.rate,
+            "available": round(self.available(), 2),
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited_seconds, 2),
+        }
+
+
+# KEYS one bucket hash per quota; ARGV per quota: capacity, rate, key ttl.
+# Redis' own clock is used so instances with skewed clocks share one timeline.
+_ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[3 * i - 2])
+    local rate = tonumber(ARGV[3 * i - 1])
+    local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or capacity
+    local elapsed = math.max(now - (tonumber(state[2]) or now), 0)
+    tokens = math.min(capacity, tokens + elapsed * rate)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+local result = {wait == 0 and 1 or 0, tostring(wait)}
+for i, key in ipairs(KEYS) do
+    if wait == 0 then
+        levels[i] = levels[i] - 1
+        redis.call('HSET', key, 'tokens', tostring(levels[i]), 'updated_at', now)
+        redis.call('EXPIRE', key, ARGV[3 * i])
+    end
+    result[i + 2] = tostring(levels[i])
+end
+return result
+"""
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisTokenBucket:
+    """
+    Fleet-wide token buckets in Redis, one per quota, e.g. per 5 minutes and
+    per day.
+
+    A Lua script refills every bucket and takes one token from each only if
+    all of them have one, so concurrent instances never overspend a quota.
+    Callers wait up to ``max_wait`` for a token, otherwise the call is
+    rejected with the time until one is available. While Redis is unreachable
+    calls are let through rather than blocking Banxico entirely.
+    """
+
+    def __init__(self, name: str, quotas: list[Quota], max_wait: float = 0.0):
+        for quota in quotas:
+            if not 0 < quota.burst < quota.requests:
+                raise ValueError("Burst must be between 0 and the quota")
+        self.name = name
+        self.quotas = quotas
+        self.max_wait = max_wait
+        self.keys = [f"ratelimit:{name}:{quota.period:g}" for quota in quotas]
+        self.remaining = [float(quota.burst) for quota in quotas]
+        self.allowed = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+        self._scripts: dict[tuple[int, str], Any] = {}
+
+    def _script(self, source: str):
+        client = redis_client.client
+        key = (id(client), source)
+        if key not in self._scripts:
+            self._scripts[key] = client.register_script(source)
+        return self._scripts[key]
+
+    async def _try_acquire(self) -> float:
+        """Take a token from every bucket; 0 on success, else seconds to wait"""
+        args = []
+        for quota in self.quotas:
+            # A bucket left alone this long is full again, same as a missing key
+            args += [quota.burst, quota.rate, math.ceil(quota.burst / quota.rate) + 1]
+        result = await self._script(_ACQUIRE_SCRIPT)(keys=self.keys, args=args)
+
+        self.remaining = [float(_decode(level)) for level in result[2:]]
+        for quota, level in zip(self.quotas, self.remaining):
+            labels(RATE_LIMITER_REMAINING, self.name, f"{quota.period:g}").set(level)
+        return 0.0 if int(result[0]) else float(_decode(result[1]))
+
+    async def acquire(self, max_wait: float | None = None):
+        budget = self.max_wait if max_wait is None else max_wait
+        waited = False
+        while True:
+            try:
+                wait = await self._try_acquire()
+            except Exception as e:
+                logger.error(f"Rate limiter '{self.name}' unavailable, allowing: {e}")
+                labels(RATE_LIMITER_DECISIONS, self.name, "unchecked").inc()
+                return
+
+            if wait == 0:
+                self.allowed += 1
+                decision = "waited" if waited else "allowed"
+                labels(RATE_LIMITER_DECISIONS, self.name, decision).inc()
+                return
+            if wait > budget:
+                self.rejected += 1
+                labels(RATE_LIMITER_DECISIONS, self.name, "rejected").inc()
+                logger.warning(
+                    f"Rate limiter '{self.name}' rejected a call "
+                    f"(next token in {wait:.1f}s)"
+                )
+                raise RateLimitExceededError(
+                    f"Rate limit '{self.name}' exhausted", retry_after=wait
+                )
+
+            budget -= wait
+            waited = True
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def get_status(self) -> dict:
+        return {
+            "name": self.name,
+            "backend": "redis",
+            "quotas": [
+                {
+                    "requests": quota.requests,
+                    "period_seconds": quota.period,
+                    "remaining": round(level, 2),
+                }
+                for quota, level in zip(self.quotas, self.remaining)
+            ],
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "waited_seconds": round(self.waited_seconds, 2),
+        }
@@ -1,22 +1,115 @@
+import asyncio
+import json
 import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
 
 import redis.asyncio as redis
+from redis.exceptions import ConnectionError as RedisConnectionError
 
 from app.core.config import settings
+from app.core.local_cache import LocalCache
+from app.core.metrics import (
+    REDIS_POOL_ACQUIRE_DURATION,
+    REDIS_POOL_CONNECTIONS,
+    REDIS_POOL_TIMEOUTS,
+    labels,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """
+    Bounded pool that makes commands wait up to ``timeout`` for a free
+    connection instead of opening an unbounded number of them, and records
+    how long each acquisition took (queueing plus connection setup) and how
+    many connections are in use.
+    """
+
+    def __init__(self, max_connections: int, timeout: float, **connection_kwargs):
+        super().__init__(
+            max_connections=max_connections, timeout=timeout, **connection_kwargs
+        )
+        self.acquired = 0
+        self.timeouts = 0
+        self.acquire_seconds = 0.0
+        self.max_acquire_seconds = 0.0
+        labels(REDIS_POOL_CONNECTIONS, "max").set(max_connections)
+
+    def _observe_usage(self):
+        labels(REDIS_POOL_CONNECTIONS, "in_use").set(len(self._in_use_connections))
+        labels(REDIS_POOL_CONNECTIONS, "idle").set(len(self._available_connections))
+
+    async def get_connection(self, command_name, *keys, **options):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(command_name, *keys, **options)
+        except RedisConnectionError as e:
+            if "No connection available" in str(e):
+                self.timeouts += 1
+                REDIS_POOL_TIMEOUTS.inc()
+                logger.warning(
+                    f"Redis pool exhausted ({self.max_connections} connections)"
+                )
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            REDIS_POOL_ACQUIRE_DURATION.observe(elapsed)
+            self.acquire_seconds += elapsed
+            self.max_acquire_seconds = max(self.max_acquire_seconds, elapsed)
+
+        self.acquired += 1
+        self._observe_usage()
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self._observe_usage()
+
+    def get_stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_acquire_ms": (
+                round(self.acquire_seconds / self.acquired * 1000, 3)
+                if self.acquired
+                else 0.0
+            ),
+            "max_acquire_ms": round(self.max_acquire_seconds * 1000, 3),
+        }
+
+
 class RedisClient:
     """Async Redis client wrapper with logging and error handling."""
 
     def __init__(self):
         self._client: redis.Redis | None = None
+        self._pool: InstrumentedConnectionPool | None = None
+        self.instance_id = uuid.uuid4().hex
+        self.local_cache: LocalCache | None = (
+            LocalCache(
+                max_entries=settings.L1_CACHE_MAX_ENTRIES,
+                default_ttl=settings.L1_CACHE_TTL,
+            )
+            if settings.L1_CACHE_ENABLED
+            else None
+        )
+        self.hits = 0
+        self.misses = 0
+        self._listener: asyncio.Task | None = None
 
     @property
     def client(self) -> redis.Redis:
         if self._client is None:
-            self._client = redis.Redis(
+            self._pool = InstrumentedConnectionPool(
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
                 host=settings.REDIS_HOST,
                 port=settings.REDIS_PORT,
                 db=settings.REDIS_DB,
@@ -26,6 +119,7 @@ class RedisClient:
                 socket_connect_timeout=5,
                 socket_timeout=5,
             )
+            self._client = redis.Redis(connection_pool=self._pool)
         return self._client
 
     async def ping(self) -> bool:
@@ -35,34 +129,111 @@ class RedisClient:
             logger.error(f"Redis ping failed: {e}")
             return False
 
-    async def get(self, key: str) -> str | None:
+    async def get(self, key: str, use_local: bool = True) -> str | None:
+        if use_local and self.local_cache is not None:
+            value = self.local_cache.get(key)
+            if value is not None:
+                return value
+
         try:
-            return await self.client.get(key)
+            value = await self.client.get(key)
         except Exception as e:
             logger.error(f"Redis GET error for key '{key}': {e}")
             return None
 
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if use_local and self.local_cache is not None:
+                self.local_cache.set(key, value)
+        return value
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        """Values of many keys from Redis in one round trip (bypasses L1)"""
+        if not keys:
+            return []
+        try:
+            values = await self.client.mget(keys)
+        except Exception as e:
+            logger.error(f"Redis MGET error for keys {keys}: {e}")
+            return [None] * len(keys)
+
+        hits = sum(value is not None for value in values)
+        self.hits += hits
+        self.misses += len(values) - hits
+        return values
+
+    async def mset(
+        self, mapping: Mapping[str, str], ex: int | Mapping[str, int] | None = None
+    ) -> bool:
+        """
+        Write many keys in one round trip. ``ex`` is one TTL for every key or
+        a TTL per key; with TTLs the SETs are pipelined, as MSET takes none.
+        """
+        if not mapping:
+            return True
+        try:
+            if ex is None:
+                result = await self.client.mset(mapping)
+            else:
+                async with self.pipeline() as pipe:
+                    for key, value in mapping.items():
+                        pipe.set(key, value, ex=ex if isinstance(ex, int) else ex[key])
+                    result = all(await pipe.execute())
+        except Exception as e:
+            logger.error(f"Redis MSET error for keys {list(mapping)}: {e}")
+            return False
+
+        if self.local_cache is not None:
+            for key, value in mapping.items():
+                ttl = ex if ex is None or isinstance(ex, int) else ex[key]
+                self.local_cache.set(key, value, ttl)
+            await self._publish_invalidation(*mapping)
+        return result
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator:
+        """
+        Queue commands and send them together with ``await pipe.execute()``,
+        on a single pooled connection. Bypasses L1: callers writing cached
+        keys this way own their invalidation.
+        """
+        async with self.client.pipeline(transaction=transaction) as pipe:
+            yield pipe
+
     async def set(self, key: str, value: str, ex: int | None = None) -> bool:
         try:
-            return await self.client.set(key, value, ex=ex)
+            result = await self.client.set(key, value, ex=ex)
         except Exception as e:
             logger.error(f"Redis SET error for key '{key}': {e}")
             return False
 
+        await self._local_write(key, value, ex)
+        return result
+
     async def setex(self, key: str, time: int, value: str) -> bool:
         try:
-            return await self.client.setex(key, time, value)
+            result = await self.client.setex(key, time, value)
         except Exception as e:
             logger.error(f"Redis SETEX error for key '{key}': {e}")
             return False
 
+        await self._local_write(key, value, time)
+        return result
+
     async def delete(self, *keys: str) -> int:
         try:
-            return await self.client.delete(*keys)
+            result = await self.client.delete(*keys)
         except Exception as e:
             logger.error(f"Redis DELETE error for keys {keys}: {e}")
             return 0
 
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+            await self._publish_invalidation(*keys)
+        return result
+
     async def exists(self, key: str) -> bool:
         try:
             return bool(await self.client.exists(key))
@@ -70,11 +241,93 @@ class RedisClient:
             logger.error(f"Redis EXISTS error for key '{key}': {e}")
             return False
 
+    async def _local_write(self, key: str, value: str, ttl: int | None):
+        """Keep this instance's L1 current and tell the other instances to drop it"""
+        if self.local_cache is None:
+            return
+        self.local_cache.set(key, value, ttl)
+        await self._publish_invalidation(key)
+
+    async def _publish_invalidation(self, *keys: str):
+        message = json.dumps({"origin": self.instance_id, "keys": list(keys)})
+        try:
+            await self.client.publish(settings.CACHE_INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.error(f"Redis PUBLISH error for invalidation of {keys}: {e}")
+
+    def _handle_invalidation(self, data: str | bytes):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed invalidation message: {data!r}")
+            return
+        if message.get("origin") == self.instance_id or self.local_cache is None:
+            return
+        self.local_cache.delete(*message.get("keys", []))
+
+    async def _listen_for_invalidations(self):
+        channel = settings.CACHE_INVALIDATION_CHANNEL
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(channel)
+                logger.info(f"Listening for L1 invalidations on '{channel}'")
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries may have changed while disconnected
+                self.local_cache.clear()
+                logger.error(f"L1 invalidation listener error, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start_invalidation_listener(self):
+        """Subscribe to cross-instance L1 invalidations (no-op without L1)"""
+        if self.local_cache is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    async def stop_invalidation_listener(self):
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters for the in-process tier and for Redis itself"""
+        lookups = self.hits + self.misses
+        return {
+            "pool": self._pool.get_stats() if self._pool is not None else None,
+            "l1": (
+                self.local_cache.get_stats()
+                if self.local_cache is not None
+                else {"enabled": False}
+            ),
+            "redis": {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            },
+        }
+
     async def close(self):
         """Close Redis connection"""
+        await self.stop_invalidation_listener()
         if self._client:
-            await self._client.close()
+            await self._client.aclose()
             self._client = None
+        if self._pool is not None:
+            # A pool passed in explicitly is not closed along with the client
+            await self._pool.disconnect()
+            self._pool = None
 
 
 # Global Redis client singleton
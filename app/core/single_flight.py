@@ -0,0 +1,74 @@
+# app/core/single_flight.py
+import asyncio
+import functools
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the coroutine as a detached task; it and
+    every caller that arrives while the task is still in flight await it
+    through ``asyncio.shield`` and receive the same result or exception. A
+    caller that is cancelled (e.g. a disconnected client) only stops waiting,
+    the shared fetch keeps running for the others.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(
+        self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Any:
+        self.calls += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"Single-flight '{self.name}' coalesced call for '{key}'")
+        else:
+            task = asyncio.create_task(func(*args, **kwargs))
+            self._in_flight[key] = task
+            self.executions += 1
+            task.add_done_callback(functools.partial(self._release, key))
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def cancel(self) -> list[asyncio.Task]:
+        """Cancel every shared fetch still running and return their tasks"""
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    def in_flight(self) -> list[str]:
+        return list(self._in_flight)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+    def reset_stats(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
@@ -1,7 +1,7 @@
 import datetime
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 def get_timestamp():
@@ -56,3 +56,35 @@ class HistoricalRateResponse(BaseModel):
         if not v:
             raise ValueError("Historical data cannot be empty")
         return v
+
+
+# Same defaults as the query parameters of the single endpoints
+DEFAULT_DAYS = {"historical": 10, "average": 15}
+
+
+class RateQuery(BaseModel):
+    endpoint: Literal["current", "historical", "average"]
+    days: int | None = Field(default=None, ge=1, le=90)
+
+    @model_validator(mode="after")
+    def default_days(self):
+        self.days = self.days or DEFAULT_DAYS.get(self.endpoint)
+        if self.endpoint == "current":
+            self.days = None
+        return self
+
+
+class BatchRateRequest(BaseModel):
+    queries: list[RateQuery] = Field(..., min_length=1, max_length=20)
+
+
+class BatchRateResult(BaseModel):
+    endpoint: str
+    days: int | None = None
+    status: int
+    data: ExchangeRateData | list[ExchangeRateData] | float | None = None
+    detail: str | None = None
+
+
+class BatchRateResponse(BaseModel):
+    results: list[BatchRateResult]
@@ -1,6 +1,7 @@
 from .banxico import banxico_api
 from .health import full_health_check
 from .rates import get_average_rate, get_current_exchange_rate, get_historical_rates
+from .scheduler import refresh_scheduler
 
 __all__ = [
     "get_current_exchange_rate",
@@ -8,4 +9,5 @@ __all__ = [
     "get_average_rate",
     "banxico_api",
     "full_health_check",
+    "refresh_scheduler",
 ]
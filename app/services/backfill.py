@@ -0,0 +1,255 @@
+"""
+Multi-year Banxico -> Aurora backfill.
+
+Splits a long range into BACKFILL_CHUNK_DAYS chunks that are fetched
+concurrently, paced by a token bucket sized to Banxico's request quota, and
+upserted in bulk. Every finished chunk is recorded in a checkpoint file, so an
+interrupted run picks up the chunks still missing:
+
+    python -m app.services.backfill [--years 20] [--start 2005-01-01] [--end ...]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.database import db_manager
+from app.core.rate_limiter import TokenBucket
+from app.services.banxico import banxico_api
+from app.services.database import BulkSaveResult, database_service
+
+logger = logging.getLogger(__name__)
+
+Chunk = tuple[datetime.date, datetime.date]
+
+
+@dataclass
+class BackfillResult:
+    status: str
+    start_date: str
+    end_date: str
+    chunks: int = 0
+    resumed: int = 0  # chunks skipped because the checkpoint had them
+    failed: int = 0
+    fetched: int = 0
+    inserted: int = 0
+    updated: int = 0
+    duration_ms: float = 0.0
+    rows_per_second: float = 0.0
+
+
+def split_range(
+    start: datetime.date, end: datetime.date, chunk_days: int
+) -> list[Chunk]:
+    """Consecutive inclusive [start, end] chunks of at most chunk_days days"""
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + datetime.timedelta(days=chunk_days - 1), end)
+        chunks.append((start, chunk_end))
+        start = chunk_end + datetime.timedelta(days=1)
+    return chunks
+
+
+def banxico_limiter() -> TokenBucket:
+    """Bucket that keeps a backfill within Banxico's per-token quota"""
+    return TokenBucket.for_quota(
+        settings.BANXICO_RATE_LIMIT_REQUESTS,
+        settings.BANXICO_RATE_LIMIT_PERIOD,
+        settings.BACKFILL_BURST,
+        name="banxico",
+    )
+
+
+class Checkpoint:
+    """Range of a backfill and the chunks already written, as a JSON file"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.start: datetime.date | None = None
+        self.end: datetime.date | None = None
+        self.completed: set[str] = set()
+
+    @staticmethod
+    def key(chunk: Chunk) -> str:
+        return f"{chunk[0].isoformat()}:{chunk[1].isoformat()}"
+
+    def load(self) -> bool:
+        try:
+            data = json.loads(self.path.read_text())
+            self.start = datetime.date.fromisoformat(data["start"])
+            self.end = datetime.date.fromisoformat(data["end"])
+            self.completed = set(data["completed"])
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+        return True
+
+    def reset(self, start: datetime.date, end: datetime.date):
+        self.start, self.end = start, end
+        self.completed = set()
+
+    def mark_done(self, chunk: Chunk):
+        self.completed.add(self.key(chunk))
+        self.save()
+
+    def save(self):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "start": self.start.isoformat(),
+                    "end": self.end.isoformat(),
+                    "completed": sorted(self.completed),
+                }
+            )
+        )
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+async def _backfill_chunk(chunk: Chunk) -> tuple[int, BulkSaveResult]:
+    try:
+        columns = await banxico_api.fetch_series_columns(
+            start_date=chunk[0].strftime("%Y-%m-%d"),
+            end_date=chunk[1].strftime("%Y-%m-%d"),
+        )
+    except HTTPException as e:
+        if e.status_code != 404:
+            raise
+        # No published rates in this range (e.g. before the series started)
+        return 0, BulkSaveResult()
+
+    rates = columns.business_days().sorted(reverse=True).to_models()
+    saved = await database_service.save_exchange_rates(rates)
+    if saved.saved != len(rates):
+        raise RuntimeError(f"Saved {saved.saved} of {len(rates)} rates")
+    return len(rates), saved
+
+
+async def backfill_exchange_rates(
+    start: datetime.date,
+    end: datetime.date,
+    chunk_days: int = settings.BACKFILL_CHUNK_DAYS,
+    concurrency: int = settings.BACKFILL_CONCURRENCY,
+    checkpoint: Checkpoint | None = None,
+    limiter: TokenBucket | None = None,
+) -> BackfillResult:
+    """Fetch and store every chunk of [start, end] not yet in the checkpoint"""
+    started = time.perf_counter()
+    limiter = limiter or banxico_limiter()
+    chunks = split_range(start, end, chunk_days)
+    result = BackfillResult(
+        status="success",
+        start_date=start.isoformat(),
+        end_date=end.isoformat(),
+        chunks=len(chunks),
+    )
+
+    if checkpoint is not None:
+        if checkpoint.start != start or checkpoint.end != end:
+            checkpoint.reset(start, end)
+        pending = [c for c in chunks if Checkpoint.key(c) not in checkpoint.completed]
+        result.resumed = len(chunks) - len(pending)
+        if result.resumed:
+            logger.info(f"Resuming backfill: {result.resumed} chunks already done")
+    else:
+        pending = chunks
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk: Chunk):
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                fetched, saved = await _backfill_chunk(chunk)
+            except Exception as e:
+                result.failed += 1
+                logger.error(f"Backfill of {Checkpoint.key(chunk)} failed: {e}")
+                return
+
+        result.fetched += fetched
+        result.inserted += saved.inserted
+        result.updated += saved.updated
+        if checkpoint is not None:
+            checkpoint.mark_done(chunk)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Backfilled {Checkpoint.key(chunk)}: {fetched} rows "
+            f"({result.fetched / elapsed:.0f} rows/s overall)"
+        )
+
+    await asyncio.gather(*(run(chunk) for chunk in pending))
+
+    elapsed = time.perf_counter() - started
+    result.duration_ms = round(elapsed * 1000, 2)
+    result.rows_per_second = round(result.fetched / elapsed, 1) if elapsed else 0.0
+    if result.failed:
+        result.status = "failed"
+    elif checkpoint is not None:
+        checkpoint.clear()
+    logger.info(f"Banxico backfill finished: {result}")
+    return result
+
+
+async def _main(args: argparse.Namespace) -> int:
+    checkpoint = Checkpoint(args.checkpoint)
+    end = args.end or datetime.date.today()
+    start = args.start or end - datetime.timedelta(days=365 * args.years)
+    if checkpoint.load() and args.start is None and args.end is None:
+        # A default range moves with today; keep the interrupted run's range
+        start, end = checkpoint.start, checkpoint.end
+
+    if banxico_api.rate_limiter is not None:
+        # Unlike a request, a backfill can wait for the fleet's quota to refill
+        banxico_api.rate_limiter.max_wait = settings.BANXICO_RATE_LIMIT_PERIOD
+
+    await db_manager.init_db()
+    try:
+        await db_manager.create_tables()
+        result = await backfill_exchange_rates(
+            start,
+            end,
+            chunk_days=args.chunk_days,
+            concurrency=args.concurrency,
+            checkpoint=checkpoint,
+        )
+        print(json.dumps(asdict(result), indent=2))
+        return 0 if result.status == "success" else 1
+    finally:
+        await banxico_api.close()
+        await db_manager.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+    )
+    parser = argparse.ArgumentParser(description="Backfill Banxico rates into Aurora")
+    parser.add_argument(
+        "--years",
+        type=int,
+        default=settings.BACKFILL_YEARS,
+        help="Years back from --end to backfill when --start is not given",
+    )
+    parser.add_argument("--start", type=datetime.date.fromisoformat)
+    parser.add_argument("--end", type=datetime.date.fromisoformat)
+    parser.add_argument("--chunk-days", type=int, default=settings.BACKFILL_CHUNK_DAYS)
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.BACKFILL_CONCURRENCY
+    )
+    parser.add_argument("--checkpoint", default=settings.BACKFILL_CHECKPOINT_PATH)
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
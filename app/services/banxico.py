@@ -1,19 +1,133 @@
 import logging
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from datetime import date, timedelta
+from typing import TypeVar
 
 import httpx
+import orjson
 from fastapi import HTTPException
 
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    RedisCircuitBreakerBackend,
+)
 from app.core.config import settings
-from app.schemas.banxico import BanxicoResponse
+from app.core.metrics import BANXICO_REQUEST_DURATION, labels
+from app.core.rate_limiter import Quota, RateLimitExceededError, RedisTokenBucket
+from app.schemas.banxico import BanxicoDataPoint, BanxicoResponse
+from app.services.banxico_stream import DatosParser
+from app.services.rate_columns import RateColumns
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class BanxicoUnavailableError(HTTPException):
+    """Upstream failure (timeout, 5xx, bad payload) that counts against the breaker"""
+
 
 class BanxicoAPI:
     def __init__(self):
         self.base_url = settings.BANXICO_API_BASE_URL
         self.series_id = settings.BANXICO_SERIES_ID
-        self.timeout = 10.0
+        self.timeout = float(settings.BANXICO_TIMEOUT)
+        self.http2 = False
+        self._client: httpx.AsyncClient | None = None
+        # A 404 "no data" answer is healthy and does not trip the breaker
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            timeout_duration=settings.CIRCUIT_BREAKER_TIMEOUT_DURATION,
+            expected_exception=BanxicoUnavailableError,
+            name="banxico",
+            window_size=settings.CIRCUIT_BREAKER_WINDOW_SIZE or None,
+            window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS or None,
+            minimum_calls=settings.CIRCUIT_BREAKER_MINIMUM_CALLS,
+            failure_rate_threshold=settings.CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD,
+            slow_call_rate_threshold=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE_THRESHOLD,
+            slow_call_duration=settings.slow_call_duration,
+            backend=(
+                RedisCircuitBreakerBackend(
+                    "banxico", poll_interval=settings.CIRCUIT_BREAKER_POLL_INTERVAL
+                )
+                if settings.CIRCUIT_BREAKER_BACKEND == "redis"
+                else None
+            ),
+        )
+        # Every HTTP request to Banxico takes a token from the fleet's quotas
+        self.rate_limiter = (
+            RedisTokenBucket(
+                "banxico",
+                [
+                    Quota(
+                        settings.BANXICO_RATE_LIMIT_REQUESTS,
+                        settings.BANXICO_RATE_LIMIT_PERIOD,
+                        settings.BANXICO_RATE_LIMIT_BURST,
+                    ),
+                    Quota(
+                        settings.BANXICO_DAILY_LIMIT_REQUESTS,
+                        86400,
+                        settings.BANXICO_DAILY_LIMIT_BURST,
+                    ),
+                ],
+                max_wait=settings.BANXICO_RATE_LIMIT_MAX_WAIT,
+            )
+            if settings.BANXICO_RATE_LIMIT_ENABLED
+            else None
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived client so connections to Banxico are kept alive and reused."""
+        if self._client is None or self._client.is_closed:
+            self.http2 = settings.BANXICO_HTTP2
+            if self.http2 and not _http2_available():
+                logger.warning("BANXICO_HTTP2 is enabled but 'h2' is not installed")
+                self.http2 = False
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.BANXICO_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.BANXICO_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.BANXICO_KEEPALIVE_EXPIRY,
+                ),
+                headers={
+                    "Accept": "application/json",
+                    "User-Agent": "RatesService/1.0",
+                },
+            )
+        return self._client
+
+    async def start(self):
+        """Open the pooled client ahead of the first request"""
+        await self.circuit_breaker.start()
+        if self._client is None or self._client.is_closed:
+            self.client
+            logger.info(
+                f"Banxico HTTP client started "
+                f"(max_connections={settings.BANXICO_MAX_CONNECTIONS}, "
+                f"http2={self.http2})"
+            )
+
+    async def close(self):
+        """Close the pooled client and its keep-alive connections"""
+        await self.circuit_breaker.stop()
+        if self._client:
+            await self._client.aclose()
+            self._client = None
 
     async def fetch_series(
         self,
@@ -23,81 +137,229 @@ class BanxicoAPI:
         """
         Fetches exchange rate data from Banxico for a given date range
         or the latest available value if no range is provided.
+
+        Calls go through the circuit breaker: while it is open they fail at once
+        with a 503 carrying Retry-After instead of waiting on the timeout.
+        """
+        return await self._fetch(start_date, end_date, BanxicoResponse.model_validate)
+
+    async def fetch_series_columns(
+        self,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> RateColumns:
         """
+        Like fetch_series, but decodes `datos` straight into columnar arrays
+        instead of one pydantic model per data point. Meant for long ranges
+        (syncs, backfills, the historical window).
+        """
+        return await self._fetch(start_date, end_date, RateColumns.from_payload)
+
+    async def _fetch(
+        self,
+        start_date: str | None,
+        end_date: str | None,
+        parse: Callable[[dict], T],
+    ) -> T:
         endpoint = f"{self.base_url}/{self.series_id}/datos"
         if start_date and end_date:
             endpoint += f"/{start_date}/{end_date}"
         else:
             endpoint += "/oportuno"
 
+        try:
+            # Admitted by the breaker first, so no token is spent while it is
+            # OPEN; the wait for the token is not timed as Banxico latency
+            async with self.circuit_breaker.attempt(before=self._acquire_token):
+                return await self._request(endpoint, parse)
+        except CircuitBreakerOpenError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Banxico API temporarily unavailable",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            ) from e
+        except RateLimitExceededError as e:
+            raise self._rate_limited(e) from e
+
+    @staticmethod
+    def _rate_limited(error: RateLimitExceededError) -> HTTPException:
+        """Callers serve cached data; a miss is told when the quota refills"""
+        return HTTPException(
+            status_code=503,
+            detail="Banxico API rate limit reached",
+            headers={"Retry-After": str(math.ceil(error.retry_after))},
+        )
+
+    async def stream_series(
+        self, start_date: str, end_date: str
+    ) -> AsyncIterator[BanxicoDataPoint]:
+        """
+        Yield the data points of a date range as the response body arrives.
+
+        The body is parsed incrementally and never held in full, so peak memory
+        stays flat however long the range is. The whole stream counts as one
+        call of the circuit breaker, so errors mid-body trip it like a failed
+        fetch_series, with latency taken up to the response headers; an empty
+        range yields nothing.
+        """
+        endpoint = f"{self.base_url}/{self.series_id}/datos/{start_date}/{end_date}"
+        try:
+            async with self.circuit_breaker.attempt(
+                before=self._acquire_token
+            ) as timer:
+                response = await self._open_stream(endpoint)
+                timer.stop()
+                parser = DatosParser()
+                try:
+                    async for chunk in response.aiter_bytes():
+                        for fecha, dato in parser.feed(chunk):
+                            yield BanxicoDataPoint(fecha=fecha, dato=dato)
+                        if parser.done:
+                            break
+                    parser.close()
+                    logger.debug(f"Streamed {parser.count} data points from {endpoint}")
+                except httpx.TimeoutException as e:
+                    logger.error(f"Timeout streaming Banxico API: {endpoint}")
+                    raise BanxicoUnavailableError(
+                        status_code=504, detail="Banxico API timeout"
+                    ) from e
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.error(f"Invalid Banxico stream from {endpoint}: {e}")
+                    raise BanxicoUnavailableError(
+                        status_code=502,
+                        detail="Invalid response format from Banxico API",
+                    ) from e
+                finally:
+                    await response.aclose()
+        except CircuitBreakerOpenError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Banxico API temporarily unavailable",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            ) from e
+        except RateLimitExceededError as e:
+            raise self._rate_limited(e) from e
+
+    async def _open_stream(self, endpoint: str) -> httpx.Response:
+        """Send the request and return once the status line and headers are in"""
+        try:
+            logger.info(f"Streaming request to Banxico API: {endpoint}")
+            response = await self._get(endpoint, self._params(), stream=True)
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout calling Banxico API: {endpoint}")
+            raise BanxicoUnavailableError(
+                status_code=504, detail="Banxico API timeout"
+            ) from e
+        except httpx.HTTPError as e:
+            logger.error(f"Error calling Banxico API: {e}")
+            raise BanxicoUnavailableError(
+                status_code=502, detail="Banxico service unavailable"
+            ) from e
+
+        if response.is_error:
+            await response.aclose()
+            logger.error(f"HTTP error {response.status_code} from Banxico stream")
+            raise BanxicoUnavailableError(
+                status_code=502, detail="Banxico API returned an error"
+            )
+        return response
+
+    def _params(self) -> dict:
         params = {"mediaType": "json"}
         if settings.BANXICO_TOKEN:
             params["token"] = settings.BANXICO_TOKEN
+        return params
 
-        headers = {
-            "Accept": "application/json",
-            "User-Agent": "RatesService/1.0",
-        }
+    async def _acquire_token(self, max_wait: float | None = None):
+        """Take a token from the fleet's quotas for one HTTP request to Banxico"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(max_wait)
 
+    async def _get(
+        self, endpoint: str, params: dict, stream: bool = False
+    ) -> httpx.Response:
+        """GET against Banxico, recording its latency by response status"""
+        started = time.perf_counter()
+        status = "error"
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Making request to Banxico API: {endpoint}")
-                response = await client.get(endpoint, params=params, headers=headers)
-                response.raise_for_status()
+            if stream:
+                request = self.client.build_request("GET", endpoint, params=params)
+                response = await self.client.send(request, stream=True)
+            else:
+                response = await self.client.get(endpoint, params=params)
+            status = str(response.status_code)
+            return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        finally:
+            labels(BANXICO_REQUEST_DURATION, status).observe(
+                time.perf_counter() - started
+            )
 
-                raw_data = response.json()
-                logger.info(f"Banxico API response: {raw_data}")
+    async def _request(self, endpoint: str, parse: Callable[[dict], T]) -> T:
+        try:
+            logger.info(f"Making request to Banxico API: {endpoint}")
+            response = await self._get(endpoint, self._params())
+            response.raise_for_status()
 
-                if not raw_data.get("bmx") or not raw_data["bmx"].get("series"):
-                    logger.error(f"Invalid Banxico response structure: {raw_data}")
-                    raise HTTPException(
-                        status_code=502,
-                        detail="Invalid response format from Banxico API",
-                    )
+            raw_data = orjson.loads(response.content)
+            logger.debug(f"Banxico API response: {len(response.content)} bytes")
 
-                series = raw_data["bmx"]["series"][0]
-                if not series.get("datos"):
-                    logger.warning(f"No data in Banxico response for {endpoint}")
-                    if "oportuno" in endpoint:
-                        logger.info(
-                            "Trying with recent date range instead of /oportuno"
-                        )
-                        from datetime import date, timedelta
-
-                        end_date = date.today()
-                        start_date = end_date - timedelta(days=5)
-                        return await self.fetch_series(
-                            start_date=start_date.strftime("%d-%m-%Y"),
-                            end_date=end_date.strftime("%d-%m-%Y"),
-                        )
-
-                    raise HTTPException(
-                        status_code=404,
-                        detail="No exchange rate data available from Banxico",
+            if not raw_data.get("bmx") or not raw_data["bmx"].get("series"):
+                logger.error(
+                    f"Invalid Banxico response structure: {response.text[:200]}"
+                )
+                raise BanxicoUnavailableError(
+                    status_code=502,
+                    detail="Invalid response format from Banxico API",
+                )
+
+            series = raw_data["bmx"]["series"][0]
+            if not series.get("datos"):
+                logger.warning(f"No data in Banxico response for {endpoint}")
+                if endpoint.endswith("/oportuno"):
+                    logger.info("Trying with recent date range instead of /oportuno")
+                    # Already inside the breaker, so only an immediate token
+                    await self._acquire_token(max_wait=0)
+                    end_date = date.today()
+                    start_date = end_date - timedelta(days=5)
+                    return await self._request(
+                        f"{self.base_url}/{self.series_id}/datos/"
+                        f"{start_date.strftime('%d-%m-%Y')}/"
+                        f"{end_date.strftime('%d-%m-%Y')}",
+                        parse,
                     )
 
-                return BanxicoResponse.model_validate(raw_data)
+                raise HTTPException(
+                    status_code=404,
+                    detail="No exchange rate data available from Banxico",
+                )
+
+            return parse(raw_data)
 
         except httpx.TimeoutException as e:
             logger.error(f"Timeout calling Banxico API: {endpoint}")
-            raise HTTPException(status_code=504, detail="Banxico API timeout") from e
+            raise BanxicoUnavailableError(
+                status_code=504, detail="Banxico API timeout"
+            ) from e
 
         except httpx.HTTPStatusError as e:
             error_text = e.response.text
             logger.error(
                 f"HTTP error {e.response.status_code} from Banxico: {error_text}"
             )
-            raise HTTPException(
+            raise BanxicoUnavailableError(
                 status_code=502, detail="Banxico API returned an error"
             ) from e
 
-        except HTTPException:
-            # Re-raise HTTP exceptions (our custom ones)
+        except (HTTPException, RateLimitExceededError):
+            # Re-raise HTTP exceptions (our custom ones) and quota rejections
             raise
 
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
-            raise HTTPException(
+            raise BanxicoUnavailableError(
                 status_code=502, detail="Banxico service unavailable"
             ) from e
 
@@ -0,0 +1,92 @@
+"""
+Incremental parser for the ``datos`` array of a Banxico series response.
+
+Bytes are fed as they arrive from the network; every complete data point is
+returned as a ``(fecha, dato)`` pair and dropped from the buffer, so memory is
+bounded by one network chunk plus one data point however long the range is.
+Only the first series is read, matching ``BanxicoAPI.fetch_series``.
+"""
+
+import codecs
+import json
+import re
+
+_DATOS_START = re.compile(r'"datos"\s*:\s*\[')
+
+# Preamble (bmx/series/idSerie/titulo) scanned for "datos" before giving up
+MAX_PREAMBLE_CHARS = 64 * 1024
+# A single data point is ~40 characters; anything far larger is malformed
+MAX_ITEM_CHARS = 4 * 1024
+
+_SEPARATORS = frozenset(" \t\r\n,")
+
+
+class DatosParser:
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._in_datos = False
+        self.done = False
+        self.count = 0
+
+    def feed(self, chunk: bytes) -> list[tuple[str, str]]:
+        """Data points completed by this chunk, in payload order"""
+        if self.done:
+            return []
+        self._buffer += self._decoder.decode(chunk)
+
+        if not self._in_datos:
+            match = _DATOS_START.search(self._buffer)
+            if match is None:
+                if len(self._buffer) > MAX_PREAMBLE_CHARS:
+                    raise ValueError("No datos array in Banxico response")
+                return []
+            self._buffer = self._buffer[match.end() :]
+            self._in_datos = True
+
+        buffer, pos, end = self._buffer, 0, len(self._buffer)
+        items = []
+        while True:
+            while pos < end and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos == end:
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                pos += 1
+                break
+            try:
+                item, pos_after = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The data point continues in the next chunk
+                if end - pos > MAX_ITEM_CHARS:
+                    raise ValueError("Malformed data point in Banxico response")
+                break
+            try:
+                items.append((item["fecha"], item["dato"]))
+            except (KeyError, TypeError) as e:
+                raise ValueError(f"Malformed data point: {item!r}") from e
+            pos = pos_after
+
+        self._buffer = buffer[pos:]
+        self.count += len(items)
+        return items
+
+    def close(self):
+        """Check that the datos array was closed before the body ended"""
+        if self.done:
+            return
+        if not self._in_datos and self._is_complete_document():
+            # Banxico leaves "datos" out when the range has no data
+            self.done = True
+            return
+        raise ValueError("Banxico response ended before the datos array closed")
+
+    def _is_complete_document(self) -> bool:
+        # Without "datos" the whole body is still buffered, and it is small
+        try:
+            payload = json.loads(self._buffer + self._decoder.decode(b"", final=True))
+            return bool(payload["bmx"]["series"])
+        except (ValueError, KeyError, TypeError):
+            return False
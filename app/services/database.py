@@ -1,19 +1,69 @@
 import logging
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 
 from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
 from app.core.database import ExchangeRate, db_manager
 from app.schemas.rates import ExchangeRateData
+from app.services.rate_index import RangeStats, RateIndex
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class BulkSaveResult:
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.inserted + self.updated
+
+
+def _upsert_statement(rates: List[ExchangeRateData]):
+    """INSERT ... ON DUPLICATE KEY UPDATE keyed on the unique date column"""
+    now = datetime.now(timezone.utc)
+    stmt = mysql_insert(ExchangeRate).values(
+        [
+            {
+                "date": datetime.combine(rate.date, datetime.min.time()),
+                "rate": rate.rate,
+                "source": rate.source,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for rate in rates
+        ]
+    )
+    return stmt.on_duplicate_key_update(
+        rate=stmt.inserted.rate,
+        source=stmt.inserted.source,
+        updated_at=stmt.inserted.updated_at,
+    )
+
+
 class DatabaseService:
     """Service for database operations"""
 
+    def __init__(self):
+        # Grows incrementally as newer rates are stored and is rebuilt when
+        # older dates are written or stored rates change; see _refresh_rate_index
+        self._rate_index = RateIndex()
+        self._rate_index_stamp: tuple | None = None
+        self._rate_index_checked_at: float | None = None
+
+    def _invalidate_rate_index(self):
+        """Rebuild the index on the next read; this instance just wrote rates"""
+        self._rate_index_stamp = None
+        self._rate_index_checked_at = None
+
     async def save_exchange_rate(self, rate_data: ExchangeRateData) -> bool:
         """Save exchange rate to database"""
         try:
@@ -49,9 +99,51 @@ class DatabaseService:
         except Exception as e:
             logger.error(f"Failed to save exchange rate: {e}")
             return False
+        finally:
+            self._invalidate_rate_index()
+
+    async def save_exchange_rates(
+        self, rates: List[ExchangeRateData], chunk_size: Optional[int] = None
+    ) -> BulkSaveResult:
+        """Upsert many exchange rates with one multi-row statement per chunk"""
+        # The last value wins when the same date appears more than once
+        rows = list({rate.date: rate for rate in rates}.values())
+        chunk_size = chunk_size or settings.DATABASE_BULK_CHUNK_SIZE
+        result = BulkSaveResult()
+        if not rows:
+            return result
 
-    async def get_latest_exchange_rate(self) -> Optional[ExchangeRateData]:
-        """Get the most recent exchange rate from database"""
+        try:
+            async with db_manager.get_session() as session:
+                for offset in range(0, len(rows), chunk_size):
+                    chunk = rows[offset : offset + chunk_size]
+                    outcome = await session.execute(_upsert_statement(chunk))
+                    # MySQL reports 1 affected row per insert and 2 per update
+                    updated = max(outcome.rowcount - len(chunk), 0)
+                    result.updated += updated
+                    result.inserted += len(chunk) - updated
+
+            logger.debug(
+                f"Upserted {len(rows)} exchange rates "
+                f"({result.inserted} inserted, {result.updated} updated)"
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Failed to bulk save exchange rates: {e}")
+            return BulkSaveResult()
+        finally:
+            self._invalidate_rate_index()
+
+    async def get_latest_exchange_rate(
+        self, raise_errors: bool = False
+    ) -> Optional[ExchangeRateData]:
+        """
+        Get the most recent exchange rate from database.
+
+        With raise_errors, a database failure propagates instead of looking
+        like an empty table.
+        """
         try:
             async with db_manager.get_session() as session:
                 result = await session.execute(
@@ -69,6 +161,8 @@ class DatabaseService:
 
         except Exception as e:
             logger.error(f"Failed to get latest exchange rate: {e}")
+            if raise_errors:
+                raise
             return None
 
     async def get_historical_rates(self, days: int = 10) -> List[ExchangeRateData]:
@@ -104,31 +198,177 @@ class DatabaseService:
             logger.error(f"Failed to get historical rates: {e}")
             return []
 
-    async def get_average_rate(self, days: int = 15) -> Optional[float]:
-        """Calculate average rate from database"""
+    async def get_recent_rates(
+        self, limit: int
+    ) -> tuple[List[ExchangeRateData], Optional[datetime]]:
+        """Newest stored rates (most recent first) and when the newest was written"""
         try:
-            end_date = date.today()
-            start_date = end_date - timedelta(days=days)
-
             async with db_manager.get_session() as session:
                 result = await session.execute(
-                    select(func.avg(ExchangeRate.rate)).where(
-                        and_(
-                            ExchangeRate.date
-                            >= datetime.combine(start_date, datetime.min.time()),
-                            ExchangeRate.date
-                            <= datetime.combine(end_date, datetime.max.time()),
+                    select(ExchangeRate).order_by(ExchangeRate.date.desc()).limit(limit)
+                )
+                rate_records = result.scalars().all()
+
+                if not rate_records:
+                    return [], None
+                return [
+                    ExchangeRateData(
+                        date=record.date.date(), rate=record.rate, source=record.source
+                    )
+                    for record in rate_records
+                ], rate_records[0].updated_at
+
+        except Exception as e:
+            logger.error(f"Failed to get recent rates: {e}")
+            return [], None
+
+    @staticmethod
+    def _range_filter(start_date: date, end_date: date, after: Optional[date]):
+        """Bounds on the unique date index; `after` is an exclusive keyset cursor"""
+        lower = (
+            ExchangeRate.date > datetime.combine(after, datetime.max.time())
+            if after is not None and after >= start_date
+            else ExchangeRate.date >= datetime.combine(start_date, datetime.min.time())
+        )
+        return and_(
+            lower, ExchangeRate.date <= datetime.combine(end_date, datetime.max.time())
+        )
+
+    async def iter_rate_batches(
+        self,
+        start_date: date,
+        end_date: date,
+        after: Optional[date] = None,
+        limit: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[List[ExchangeRateData]]:
+        """
+        Stored rates between two dates, oldest first, in batches.
+
+        Each batch is one index range scan continuing after the last date seen,
+        in its own short session, so memory stays at one batch and a slow
+        consumer never holds a pooled connection. Errors propagate: a silently
+        truncated range would look complete.
+        """
+        batch_size = batch_size or settings.DATABASE_STREAM_BATCH_SIZE
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            query = (
+                select(ExchangeRate.date, ExchangeRate.rate, ExchangeRate.source)
+                .where(self._range_filter(start_date, end_date, after))
+                .order_by(ExchangeRate.date)
+                .limit(size)
+            )
+            async with db_manager.get_session() as session:
+                rows = (await session.execute(query)).all()
+
+            if rows:
+                yield [
+                    ExchangeRateData(
+                        date=row.date.date(), rate=row.rate, source=row.source
+                    )
+                    for row in rows
+                ]
+            if len(rows) < size:
+                return
+            after = rows[-1].date.date()
+            if remaining is not None:
+                remaining -= len(rows)
+
+    @staticmethod
+    def _settled(stamp: tuple) -> tuple | None:
+        """
+        The stamp, or None while its newest write is too recent to rely on.
+
+        updated_at holds whole seconds, so another write within the same
+        second would leave max(updated_at) unchanged; such a stamp is not kept
+        and the next check rebuilds the index instead.
+        """
+        newest = stamp[2]
+        horizon = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=2)
+        return stamp if newest is None or newest < horizon else None
+
+    async def _refresh_rate_index(self) -> RateIndex:
+        """
+        Bring the in-memory index up to date with the table.
+
+        Writes made by this instance invalidate the index directly. Writes by
+        other instances are found by comparing the row count, first date and
+        latest update time (all read through indexes) with what was indexed,
+        at most every DATABASE_INDEX_CHECK_INTERVAL seconds: when unchanged
+        the index is current, when only rows newer than the last indexed date
+        were added they are appended, and anything else (a backfill of older
+        dates, a corrected rate) rebuilds the index from the table.
+        """
+        now = time.monotonic()
+        if (
+            self._rate_index_stamp is not None
+            and self._rate_index_checked_at is not None
+            and now - self._rate_index_checked_at
+            < settings.DATABASE_INDEX_CHECK_INTERVAL
+        ):
+            return self._rate_index
+
+        stamp_query = select(
+            func.count(ExchangeRate.id),
+            func.min(ExchangeRate.date),
+            func.max(ExchangeRate.updated_at),
+        )
+        async with db_manager.get_session() as session:
+            stamp = tuple((await session.execute(stamp_query)).one())
+            self._rate_index_checked_at = now
+            if stamp == self._rate_index_stamp:
+                return self._rate_index
+
+            index = self._rate_index
+            previous = self._rate_index_stamp
+            if previous is not None and len(index) and stamp[1] == previous[1]:
+                last = datetime.combine(index.last_date, datetime.max.time())
+                changed = (
+                    await session.execute(
+                        select(ExchangeRate.date, ExchangeRate.rate)
+                        .where(
+                            (ExchangeRate.date > last)
+                            | (ExchangeRate.updated_at > previous[2])
                         )
+                        .order_by(ExchangeRate.date)
                     )
-                )
-                avg_rate = result.scalar()
+                ).all()
+                if len(index) + len(changed) == stamp[0] and all(
+                    row.date > last for row in changed
+                ):
+                    index.extend((row.date.date(), row.rate) for row in changed)
+                    self._rate_index_stamp = self._settled(stamp)
+                    return index
 
-                return float(avg_rate) if avg_rate else None
+            result = await session.execute(
+                select(ExchangeRate.date, ExchangeRate.rate).order_by(ExchangeRate.date)
+            )
+            self._rate_index = RateIndex((row.date.date(), row.rate) for row in result)
+            self._rate_index_stamp = self._settled(stamp)
+            logger.debug(f"Rebuilt rate index with {len(self._rate_index)} rates")
+        return self._rate_index
 
+    async def get_rate_stats(
+        self, start_date: date, end_date: date
+    ) -> Optional[RangeStats]:
+        """Average, min, max and count of stored rates between two dates"""
+        try:
+            index = await self._refresh_rate_index()
+            return index.between(start_date, end_date)
         except Exception as e:
-            logger.error(f"Failed to calculate average rate: {e}")
+            logger.error(f"Failed to calculate rate stats: {e}")
             return None
 
+    async def get_average_rate(self, days: int = 15) -> Optional[float]:
+        """Calculate average rate from database"""
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days)
+
+        stats = await self.get_rate_stats(start_date, end_date)
+        return stats.average if stats else None
+
     async def get_rate_count(self) -> int:
         """Get total number of rates in database"""
         try:
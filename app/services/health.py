@@ -2,7 +2,9 @@ import datetime
 import logging
 
 from app.core.redis import redis_client
+from app.services import rates
 from app.services.banxico import banxico_api
+from app.services.scheduler import refresh_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -63,5 +65,17 @@ async def full_health_check() -> dict:
     return {
         "status": "healthy" if healthy else "unhealthy",
         "services": [banxico, redis],
+        "cache": {
+            **redis_client.get_stats(),
+            "tiers": rates.get_tier_stats(),
+            "single_flight": rates.rates_flight.get_stats(),
+        },
+        "circuit_breaker": banxico_api.circuit_breaker.get_status(),
+        "rate_limiter": (
+            banxico_api.rate_limiter.get_status()
+            if banxico_api.rate_limiter is not None
+            else {"enabled": False}
+        ),
+        "scheduler": refresh_scheduler.get_status(),
         "checked_at": get_timestamp(),
     }
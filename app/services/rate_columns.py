@@ -0,0 +1,124 @@
+import functools
+import math
+from array import array
+from calendar import monthrange
+from collections.abc import Iterable
+from datetime import date
+
+from app.schemas.rates import ExchangeRateData
+
+
+@functools.cache
+def _month_bounds(month_year: str) -> tuple[int, int]:
+    """'07/2025' → (ordinal of the day before the 1st, days in the month)"""
+    try:
+        month, year = map(int, month_year.split("/"))
+        return date(year, month, 1).toordinal() - 1, monthrange(year, month)[1]
+    except ValueError:
+        return 0, 0
+
+
+def _ordinal(fecha: str) -> int:
+    """'16/07/2025' → date(2025, 7, 16).toordinal(), or 0 when malformed"""
+    day, _, month_year = fecha.partition("/")
+    before_first, days = _month_bounds(month_year)
+    try:
+        day = int(day)
+    except ValueError:
+        return 0
+    return before_first + day if 0 < day <= days else 0
+
+
+class RateColumns:
+    """
+    An exchange rate series as parallel arrays instead of per-row objects.
+
+    Holds day ordinals, float rates and a validity mask (0 for ``N/E`` or
+    malformed rows). Filtering, sorting and slicing return new columns without
+    allocating a model per row; ``to_models`` and ``to_dicts`` materialize only
+    the rows that actually leave the service.
+    """
+
+    __slots__ = ("ordinals", "rates", "valid")
+
+    def __init__(
+        self,
+        ordinals: array | None = None,
+        rates: array | None = None,
+        valid: bytearray | None = None,
+    ):
+        self.ordinals = ordinals if ordinals is not None else array("l")
+        self.rates = rates if rates is not None else array("d")
+        self.valid = valid if valid is not None else bytearray()
+
+    @classmethod
+    def from_datos(cls, datos: Iterable[tuple[str, str]]) -> "RateColumns":
+        """Columns from Banxico (fecha, dato) pairs, in their original order"""
+        ordinals, rates, valid = array("l"), array("d"), bytearray()
+        for fecha, dato in datos:
+            ordinal = _ordinal(fecha)
+            try:
+                rate = float(dato)
+            except ValueError:
+                # Most often Banxico's N/E for days without a value
+                rate = math.nan
+            ordinals.append(ordinal)
+            rates.append(rate)
+            valid.append(ordinal > 0 and 0 < rate < math.inf)
+        return cls(ordinals, rates, valid)
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "RateColumns":
+        """Columns for the first series of a decoded Banxico JSON payload"""
+        datos = payload["bmx"]["series"][0].get("datos") or ()
+        return cls.from_datos((item["fecha"], item["dato"]) for item in datos)
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def __getitem__(self, index: slice) -> "RateColumns":
+        return RateColumns(self.ordinals[index], self.rates[index], self.valid[index])
+
+    def _take(self, positions: Iterable[int]) -> "RateColumns":
+        positions = list(positions)
+        return RateColumns(
+            array("l", [self.ordinals[i] for i in positions]),
+            array("d", [self.rates[i] for i in positions]),
+            bytearray(self.valid[i] for i in positions),
+        )
+
+    def business_days(self) -> "RateColumns":
+        """Valid rows dated Monday to Friday (ordinal 1 is a Monday)"""
+        ordinals, valid = self.ordinals, self.valid
+        return self._take(
+            i for i in range(len(ordinals)) if valid[i] and (ordinals[i] - 1) % 7 < 5
+        )
+
+    def sorted(self, reverse: bool = False) -> "RateColumns":
+        """Rows ordered by date; Banxico's ascending order is reused as is"""
+        ordinals = self.ordinals
+        ascending = all(ordinals[i] <= ordinals[i + 1] for i in range(len(self) - 1))
+        if ascending:
+            return self[::-1] if reverse else self
+        return self._take(
+            sorted(range(len(self)), key=ordinals.__getitem__, reverse=reverse)
+        )
+
+    def to_models(self, source: str = "banxico") -> list[ExchangeRateData]:
+        return [
+            ExchangeRateData(date=date.fromordinal(ordinal), rate=rate, source=source)
+            for ordinal, rate, ok in zip(self.ordinals, self.rates, self.valid)
+            if ok
+        ]
+
+    def to_dicts(self, source: str = "banxico") -> list[dict]:
+        """Rows in the cached JSON shape, without building models"""
+        return [
+            {
+                "date": date.fromordinal(ordinal).isoformat(),
+                "rate": rate,
+                "source": source,
+            }
+            for ordinal, rate, ok in zip(self.ordinals, self.rates, self.valid)
+            if ok
+        ]
@@ -0,0 +1,130 @@
+import datetime
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RangeStats:
+    """Aggregates over a contiguous run of business days"""
+
+    start_date: datetime.date
+    end_date: datetime.date
+    count: int
+    average: float
+    min: float
+    max: float
+
+
+class RateIndex:
+    """
+    Constant-time aggregates over a date-sorted exchange rate series.
+
+    Keeps a cumulative-sum array for averages, sparse tables for min/max and a
+    calendar-day lookup table that maps any date to its position in the series,
+    so both "last N business days" and arbitrary date ranges are answered in
+    O(1). Newer rates are appended incrementally in O(log n).
+    """
+
+    def __init__(self, rates: Iterable[tuple[datetime.date, float]] = ()):
+        self._ordinals: list[int] = []
+        self._prefix: list[float] = [0.0]
+        self._min_table: list[list[float]] = []
+        self._max_table: list[list[float]] = []
+        # _lower[d - first] = position of the first rate dated on or after d
+        self._lower: list[int] = []
+        self.extend(rates)
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    @property
+    def first_date(self) -> datetime.date | None:
+        return datetime.date.fromordinal(self._ordinals[0]) if self._ordinals else None
+
+    @property
+    def last_date(self) -> datetime.date | None:
+        return datetime.date.fromordinal(self._ordinals[-1]) if self._ordinals else None
+
+    def append(self, date: datetime.date, rate: float):
+        """Add a rate dated after every rate already in the index"""
+        ordinal = date.toordinal()
+        if self._ordinals and ordinal <= self._ordinals[-1]:
+            raise ValueError(f"{date} is not after the last indexed date")
+
+        position = len(self._ordinals)
+        if self._ordinals:
+            self._lower.extend([position] * (ordinal - self._ordinals[-1]))
+        else:
+            self._lower.append(0)
+
+        self._ordinals.append(ordinal)
+        self._prefix.append(self._prefix[-1] + rate)
+
+        # Each sparse-table level gains the one entry that now ends at position
+        level = 0
+        while position - (1 << level) + 1 >= 0:
+            if level == len(self._min_table):
+                self._min_table.append([])
+                self._max_table.append([])
+
+            if level == 0:
+                low = high = rate
+            else:
+                start = position - (1 << level) + 1
+                half = start + (1 << (level - 1))
+                below_min = self._min_table[level - 1]
+                below_max = self._max_table[level - 1]
+                low = min(below_min[start], below_min[half])
+                high = max(below_max[start], below_max[half])
+
+            self._min_table[level].append(low)
+            self._max_table[level].append(high)
+            level += 1
+
+    def extend(self, rates: Iterable[tuple[datetime.date, float]]):
+        """Append rates in ascending date order, skipping already-indexed dates"""
+        for date, rate in rates:
+            if self._ordinals and date.toordinal() <= self._ordinals[-1]:
+                continue
+            self.append(date, rate)
+
+    def _stats(self, lo: int, hi: int) -> RangeStats | None:
+        """Aggregates over positions lo..hi inclusive"""
+        if lo > hi:
+            return None
+        count = hi - lo + 1
+        level = count.bit_length() - 1
+        right = hi - (1 << level) + 1
+        return RangeStats(
+            start_date=datetime.date.fromordinal(self._ordinals[lo]),
+            end_date=datetime.date.fromordinal(self._ordinals[hi]),
+            count=count,
+            average=(self._prefix[hi + 1] - self._prefix[lo]) / count,
+            min=min(self._min_table[level][lo], self._min_table[level][right]),
+            max=max(self._max_table[level][lo], self._max_table[level][right]),
+        )
+
+    def last(self, n: int) -> RangeStats | None:
+        """Aggregates over the most recent n rates"""
+        size = len(self._ordinals)
+        if n <= 0 or not size:
+            return None
+        return self._stats(max(size - n, 0), size - 1)
+
+    def _lower_bound(self, ordinal: int) -> int:
+        offset = ordinal - self._ordinals[0]
+        if offset <= 0:
+            return 0
+        if offset >= len(self._lower):
+            return len(self._ordinals)
+        return self._lower[offset]
+
+    def between(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> RangeStats | None:
+        """Aggregates over every rate dated within [start_date, end_date]"""
+        if not self._ordinals or start_date > end_date:
+            return None
+        lo = self._lower_bound(start_date.toordinal())
+        hi = self._lower_bound(end_date.toordinal() + 1) - 1
+        return self._stats(lo, hi)
@@ -1,17 +1,177 @@
-import json
+import asyncio
+import functools
+import hashlib
 import logging
-from datetime import date, timedelta
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta, timezone
+from typing import Any, NamedTuple
 
+import orjson
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.database import db_manager
+from app.core.metrics import RATES_CACHE_LOOKUPS, labels
 from app.core.redis import redis_client
+from app.core.single_flight import SingleFlight
 from app.schemas.rates import ExchangeRateData
 from app.services.banxico import banxico_api
+from app.services.database import database_service
+from app.services.rate_index import RangeStats, RateIndex
 
 logger = logging.getLogger(__name__)
 
-# Cache TTLs
-CURRENT_RATE_TTL = 300  # 5 minutes
-HISTORICAL_RATE_TTL = 3600  # 1 hour
-AVERAGE_RATE_TTL = 1800  # 30 minutes
+# Cache TTLs (soft: serve stale and refresh in background, hard: evict)
+CURRENT_RATE_TTL = settings.CACHE_CURRENT_RATE_TTL
+HISTORICAL_RATE_TTL = settings.CACHE_HISTORICAL_RATE_TTL
+CURRENT_RATE_HARD_TTL = settings.CACHE_CURRENT_RATE_HARD_TTL
+HISTORICAL_RATE_HARD_TTL = settings.CACHE_HISTORICAL_RATE_HARD_TTL
+
+# Every historical/average query is answered by slicing one shared window
+MAX_HISTORICAL_DAYS = 90
+HISTORICAL_WINDOW_KEY = "rates:historical:window"
+# Calendar days that cover MAX_HISTORICAL_DAYS business days plus holidays
+HISTORICAL_WINDOW_CALENDAR_DAYS = MAX_HISTORICAL_DAYS * 7 // 5 + 15
+
+CURRENT_RATE_KEY = "rates:current"
+
+# Read path, fastest first: in-process L1, Redis, Aurora, then Banxico itself
+TIERS = ("l1", "redis", "database", "banxico")
+
+# Coalesces concurrent cache misses for the same key into one Banxico call
+rates_flight = SingleFlight(name="rates")
+
+# Strong references to in-flight background refreshes
+_refresh_tasks: set[asyncio.Task] = set()
+# Key -> time.monotonic() before which a failed refresh is not retried
+_refresh_backoff: dict[str, float] = {}
+
+
+class CachedEntry(NamedTuple):
+    """A cached value kept as its final JSON response body"""
+
+    body: bytes
+    fresh_until: float
+
+    @classmethod
+    def from_data(cls, data: Any, fresh_until: float) -> "CachedEntry":
+        return cls(orjson.dumps(data), fresh_until)
+
+    @property
+    def data(self) -> Any:
+        return orjson.loads(self.body)
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+class EncodedBody(NamedTuple):
+    """A response body with its strong validator and freshness deadline"""
+
+    body: bytes
+    etag: str
+    fresh_until: float
+
+    @property
+    def max_age(self) -> int:
+        """Seconds left before the underlying cache entry goes stale"""
+        return max(int(self.fresh_until - time.time()), 0)
+
+
+@dataclass
+class HistoricalWindow:
+    """Business-day rates, most recent first, indexed for O(1) aggregates"""
+
+    rates: list[ExchangeRateData]
+    index: RateIndex
+    fresh_until: float = 0.0
+
+    # Encoded response bodies per (endpoint, days), built on first use
+    _bodies: dict[tuple[str, int], bytes | None] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_rates(
+        cls, rates: list[ExchangeRateData], fresh_until: float = 0.0
+    ) -> "HistoricalWindow":
+        return cls(
+            rates, RateIndex((r.date, r.rate) for r in reversed(rates)), fresh_until
+        )
+
+    def rates_body(self, days: int) -> bytes:
+        """JSON body for /rates/historical?days=N"""
+        key = ("historical", days)
+        if key not in self._bodies:
+            self._bodies[key] = orjson.dumps(
+                [_rate_to_dict(rate) for rate in self.rates[:days]]
+            )
+        return self._bodies[key]
+
+    def average_body(self, days: int) -> bytes | None:
+        """JSON body for /rates/average?days=N, None without data"""
+        key = ("average", days)
+        if key not in self._bodies:
+            stats = self.index.last(days)
+            self._bodies[key] = (
+                orjson.dumps(round(stats.average, 4)) if stats is not None else None
+            )
+        return self._bodies[key]
+
+
+@dataclass
+class ReadTrace:
+    """Which tier served a read and how long each consulted tier took"""
+
+    tier: str | None = None
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+    def server_timing(self) -> str:
+        """Timings formatted as a Server-Timing header value"""
+        return ", ".join(f"{tier};dur={ms}" for tier, ms in self.timings_ms.items())
+
+
+# Lookups, hits and cumulative latency per tier since startup
+_tier_stats: dict[str, dict[str, float]] = {
+    tier: {"lookups": 0, "hits": 0, "time_ms": 0.0} for tier in TIERS
+}
+
+# Last decoded cache entry per key and the window materialized from it, so
+# unchanged cache values are not re-parsed and re-indexed on every request
+_decoded_entries: dict[str, tuple[str, CachedEntry]] = {}
+_window_memo: tuple[float, HistoricalWindow] | None = None
+
+# Last body served per resource, so conditional requests can be answered
+# from memory while it is fresh, without a Redis round trip
+_served: dict[str, EncodedBody] = {}
+
+
+def resource_key(endpoint: str, days: int | None = None) -> str:
+    """Identify a rates response, e.g. 'current' or 'historical:10'"""
+    return endpoint if days is None else f"{endpoint}:{days}"
+
+
+@functools.lru_cache(maxsize=1024)
+def _etag(body: bytes) -> str:
+    """Strong entity tag: a digest of the exact body bytes"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _remember(resource: str, body: bytes, fresh_until: float) -> EncodedBody:
+    encoded = EncodedBody(body, _etag(body), fresh_until)
+    _served[resource] = encoded
+    return encoded
+
+
+def peek_fresh_body(resource: str) -> EncodedBody | None:
+    """The last body served for a resource if still fresh. Never does I/O."""
+    encoded = _served.get(resource)
+    if encoded is None or time.time() >= encoded.fresh_until:
+        return None
+    return encoded
 
 
 def _parse_date(date_str: str) -> date:
@@ -20,23 +180,309 @@ def _parse_date(date_str: str) -> date:
     return date(year, month, day)
 
 
-async def get_current_exchange_rate() -> ExchangeRateData | None:
-    """Return the most recent exchange rate, using cache if available."""
-    cache_key = "rates:current"
+def _rate_to_dict(rate: ExchangeRateData) -> dict:
+    return {"date": rate.date.isoformat(), "rate": rate.rate, "source": rate.source}
+
+
+def _rate_from_dict(data: dict) -> ExchangeRateData:
+    return ExchangeRateData(
+        date=date.fromisoformat(data["date"]), rate=data["rate"], source=data["source"]
+    )
+
+
+def _record_tier(
+    trace: ReadTrace, cache_key: str, tier: str, started: float, hit: bool
+):
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    # "rates:current" → current, "rates:historical:window" → historical
+    family = cache_key.split(":")[1]
+    labels(RATES_CACHE_LOOKUPS, family, tier, "hit" if hit else "miss").inc()
+    trace.timings_ms[tier] = elapsed_ms
+    stats = _tier_stats[tier]
+    stats["lookups"] += 1
+    stats["time_ms"] += elapsed_ms
+    if hit:
+        stats["hits"] += 1
+        trace.tier = tier
+
+
+def get_tier_stats() -> dict:
+    """Hit ratio and mean latency of every tier in the read path"""
+    return {
+        tier: {
+            "lookups": stats["lookups"],
+            "hits": stats["hits"],
+            "hit_ratio": (
+                round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+            ),
+            "avg_ms": (
+                round(stats["time_ms"] / stats["lookups"], 3)
+                if stats["lookups"]
+                else 0.0
+            ),
+        }
+        for tier, stats in _tier_stats.items()
+    }
+
+
+# Cached values are {"fresh_until":<float>,"data":<response body>} written
+# without whitespace, so the body can be sliced out instead of parsed
+_ENVELOPE_PREFIX = '{"fresh_until":'
+_ENVELOPE_DATA = ',"data":'
+
+
+def _encode_entry(entry: CachedEntry) -> str:
+    return (
+        f"{_ENVELOPE_PREFIX}{entry.fresh_until!r}{_ENVELOPE_DATA}"
+        f"{entry.body.decode()}}}"
+    )
+
+
+def _decode_entry(cache_key: str, cached: str | bytes) -> CachedEntry:
+    decoded = _decoded_entries.get(cache_key)
+    if decoded is not None and decoded[0] == cached:
+        return decoded[1]
 
+    raw = cached.decode() if isinstance(cached, bytes) else cached
+    split = raw.find(_ENVELOPE_DATA)
+    if raw.startswith(_ENVELOPE_PREFIX) and split > 0:
+        entry = CachedEntry(
+            raw[split + len(_ENVELOPE_DATA) : -1].encode(),
+            float(raw[len(_ENVELOPE_PREFIX) : split]),
+        )
+    else:
+        # Envelopes written with whitespace by older releases
+        envelope = orjson.loads(raw)
+        entry = CachedEntry.from_data(envelope["data"], envelope["fresh_until"])
+    _decoded_entries[cache_key] = (cached, entry)
+    return entry
+
+
+async def _store_entry(cache_key: str, entry: CachedEntry, hard_ttl: int):
+    """Write an entry to Redis (and this instance's L1) for hard_ttl seconds."""
+    ttl = max(hard_ttl, int(entry.fresh_until - time.time()), 1)
+    await redis_client.setex(cache_key, ttl, _encode_entry(entry))
+
+
+async def _write_cache(
+    cache_key: str, data: Any, soft_ttl: int, hard_ttl: int
+) -> CachedEntry:
+    """Store data fresh for soft_ttl seconds and servable for hard_ttl seconds."""
+    entry = CachedEntry.from_data(data, time.time() + soft_ttl)
+    await _store_entry(cache_key, entry, hard_ttl)
+    return entry
+
+
+def database_enabled() -> bool:
+    """Whether Aurora is configured and was reachable when the app started"""
+    return settings.DATABASE_ENABLED and db_manager.ready
+
+
+async def _read_database_entry(
+    limit: int, soft_ttl: int, hard_ttl: int
+) -> CachedEntry | None:
+    """The newest `limit` stored rates, aged by when they were last written."""
+    stored, updated_at = await database_service.get_recent_rates(limit)
+    if len(stored) < limit or updated_at is None:
+        return None
+
+    written = updated_at.replace(tzinfo=updated_at.tzinfo or timezone.utc).timestamp()
+    if time.time() >= written + hard_ttl:
+        return None
+    return CachedEntry.from_data(
+        [_rate_to_dict(rate) for rate in stored], written + soft_ttl
+    )
+
+
+async def _save_to_database(rates: list[ExchangeRateData]):
+    """Backfill Aurora with rates fetched from Banxico."""
+    if rates and database_enabled():
+        await database_service.save_exchange_rates(rates)
+
+
+async def _read_through(
+    cache_key: str,
+    trace: ReadTrace,
+    hard_ttl: int,
+    read_database: Callable[[], Awaitable[CachedEntry | None]],
+    load_banxico: Callable[[], Awaitable[CachedEntry | None]],
+    prefetched: dict[str, str | None] | None = None,
+) -> CachedEntry | None:
+    """
+    Read cache_key from the first tier that has it, backfilling the faster ones.
+
+    Stale entries from any cache tier are served immediately while a single
+    background Banxico load replaces them. Keys in `prefetched` (from
+    _read_cache_many) skip the L1 and Redis lookups.
+    """
+    entry = None
     try:
-        cached = await redis_client.get(cache_key)
-        if cached:
-            logger.debug("Cache hit for current rate")
-            data = json.loads(cached)
-            return ExchangeRateData(
-                date=date.fromisoformat(data["date"]),
-                rate=data["rate"],
-                source=data["source"],
-            )
+        if prefetched is not None and cache_key in prefetched:
+            # L1 and Redis were already read for several keys at once
+            cached = prefetched[cache_key]
+            if cached is not None:
+                entry = _decode_entry(cache_key, cached)
+        else:
+            local_cache = redis_client.local_cache
+            if local_cache is not None:
+                started = time.perf_counter()
+                cached = local_cache.get(cache_key)
+                _record_tier(trace, cache_key, "l1", started, cached is not None)
+                if cached is not None:
+                    entry = _decode_entry(cache_key, cached)
+
+            if entry is None:
+                started = time.perf_counter()
+                cached = await redis_client.get(cache_key, use_local=False)
+                _record_tier(trace, cache_key, "redis", started, cached is not None)
+                if cached is not None:
+                    entry = _decode_entry(cache_key, cached)
+                    if local_cache is not None:
+                        local_cache.set(cache_key, cached)
+
+        if entry is None and database_enabled():
+            started = time.perf_counter()
+            entry = await read_database()
+            _record_tier(trace, cache_key, "database", started, entry is not None)
+            if entry is not None:
+                await _store_entry(cache_key, entry, hard_ttl)
     except Exception as e:
-        logger.warning(f"Cache error for current rate: {e}")
+        logger.warning(f"Cache error for '{cache_key}': {e}")
+        entry = None
+
+    if entry is not None:
+        logger.debug(f"'{cache_key}' served from {trace.tier} (stale={entry.is_stale})")
+        if entry.is_stale:
+            _schedule_refresh(cache_key, load_banxico)
+        return entry
+
+    started = time.perf_counter()
+    try:
+        entry = await rates_flight.do(cache_key, load_banxico)
+    finally:
+        _record_tier(trace, cache_key, "banxico", started, entry is not None)
+    return entry
+
+
+def _schedule_refresh(cache_key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+    """Refresh a stale entry in the background unless a fetch is already running."""
+    if cache_key in rates_flight.in_flight():
+        return
+    # After a failure stale reads keep being served without retrying upstream
+    if time.monotonic() < _refresh_backoff.get(cache_key, 0.0):
+        return
+
+    task = asyncio.create_task(rates_flight.do(cache_key, loader))
+    _refresh_tasks.add(task)
+    task.add_done_callback(functools.partial(_on_refresh_done, cache_key))
+    logger.debug(f"Scheduled background refresh for '{cache_key}'")
+
+
+def _retry_after(error: BaseException) -> float:
+    """Cooldown after a failed refresh, as long as the upstream asks for"""
+    cooldown = float(settings.CACHE_REFRESH_FAILURE_COOLDOWN)
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return max(cooldown, float(headers.get("Retry-After", 0)))
+    except ValueError:
+        return cooldown
 
+
+def _on_refresh_done(cache_key: str, task: asyncio.Task):
+    _refresh_tasks.discard(task)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is None:
+        _refresh_backoff.pop(cache_key, None)
+        return
+
+    repeated = cache_key in _refresh_backoff
+    cooldown = _retry_after(error)
+    _refresh_backoff[cache_key] = time.monotonic() + cooldown
+    message = f"Background refresh of '{cache_key}' failed, next in {cooldown:.0f}s"
+    if repeated:
+        logger.debug(f"{message}: {error}")
+    else:
+        logger.warning(f"{message}: {error}")
+
+
+async def cancel_refreshes():
+    """Stop background refreshes and the fetches they started, e.g. on shutdown"""
+    tasks = list(_refresh_tasks)
+    for task in tasks:
+        task.cancel()
+    # Shielded flights outlive their callers, so they are cancelled directly
+    tasks += rates_flight.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _read_cache_many(
+    cache_keys: list[str], trace: ReadTrace
+) -> dict[str, str | None]:
+    """L1, then a single Redis MGET for every key L1 does not have"""
+    found: dict[str, str | None] = {}
+    local_cache = redis_client.local_cache
+    if local_cache is not None:
+        for cache_key in cache_keys:
+            started = time.perf_counter()
+            cached = local_cache.get(cache_key)
+            _record_tier(trace, cache_key, "l1", started, cached is not None)
+            if cached is not None:
+                found[cache_key] = cached
+
+    missing = [cache_key for cache_key in cache_keys if cache_key not in found]
+    if missing:
+        started = time.perf_counter()
+        values = await redis_client.mget(missing)
+        for cache_key, cached in zip(missing, values):
+            _record_tier(trace, cache_key, "redis", started, cached is not None)
+            found[cache_key] = cached
+            if cached is not None and local_cache is not None:
+                local_cache.set(cache_key, cached)
+    return found
+
+
+async def _get_current_entry(
+    trace: ReadTrace | None = None, prefetched: dict[str, str | None] | None = None
+) -> CachedEntry | None:
+    return await _read_through(
+        CURRENT_RATE_KEY,
+        trace or ReadTrace(),
+        CURRENT_RATE_HARD_TTL,
+        _read_current_from_database,
+        _load_current_exchange_rate,
+        prefetched,
+    )
+
+
+async def get_current_exchange_rate(
+    trace: ReadTrace | None = None,
+) -> ExchangeRateData | None:
+    """Return the most recent exchange rate from the fastest tier that has it."""
+    entry = await _get_current_entry(trace)
+    return _rate_from_dict(entry.data) if entry else None
+
+
+async def get_current_rate_body(
+    trace: ReadTrace | None = None,
+) -> EncodedBody | None:
+    """The /rates/current JSON body exactly as cached, without decoding it."""
+    entry = await _get_current_entry(trace)
+    if not entry:
+        return None
+    return _remember(resource_key("current"), entry.body, entry.fresh_until)
+
+
+async def _read_current_from_database() -> CachedEntry | None:
+    entry = await _read_database_entry(1, CURRENT_RATE_TTL, CURRENT_RATE_HARD_TTL)
+    if entry is None:
+        return None
+    return CachedEntry.from_data(entry.data[0], entry.fresh_until)
+
+
+async def _load_current_exchange_rate() -> CachedEntry | None:
+    """Fetch the latest rate from Banxico and backfill the cache and Aurora."""
     logger.debug("Cache miss for current rate — calling Banxico API")
     response = await banxico_api.fetch_series()
 
@@ -57,88 +503,205 @@ async def get_current_exchange_rate() -> ExchangeRateData | None:
     rate_data = ExchangeRateData(
         date=_parse_date(latest.fecha), rate=float(latest.dato), source="banxico"
     )
+    cache_data = _rate_to_dict(rate_data)
+    entry = CachedEntry.from_data(cache_data, time.time() + CURRENT_RATE_TTL)
 
     try:
-        cache_data = {
-            "date": rate_data.date.isoformat(),
-            "rate": rate_data.rate,
-            "source": rate_data.source,
-        }
-        await redis_client.setex(cache_key, CURRENT_RATE_TTL, json.dumps(cache_data))
+        entry = await _write_cache(
+            CURRENT_RATE_KEY, cache_data, CURRENT_RATE_TTL, CURRENT_RATE_HARD_TTL
+        )
     except Exception as e:
         logger.warning(f"Failed to cache current rate: {e}")
 
-    return rate_data
+    await _save_to_database([rate_data])
+    return entry
 
 
-async def get_historical_rates(days: int = 10) -> list[ExchangeRateData]:
+async def get_historical_rates(
+    days: int = 10, trace: ReadTrace | None = None
+) -> list[ExchangeRateData]:
     """Return exchange rates for the last N business days"""
-    cache_key = f"rates:historical:{days}"
+    window = await _get_historical_window(trace)
+    return window.rates[:days]
 
-    try:
-        cached = await redis_client.get(cache_key)
-        if cached:
-            logger.debug(f"Cache hit for historical {days}d")
-            data = json.loads(cached)
-            return [
-                ExchangeRateData(
-                    date=date.fromisoformat(item["date"]),
-                    rate=item["rate"],
-                    source=item["source"],
-                )
-                for item in data
-            ]
-    except Exception as e:
-        logger.warning(f"Cache error for historical {days}d: {e}")
 
-    logger.debug(f"Cache miss for historical {days}d — calling Banxico API")
-    end = date.today()
-    start = end - timedelta(days=days + 10)
+async def get_historical_rates_body(
+    days: int = 10, trace: ReadTrace | None = None
+) -> EncodedBody:
+    """The /rates/historical JSON body, encoded once per window and `days`."""
+    window = await _get_historical_window(trace)
+    return _remember(
+        resource_key("historical", days), window.rates_body(days), window.fresh_until
+    )
 
-    response = await banxico_api.fetch_series(
-        start_date=start.strftime("%Y-%m-%d"), end_date=end.strftime("%Y-%m-%d")
+
+def _window_from_entry(entry: CachedEntry | None) -> HistoricalWindow:
+    """Materialize a cached window, reusing the last one built from the same entry"""
+    global _window_memo
+    if entry is None:
+        return HistoricalWindow.from_rates([])
+    if _window_memo is not None and _window_memo[0] == entry.fresh_until:
+        return _window_memo[1]
+
+    window = HistoricalWindow.from_rates(
+        [_rate_from_dict(item) for item in entry.data], entry.fresh_until
     )
+    _window_memo = (entry.fresh_until, window)
+    return window
 
-    if (
-        not response.bmx
-        or not hasattr(response.bmx, "series")
-        or not response.bmx.series
-    ):
-        return []
 
-    series = response.bmx.series[0]
-    if not hasattr(series, "datos") or not series.datos:
-        return []
+async def _get_historical_window(
+    trace: ReadTrace | None = None, prefetched: dict[str, str | None] | None = None
+) -> HistoricalWindow:
+    """Return the shared MAX_HISTORICAL_DAYS window, most recent first."""
+    entry = await _read_through(
+        HISTORICAL_WINDOW_KEY,
+        trace or ReadTrace(),
+        HISTORICAL_RATE_HARD_TTL,
+        _read_window_from_database,
+        _load_historical_window,
+        prefetched,
+    )
+    return _window_from_entry(entry)
 
-    rates = []
-    for item in series.datos:
-        if item.dato == "N/E":
-            continue
-        parsed_date = _parse_date(item.fecha)
-        if parsed_date.weekday() < 5:
-            rates.append(
-                ExchangeRateData(
-                    date=parsed_date, rate=float(item.dato), source="banxico"
-                )
-            )
 
-    result = sorted(rates, key=lambda x: x.date, reverse=True)[:days]
+async def _read_window_from_database() -> CachedEntry | None:
+    return await _read_database_entry(
+        MAX_HISTORICAL_DAYS, HISTORICAL_RATE_TTL, HISTORICAL_RATE_HARD_TTL
+    )
 
+
+async def _load_historical_window() -> CachedEntry | None:
+    """Fetch the last MAX_HISTORICAL_DAYS business days and backfill every tier."""
+    logger.debug("Cache miss for historical window — calling Banxico API")
+    end = date.today()
+    start = end - timedelta(days=HISTORICAL_WINDOW_CALENDAR_DAYS)
+
+    columns = await banxico_api.fetch_series_columns(
+        start_date=start.strftime("%Y-%m-%d"), end_date=end.strftime("%Y-%m-%d")
+    )
+    window = columns.business_days().sorted(reverse=True)[:MAX_HISTORICAL_DAYS]
+    if not window:
+        return None
+
+    cache_data = window.to_dicts()
+    entry = CachedEntry.from_data(cache_data, time.time() + HISTORICAL_RATE_TTL)
     try:
-        cache_data = [
-            {"date": rate.date.isoformat(), "rate": rate.rate, "source": rate.source}
-            for rate in result
-        ]
-        await redis_client.setex(cache_key, HISTORICAL_RATE_TTL, json.dumps(cache_data))
+        entry = await _write_cache(
+            HISTORICAL_WINDOW_KEY,
+            cache_data,
+            HISTORICAL_RATE_TTL,
+            HISTORICAL_RATE_HARD_TTL,
+        )
     except Exception as e:
-        logger.warning(f"Failed to cache historical {days}d: {e}")
+        logger.warning(f"Failed to cache historical window: {e}")
+
+    if database_enabled():
+        await _save_to_database(window.to_models())
+    return entry
+
 
-    return result
+async def refresh_current_rate() -> ExchangeRateData | None:
+    """Fetch the current rate from Banxico and overwrite the cached entry."""
+    entry = await rates_flight.do(CURRENT_RATE_KEY, _load_current_exchange_rate)
+    return _rate_from_dict(entry.data) if entry else None
 
 
-async def get_average_rate(days: int = 15) -> float | None:
+async def refresh_historical_rates() -> list[ExchangeRateData]:
+    """Fetch the historical window from Banxico and overwrite the cached entry."""
+    entry = await rates_flight.do(HISTORICAL_WINDOW_KEY, _load_historical_window)
+    return _window_from_entry(entry).rates
+
+
+async def get_rate_stats(
+    days: int = 15, trace: ReadTrace | None = None
+) -> RangeStats | None:
+    """Average, min, max and count over the last N business days"""
+    window = await _get_historical_window(trace)
+    return window.index.last(days)
+
+
+async def get_average_rate(
+    days: int = 15, trace: ReadTrace | None = None
+) -> float | None:
     """Calculate the average exchange rate over last N business days"""
-    rates = await get_historical_rates(days=days)
-    if not rates:
+    stats = await get_rate_stats(days=days, trace=trace)
+    if stats is None:
+        return None
+    return stats.average
+
+
+async def get_average_rate_body(
+    days: int = 15, trace: ReadTrace | None = None
+) -> EncodedBody | None:
+    """The /rates/average JSON body, encoded once per window and `days`."""
+    window = await _get_historical_window(trace)
+    body = window.average_body(days)
+    if body is None:
         return None
-    return sum(r.rate for r in rates) / len(rates)
+    return _remember(resource_key("average", days), body, window.fresh_until)
+
+
+class BatchItem(NamedTuple):
+    """One sub-query of a batch: a status with a JSON body or an error detail"""
+
+    status: int
+    body: bytes | None = None
+    detail: str | None = None
+
+
+# Cache key answering each batchable endpoint
+BATCH_KEYS = {
+    "current": CURRENT_RATE_KEY,
+    "historical": HISTORICAL_WINDOW_KEY,
+    "average": HISTORICAL_WINDOW_KEY,
+}
+
+
+async def get_batch_bodies(
+    queries: list[tuple[str, int | None]], trace: ReadTrace | None = None
+) -> list[BatchItem]:
+    """
+    Answer (endpoint, days) sub-queries in order. Every cache key involved is
+    read with one MGET and loaded at most once, so historical and average
+    queries share a single window. Upstream errors fail only the sub-queries
+    that needed that key.
+    """
+    trace = trace or ReadTrace()
+    cache_keys = sorted({BATCH_KEYS[endpoint] for endpoint, _ in queries})
+    prefetched = await _read_cache_many(cache_keys, trace)
+
+    loaders = {
+        CURRENT_RATE_KEY: _get_current_entry,
+        HISTORICAL_WINDOW_KEY: _get_historical_window,
+    }
+    outcomes = await asyncio.gather(
+        *(loaders[cache_key](trace, prefetched) for cache_key in cache_keys),
+        return_exceptions=True,
+    )
+    resolved = dict(zip(cache_keys, outcomes))
+
+    items = []
+    for endpoint, days in queries:
+        outcome = resolved[BATCH_KEYS[endpoint]]
+        if isinstance(outcome, HTTPException):
+            items.append(BatchItem(outcome.status_code, detail=outcome.detail))
+            continue
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+        if endpoint == "current":
+            if outcome is None:
+                items.append(BatchItem(404, detail="No current rate available"))
+                continue
+            body, fresh_until = outcome.body, outcome.fresh_until
+        elif endpoint == "historical":
+            body, fresh_until = outcome.rates_body(days), outcome.fresh_until
+        else:
+            body, fresh_until = outcome.average_body(days), outcome.fresh_until
+            if body is None:
+                items.append(BatchItem(404, detail="No data to calculate average"))
+                continue
+        _remember(resource_key(endpoint, days), body, fresh_until)
+        items.append(BatchItem(200, body))
+    return items
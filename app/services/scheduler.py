@@ -0,0 +1,236 @@
+import asyncio
+import datetime
+import logging
+import socket
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.services import rates, sync
+
+logger = logging.getLogger(__name__)
+
+
+def get_timestamp() -> datetime.datetime:
+    """Get current UTC timestamp"""
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@dataclass
+class RefreshJob:
+    """A cache refresh executed on a fixed cadence by the scheduler"""
+
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    interval: int
+    next_run: datetime.datetime = field(default_factory=get_timestamp)
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0  # due, but another instance held the fleet-wide lease
+    scheduled_at: datetime.datetime | None = None  # when next_run was last set
+    last_started_at: datetime.datetime | None = None
+    last_finished_at: datetime.datetime | None = None
+    last_status: str | None = None
+    last_error: str | None = None
+    last_duration_ms: float | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "next_run": self.next_run.isoformat(),
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_run": {
+                "started_at": (
+                    self.last_started_at.isoformat() if self.last_started_at else None
+                ),
+                "finished_at": (
+                    self.last_finished_at.isoformat() if self.last_finished_at else None
+                ),
+                "status": self.last_status,
+                "error": self.last_error,
+                "duration_ms": self.last_duration_ms,
+            },
+        }
+
+
+def _default_jobs() -> list[RefreshJob]:
+    jobs = [
+        RefreshJob(
+            name="rates:current",
+            func=lambda: rates.refresh_current_rate(),
+            interval=settings.SCHEDULER_CURRENT_INTERVAL,
+        ),
+        RefreshJob(
+            name=rates.HISTORICAL_WINDOW_KEY,
+            func=lambda: rates.refresh_historical_rates(),
+            interval=settings.SCHEDULER_HISTORICAL_INTERVAL,
+        ),
+    ]
+    if settings.SYNC_ENABLED:
+        jobs.append(
+            RefreshJob(
+                name="db:sync",
+                func=lambda: sync.run_sync_job(),
+                interval=settings.SYNC_INTERVAL,
+            )
+        )
+    return jobs
+
+
+class RefreshScheduler:
+    """
+    Lifespan-managed loop that refreshes rate caches before their TTLs lapse.
+
+    Jobs run on their own interval, tightened to SCHEDULER_PUBLICATION_INTERVAL
+    around Banxico's daily publication time so new rates land in the cache as
+    soon as they are published.
+
+    Every instance runs this loop, so a due job first takes a Redis lease
+    (SET NX EX) for one interval; instances that find it taken skip the run
+    and the fleet makes one Banxico call per job and interval, not one per
+    instance.
+    """
+
+    LEASE_KEY_PREFIX = "scheduler:lease:"
+
+    def __init__(self, jobs: list[RefreshJob] | None = None):
+        self.jobs = jobs if jobs is not None else _default_jobs()
+        self.enabled = settings.SCHEDULER_ENABLED
+        self.fleet_lease = settings.SCHEDULER_FLEET_LEASE
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _publication_time(self, now: datetime.datetime) -> datetime.datetime:
+        hour, minute = map(int, settings.BANXICO_PUBLICATION_TIME_UTC.split(":"))
+        return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    def in_publication_window(self, now: datetime.datetime | None = None) -> bool:
+        now = now or get_timestamp()
+        window = datetime.timedelta(minutes=settings.BANXICO_PUBLICATION_WINDOW_MINUTES)
+        return abs(now - self._publication_time(now)) <= window
+
+    def _interval_for(self, job: RefreshJob, now: datetime.datetime) -> int:
+        if self.in_publication_window(now):
+            return min(job.interval, settings.SCHEDULER_PUBLICATION_INTERVAL)
+        return job.interval
+
+    async def _run_job(self, job: RefreshJob):
+        job.last_started_at = get_timestamp()
+        started = time.perf_counter()
+        try:
+            await job.func()
+            job.last_status = "success"
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_status = "error"
+            job.last_error = str(e)
+            logger.warning(f"Scheduled refresh '{job.name}' failed: {e}")
+        finally:
+            job.runs += 1
+            job.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            job.last_finished_at = get_timestamp()
+            self._reschedule(job, job.last_finished_at)
+            logger.debug(
+                f"Scheduled refresh '{job.name}' {job.last_status} "
+                f"in {job.last_duration_ms}ms, next at {job.next_run.isoformat()}"
+            )
+
+    def _reschedule(self, job: RefreshJob, now: datetime.datetime):
+        job.scheduled_at = now
+        job.next_run = now + datetime.timedelta(seconds=self._interval_for(job, now))
+
+    def _is_due(self, job: RefreshJob, now: datetime.datetime) -> bool:
+        if now >= job.next_run:
+            return True
+        # Entering the publication window can bring a job forward
+        return job.scheduled_at is not None and now >= (
+            job.scheduled_at + datetime.timedelta(seconds=self._interval_for(job, now))
+        )
+
+    async def _claim_lease(self, job: RefreshJob, now: datetime.datetime) -> bool:
+        """Claim this interval's run of a job for the fleet (granted if Redis is down)"""
+        if not self.fleet_lease:
+            return True
+        try:
+            return bool(
+                await redis_client.client.set(
+                    self.LEASE_KEY_PREFIX + job.name,
+                    socket.gethostname(),
+                    nx=True,
+                    ex=self._interval_for(job, now),
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to claim scheduler lease for '{job.name}': {e}")
+            return True
+
+    async def run_due_jobs(self):
+        """Run every job that is due and not already run elsewhere in the fleet"""
+        for job in self.jobs:
+            now = get_timestamp()
+            if not self._is_due(job, now):
+                continue
+            if await self._claim_lease(job, now):
+                await self._run_job(job)
+            else:
+                job.skipped += 1
+                self._reschedule(job, now)
+                logger.debug(f"Scheduled refresh '{job.name}' run by another instance")
+
+    def _seconds_until_next_run(self) -> float:
+        now = get_timestamp()
+        if self.in_publication_window(now):
+            return float(settings.SCHEDULER_PUBLICATION_INTERVAL)
+        next_run = min(job.next_run for job in self.jobs)
+
+        # Wake up when the publication window opens even if no job is due yet
+        window_opens = self._publication_time(now) - datetime.timedelta(
+            minutes=settings.BANXICO_PUBLICATION_WINDOW_MINUTES
+        )
+        if window_opens < now:
+            window_opens += datetime.timedelta(days=1)
+
+        return max((min(next_run, window_opens) - now).total_seconds(), 1.0)
+
+    async def _loop(self):
+        while True:
+            await self.run_due_jobs()
+            await asyncio.sleep(self._seconds_until_next_run())
+
+    async def start(self):
+        if not self.enabled or not self.jobs or self.running:
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Refresh scheduler started with {len(self.jobs)} jobs")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Refresh scheduler stopped")
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "publication_window": self.in_publication_window(),
+            "jobs": [job.to_dict() for job in self.jobs],
+        }
+
+
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,124 @@
+"""
+Incremental Banxico -> Aurora sync.
+
+Reads the latest stored date and fetches only the missing range from Banxico,
+so the exchange_rates table stays a complete local copy of the series. Runs as
+a job of the refresh scheduler (SYNC_ENABLED) or from the command line:
+
+    python -m app.services.sync [--initial-days 365]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.database import db_manager
+from app.services.banxico import banxico_api
+from app.services.database import database_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncResult:
+    status: str
+    start_date: str | None = None
+    end_date: str | None = None
+    fetched: int = 0
+    inserted: int = 0
+    updated: int = 0
+    duration_ms: float = 0.0
+    error: str | None = None
+
+
+async def sync_exchange_rates(
+    initial_days: int = settings.SYNC_INITIAL_DAYS,
+) -> SyncResult:
+    """Fetch rates newer than the latest stored one and persist them in bulk"""
+    started = time.perf_counter()
+    today = datetime.date.today()
+
+    try:
+        latest = await database_service.get_latest_exchange_rate(raise_errors=True)
+    except Exception as e:
+        # Not an empty table: fetching the initial range would only fail to save
+        return SyncResult(
+            status="failed",
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            error=f"Latest stored rate unavailable: {e}",
+        )
+    # Re-read the latest stored day so late corrections from Banxico are kept
+    start = latest.date if latest else today - datetime.timedelta(days=initial_days)
+    if start > today:
+        return SyncResult(status="up_to_date")
+
+    try:
+        columns = await banxico_api.fetch_series_columns(
+            start_date=start.strftime("%Y-%m-%d"), end_date=today.strftime("%Y-%m-%d")
+        )
+    except HTTPException as e:
+        if e.status_code != 404:
+            raise
+        logger.info(f"No new Banxico data between {start} and {today}")
+        return SyncResult(
+            status="up_to_date",
+            start_date=start.isoformat(),
+            end_date=today.isoformat(),
+        )
+
+    rates = columns.business_days().sorted(reverse=True).to_models()
+    saved = await database_service.save_exchange_rates(rates)
+
+    result = SyncResult(
+        status="success" if saved.saved == len(rates) else "failed",
+        start_date=start.isoformat(),
+        end_date=today.isoformat(),
+        fetched=len(rates),
+        inserted=saved.inserted,
+        updated=saved.updated,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    logger.info(f"Banxico sync finished: {result}")
+    return result
+
+
+async def run_sync_job():
+    """Scheduler entry point; raises so failed syncs are reported as errors"""
+    result = await sync_exchange_rates()
+    if result.status == "failed":
+        raise RuntimeError(
+            result.error or f"Failed to save {result.fetched} fetched rates"
+        )
+
+
+async def _main(args: argparse.Namespace) -> int:
+    await db_manager.init_db()
+    try:
+        await db_manager.create_tables()
+        result = await sync_exchange_rates(initial_days=args.initial_days)
+        print(json.dumps(asdict(result), indent=2))
+        return 0 if result.status in ("success", "up_to_date") else 1
+    finally:
+        await banxico_api.close()
+        await db_manager.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+    )
+    parser = argparse.ArgumentParser(description="Sync Banxico rates into Aurora")
+    parser.add_argument(
+        "--initial-days",
+        type=int,
+        default=settings.SYNC_INITIAL_DAYS,
+        help="Days to fetch when the table is empty",
+    )
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
@@ -1,12 +1,21 @@
-from unittest.mock import patch
+import json
+import time
+from datetime import date
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
 from app.schemas.rates import ExchangeRateData
+from app.services import rates as rate_service
+from app.services.database import database_service
 from main import app
 
 
+def _encoded(body: bytes, ttl: float = 300) -> rate_service.EncodedBody:
+    return rate_service.EncodedBody(body, f'"{len(body)}"', time.time() + ttl)
+
+
 class TestRatesAPI:
 
     @pytest.fixture
@@ -18,7 +27,8 @@ class TestRatesAPI:
         mock_rate = ExchangeRateData(date="2025-07-18", rate=18.7200, source="banxico")
 
         with patch(
-            "app.services.rates.get_current_exchange_rate", return_value=mock_rate
+            "app.services.rates.get_current_rate_body",
+            return_value=_encoded(mock_rate.model_dump_json().encode()),
         ):
             response = client.get("/api/v1/rates/current")
             assert response.status_code == 200
@@ -28,7 +38,7 @@ class TestRatesAPI:
 
     def test_current_rate_not_found(self, client):
         """Test current rate when no data available"""
-        with patch("app.services.rates.get_current_exchange_rate", return_value=None):
+        with patch("app.services.rates.get_current_rate_body", return_value=None):
             response = client.get("/api/v1/rates/current")
             assert response.status_code == 404
             assert "No current rate available" in response.json()["detail"]
@@ -40,7 +50,14 @@ class TestRatesAPI:
             ExchangeRateData(date="2025-07-17", rate=18.6800, source="banxico"),
         ]
 
-        with patch("app.services.rates.get_historical_rates", return_value=mock_rates):
+        with patch(
+            "app.services.rates.get_historical_rates_body",
+            return_value=_encoded(
+                json.dumps(
+                    [rate.model_dump(mode="json") for rate in mock_rates]
+                ).encode()
+            ),
+        ):
             response = client.get("/api/v1/rates/historical?days=2")
             assert response.status_code == 200
             data = response.json()
@@ -57,17 +74,237 @@ class TestRatesAPI:
 
     def test_average_rate_success(self, client):
         """Test successful average rate calculation"""
-        with patch("app.services.rates.get_average_rate", return_value=18.6733):
+        with patch(
+            "app.services.rates.get_average_rate_body",
+            return_value=_encoded(b"18.6733"),
+        ):
             response = client.get("/api/v1/rates/average?days=15")
             assert response.status_code == 200
             assert response.json() == 18.6733
 
     def test_average_rate_no_data(self, client):
         """Test average rate when no data available"""
-        with patch("app.services.rates.get_average_rate", return_value=None):
+        with patch("app.services.rates.get_average_rate_body", return_value=None):
             response = client.get("/api/v1/rates/average")
             assert response.status_code == 404
 
+    def test_rate_response_carries_validators(self, client):
+        """Test that ETag and Cache-Control follow the cached entry"""
+        with patch(
+            "app.services.rates.get_average_rate_body",
+            return_value=_encoded(b"18.6733", ttl=120.5),
+        ):
+            response = client.get("/api/v1/rates/average?days=15")
+            assert response.headers["etag"] == '"7"'
+            assert response.headers["cache-control"] == "public, max-age=120"
+
+    def test_conditional_get_answered_from_memory(self, client):
+        """Test that a matching If-None-Match gets 304 without a cache read"""
+        rate_service._served.clear()
+
+        async def get_historical_rates_body(days, trace):
+            return rate_service._remember(f"historical:{days}", b"[]", time.time() + 60)
+
+        with patch(
+            "app.services.rates.get_historical_rates_body",
+            new=AsyncMock(side_effect=get_historical_rates_body),
+        ) as get_body:
+            first = client.get("/api/v1/rates/historical?days=5")
+            etag = first.headers["etag"]
+
+            response = client.get(
+                "/api/v1/rates/historical?days=5",
+                headers={"If-None-Match": f'W/"other", {etag}'},
+            )
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+            assert response.content == b""
+            assert get_body.await_count == 1
+
+            # A different days value is a different resource
+            response = client.get(
+                "/api/v1/rates/historical?days=6", headers={"If-None-Match": etag}
+            )
+            assert get_body.await_count == 2
+
+    def test_conditional_get_after_stale_entry_revalidates(self, client):
+        """Test that a stale validator is revalidated through the read path"""
+        rate_service._served.clear()
+        rate_service._served["current"] = _encoded(b"{}", ttl=-1)
+        with patch(
+            "app.services.rates.get_current_rate_body",
+            return_value=_encoded(b"{}"),
+        ) as get_body:
+            response = client.get(
+                "/api/v1/rates/current", headers={"If-None-Match": '"2"'}
+            )
+            assert response.status_code == 304
+            assert get_body.await_count == 1
+
+            response = client.get(
+                "/api/v1/rates/current", headers={"If-None-Match": '"old"'}
+            )
+            assert response.status_code == 200
+
+    def test_batch_returns_results_in_request_order(self, client):
+        """Test that sub-query bodies and per-query errors share one response"""
+        items = [
+            rate_service.BatchItem(
+                200, b'{"date":"2025-07-18","rate":18.72,"source":"banxico"}'
+            ),
+            rate_service.BatchItem(200, b"[]"),
+            rate_service.BatchItem(404, detail="No data to calculate average"),
+        ]
+        with patch(
+            "app.services.rates.get_batch_bodies", return_value=items
+        ) as get_batch:
+            response = client.post(
+                "/api/v1/rates/batch",
+                json={
+                    "queries": [
+                        {"endpoint": "current"},
+                        {"endpoint": "historical"},
+                        {"endpoint": "average", "days": 30},
+                    ]
+                },
+            )
+
+        assert response.status_code == 200
+        assert get_batch.call_args.args[0] == [
+            ("current", None),
+            ("historical", 10),
+            ("average", 30),
+        ]
+        results = response.json()["results"]
+        assert results[0]["data"]["rate"] == 18.72
+        assert results[1] == {
+            "endpoint": "historical",
+            "days": 10,
+            "status": 200,
+            "data": [],
+        }
+        assert results[2]["status"] == 404
+        assert results[2]["detail"] == "No data to calculate average"
+
+    def test_batch_validates_sub_queries(self, client):
+        """Test that unknown endpoints, bad days and empty batches are rejected"""
+        for body in (
+            {"queries": []},
+            {"queries": [{"endpoint": "latest"}]},
+            {"queries": [{"endpoint": "average", "days": 100}]},
+        ):
+            response = client.post("/api/v1/rates/batch", json=body)
+            assert response.status_code == 422
+
+
+class TestRateRangeAPI:
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture
+    def stored(self):
+        """Stored rates, streamed like DatabaseService in batches of 2 by default"""
+        rows = [
+            ExchangeRateData(date=date(2005, 1, 3), rate=10.9, source="banxico"),
+            ExchangeRateData(date=date(2025, 7, 17), rate=18.68),
+            ExchangeRateData(date=date(2025, 7, 18), rate=18.72),
+        ]
+        calls = []
+
+        async def iter_rate_batches(
+            start_date, end_date, after=None, limit=None, batch_size=None
+        ):
+            calls.append((start_date, end_date, after, limit))
+            found = [r for r in rows if after is None or r.date > after][:limit]
+            size = batch_size or 2
+            for offset in range(0, len(found), size):
+                yield found[offset : offset + size]
+
+        with (
+            patch("app.services.rates.database_enabled", return_value=True),
+            patch.object(database_service, "iter_rate_batches", iter_rate_batches),
+        ):
+            yield calls
+
+    def test_range_streams_ndjson(self, client, stored):
+        """Test that every batch is streamed as one JSON object per line"""
+        response = client.get("/api/v1/rates/range?start=2005-01-01&end=2025-07-18")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [
+            {"date": "2005-01-03", "rate": 10.9, "source": "banxico"},
+            {"date": "2025-07-17", "rate": 18.68, "source": "banxico"},
+            {"date": "2025-07-18", "rate": 18.72, "source": "banxico"},
+        ]
+        assert stored == [(date(2005, 1, 1), date(2025, 7, 18), None, None)]
+        assert "x-next-cursor" not in response.headers
+
+    def test_range_streams_csv(self, client, stored):
+        """Test CSV output with a header row and a download filename"""
+        response = client.get(
+            "/api/v1/rates/range?start=2005-01-01&end=2025-07-18&format=csv"
+        )
+
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "usd-mxn-2005-01-01-2025-07-18.csv" in (
+            response.headers["content-disposition"]
+        )
+        assert response.text.splitlines() == [
+            "date,rate,source",
+            "2005-01-03,10.9,banxico",
+            "2025-07-17,18.68,banxico",
+            "2025-07-18,18.72,banxico",
+        ]
+
+    def test_range_pages_with_keyset_cursor(self, client, stored):
+        """Test that the cursor comes from the rows sent and round-trips"""
+        first = client.get("/api/v1/rates/range?start=2005-01-01&limit=2")
+        cursor = first.headers["x-next-cursor"]
+        second = client.get(
+            f"/api/v1/rates/range?start=2005-01-01&limit=2&cursor={cursor}"
+        )
+
+        assert [json.loads(line)["date"] for line in first.text.splitlines()] == [
+            "2005-01-03",
+            "2025-07-17",
+        ]
+        # One row past the page is read to know whether another page follows
+        assert [call[2:] for call in stored] == [(None, 3), (date(2025, 7, 17), 3)]
+        assert second.text.count("\n") == 1
+        assert "x-next-cursor" not in second.headers
+
+    def test_range_database_error_before_streaming(self, client):
+        """Test that a failing first query is a 503, not a truncated 200"""
+
+        async def iter_rate_batches(*args, **kwargs):
+            raise ConnectionError("Aurora unreachable")
+            yield
+
+        with (
+            patch("app.services.rates.database_enabled", return_value=True),
+            patch.object(database_service, "iter_rate_batches", iter_rate_batches),
+        ):
+            response = client.get("/api/v1/rates/range?start=2025-01-01")
+
+        assert response.status_code == 503
+
+    def test_range_rejects_bad_input(self, client, stored):
+        """Test inverted ranges, bad cursors and oversized pages"""
+        base = "/api/v1/rates/range?start=2025-01-02"
+        assert client.get(f"{base}&end=2025-01-01").status_code == 400
+        assert client.get(f"{base}&cursor=not-a-date").status_code == 400
+        assert client.get(f"{base}&limit=100000").status_code == 422
+
+    def test_range_needs_the_database(self, client):
+        """Test that range queries fail clearly without Aurora"""
+        with patch("app.services.rates.database_enabled", return_value=False):
+            response = client.get("/api/v1/rates/range?start=2025-01-01")
+        assert response.status_code == 503
+
 
 class TestHealthAPI:
 
@@ -109,3 +346,31 @@ class TestHealthAPI:
             assert response.status_code == 200
             data = response.json()
             assert data["status"] == "unhealthy"
+
+
+class TestMetricsAPI:
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_metrics_records_route_template_latency(self, client):
+        """Test that request latency is exported per route template"""
+        mock_rate = ExchangeRateData(date="2025-07-18", rate=18.7200, source="banxico")
+
+        with patch(
+            "app.services.rates.get_current_rate_body",
+            return_value=_encoded(mock_rate.model_dump_json().encode()),
+        ):
+            client.get("/api/v1/rates/current")
+        client.get("/does-not-exist")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/api/v1/rates/current",status="200"}' in response.text
+        )
+        assert 'route="unmatched",status="404"' in response.text
+        assert "/does-not-exist" not in response.text
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from app.services.banxico_stream import DatosParser
+
+PAYLOAD = {
+    "bmx": {
+        "series": [
+            {
+                "idSerie": "SF43718",
+                "titulo": "Tipo de cambio Pesos por dólar E.U.A.",
+                "datos": [
+                    {"fecha": "17/07/2025", "dato": "18.6800"},
+                    {"fecha": "18/07/2025", "dato": "18.7200"},
+                    {"fecha": "19/07/2025", "dato": "N/E"},
+                ],
+            }
+        ]
+    }
+}
+EXPECTED = [("17/07/2025", "18.6800"), ("18/07/2025", "18.7200"), ("19/07/2025", "N/E")]
+
+
+def _parse(body: bytes, chunk_size: int) -> list[tuple[str, str]]:
+    parser = DatosParser()
+    items = []
+    for offset in range(0, len(body), chunk_size):
+        items.extend(parser.feed(body[offset : offset + chunk_size]))
+    parser.close()
+    return items
+
+
+class TestDatosParser:
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 16])
+    def test_items_across_chunk_boundaries(self, chunk_size):
+        """Test that any chunking, including split UTF-8 characters, parses alike"""
+        body = json.dumps(PAYLOAD, ensure_ascii=False).encode()
+        assert _parse(body, chunk_size) == EXPECTED
+
+    def test_pretty_printed_payload(self):
+        """Test that whitespace between tokens is accepted"""
+        body = json.dumps(PAYLOAD, indent=4).encode()
+        assert _parse(body, 5) == EXPECTED
+
+    def test_items_are_released_as_they_complete(self):
+        """Test that the buffer only keeps the unfinished data point"""
+        body = json.dumps(PAYLOAD).encode()
+        split = body.index(b"18.7200") + 3
+        parser = DatosParser()
+
+        assert parser.feed(body[:split]) == [EXPECTED[0]]
+        assert len(parser._buffer) < 40
+        assert parser.feed(body[split:]) == EXPECTED[1:]
+        assert parser.done and parser.count == 3
+
+    def test_empty_datos(self):
+        """Test that an empty range parses to no data points"""
+        body = b'{"bmx":{"series":[{"idSerie":"SF43718","datos":[]}]}}'
+        assert _parse(body, 4) == []
+
+    def test_missing_datos_is_an_empty_series(self):
+        """Test that a complete body without datos (no data in range) is empty"""
+        body = b'{"bmx":{"series":[{"idSerie":"SF43718","titulo":"Tipo de cambio"}]}}'
+        assert _parse(body, 4) == []
+
+    def test_truncated_body_is_rejected(self):
+        """Test that a body cut off mid-array fails on close"""
+        body = json.dumps(PAYLOAD).encode()
+        parser = DatosParser()
+        parser.feed(body[: body.index(b"N/E")])
+
+        with pytest.raises(ValueError):
+            parser.close()
+
+    def test_truncated_preamble_is_rejected(self):
+        """Test that a body cut off before datos is not taken as an empty series"""
+        parser = DatosParser()
+        parser.feed(b'{"bmx":{"series":[{"idSerie":"SF43718",')
+
+        with pytest.raises(ValueError):
+            parser.close()
+
+    def test_malformed_data_point_is_rejected(self):
+        """Test that a data point without fecha/dato raises"""
+        parser = DatosParser()
+        with pytest.raises(ValueError):
+            parser.feed(b'{"bmx":{"series":[{"datos":[{"foo":"bar"}]}]}}')
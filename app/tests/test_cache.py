@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.asyncio import Connection
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.config import settings
+from app.core.local_cache import LocalCache
+from app.core.redis import InstrumentedConnectionPool, RedisClient
+
+
+class TestLocalCache:
+
+    def test_get_set_and_stats(self):
+        """Test basic get/set with hit and miss accounting"""
+        cache = LocalCache(max_entries=10, default_ttl=30)
+        assert cache.get("missing") is None
+
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = LocalCache(max_entries=2, default_ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        """Test that entries expire and TTL is capped by the default"""
+        cache = LocalCache(max_entries=10, default_ttl=0.05)
+        cache.set("key", "value", ttl=3600)
+
+        time.sleep(0.1)
+
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+
+class TestRedisClientL1:
+
+    @pytest.fixture
+    def client(self):
+        redis_client = RedisClient()
+        redis_client.local_cache = LocalCache(max_entries=10, default_ttl=30)
+        redis_client._client = AsyncMock()
+        return redis_client
+
+    @pytest.mark.asyncio
+    async def test_hot_reads_stay_in_process(self, client):
+        """Test that repeated reads are served by L1 without a Redis call"""
+        client._client.get.return_value = "cached"
+
+        for _ in range(5):
+            assert await client.get("rates:current") == "cached"
+
+        client._client.get.assert_called_once()
+        stats = client.get_stats()
+        assert stats["l1"]["hits"] == 4
+        assert stats["redis"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_write_updates_l1_and_publishes(self, client):
+        """Test that writes refresh L1 and broadcast an invalidation"""
+        await client.setex("rates:current", 300, "new")
+
+        assert client.local_cache.get("rates:current") == "new"
+        channel, message = client._client.publish.call_args.args
+        assert json.loads(message) == {
+            "origin": client.instance_id,
+            "keys": ["rates:current"],
+        }
+
+    def test_invalidation_from_other_instance(self, client):
+        """Test that peers' invalidations evict and our own are ignored"""
+        client.local_cache.set("rates:current", "old")
+
+        client._handle_invalidation(
+            json.dumps({"origin": client.instance_id, "keys": ["rates:current"]})
+        )
+        assert client.local_cache.get("rates:current") == "old"
+
+        client._handle_invalidation(
+            json.dumps({"origin": "other-node", "keys": ["rates:current"]})
+        )
+        assert client.local_cache.get("rates:current") is None
+
+    @pytest.mark.asyncio
+    async def test_mset_with_ttls_is_pipelined(self, client):
+        """Test that per-key TTLs go out as one pipeline and one invalidation"""
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[True, True])
+        client._client.pipeline = MagicMock()
+        client._client.pipeline.return_value.__aenter__.return_value = pipe
+
+        assert await client.mset(
+            {"rates:current": "a", "rates:historical:window": "b"},
+            ex={"rates:current": 300, "rates:historical:window": 3600},
+        )
+
+        assert [c.kwargs["ex"] for c in pipe.set.call_args_list] == [300, 3600]
+        pipe.execute.assert_awaited_once()
+        assert client.local_cache.get("rates:historical:window") == "b"
+        _, message = client._client.publish.call_args.args
+        assert json.loads(message)["keys"] == [
+            "rates:current",
+            "rates:historical:window",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_mget_counts_hits_and_misses(self, client):
+        """Test that MGET reads Redis once and feeds the hit/miss counters"""
+        client._client.mget.return_value = ["a", None]
+
+        assert await client.mget(["k1", "k2"]) == ["a", None]
+        client._client.mget.assert_awaited_once_with(["k1", "k2"])
+        assert client.get_stats()["redis"]["hits"] == 1
+        assert client.get_stats()["redis"]["misses"] == 1
+
+
+class _ReadyConnection(Connection):
+    """Connection that never touches the network"""
+
+    async def connect(self):
+        pass
+
+    async def can_read_destructive(self):
+        return False
+
+
+class TestRedisConnectionPool:
+
+    def test_pool_sized_from_settings(self):
+        """Test that the client uses a bounded pool of REDIS_MAX_CONNECTIONS"""
+        client = RedisClient()
+        client.client
+
+        assert isinstance(client._pool, InstrumentedConnectionPool)
+        assert client._pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+        assert client.get_stats()["pool"]["in_use"] == 0
+
+    @pytest.mark.asyncio
+    async def test_exhausted_pool_waits_then_times_out(self):
+        """Test that callers queue for a connection and timeouts are counted"""
+        pool = InstrumentedConnectionPool(
+            max_connections=1, timeout=0.05, connection_class=_ReadyConnection
+        )
+        connection = await pool.get_connection("GET")
+
+        with pytest.raises(RedisConnectionError):
+            await pool.get_connection("GET")
+
+        # A waiter gets the connection as soon as it is released
+        waiter = asyncio.create_task(pool.get_connection("GET"))
+        await asyncio.sleep(0.01)
+        await pool.release(connection)
+        assert await waiter is connection
+
+        stats = pool.get_stats()
+        assert (stats["acquired"], stats["timeouts"], stats["in_use"]) == (2, 1, 1)
+        assert stats["max_acquire_ms"] >= 50
@@ -1,8 +1,15 @@
 import asyncio
+import time
+from unittest.mock import AsyncMock
 
 import pytest
 
-from app.core.circuit_breaker import CircuitBreaker, CircuitState
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    CircuitState,
+    SharedState,
+)
 
 
 class TestCircuitBreaker:
@@ -107,6 +114,77 @@ class TestCircuitBreaker:
             await cb.call(failing_function)
         assert cb.state == CircuitState.OPEN
 
+    @pytest.mark.asyncio
+    async def test_open_rejection_carries_retry_after(self):
+        """Test that rejections report how long the breaker stays open"""
+        cb = CircuitBreaker(failure_threshold=1, timeout_duration=30)
+
+        async def failing_function():
+            raise Exception("Test failure")
+
+        with pytest.raises(Exception):
+            await cb.call(failing_function)
+
+        with pytest.raises(CircuitBreakerOpenError) as exc_info:
+            await cb.call(failing_function)
+        assert 29 < exc_info.value.retry_after <= 30
+        assert cb.rejected_count == 1
+
+    @pytest.mark.asyncio
+    async def test_half_open_allows_single_probe(self):
+        """Test that only one concurrent call probes while HALF_OPEN"""
+        cb = CircuitBreaker(failure_threshold=1, timeout_duration=0.1)
+        calls = 0
+
+        async def failing_function():
+            raise Exception("Test failure")
+
+        async def slow_function():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "success"
+
+        with pytest.raises(Exception):
+            await cb.call(failing_function)
+        await asyncio.sleep(0.2)
+
+        results = await asyncio.gather(
+            *(cb.call(slow_function) for _ in range(5)), return_exceptions=True
+        )
+
+        assert calls == 1
+        assert results.count("success") == 1
+        assert sum(isinstance(r, CircuitBreakerOpenError) for r in results) == 4
+        assert cb.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_released_on_unexpected_error(self):
+        """Test that an uncounted probe error lets the next call probe"""
+        cb = CircuitBreaker(
+            failure_threshold=1, timeout_duration=0.1, expected_exception=ValueError
+        )
+
+        async def counted_failure():
+            raise ValueError("Test failure")
+
+        async def uncounted_failure():
+            raise RuntimeError("Unexpected error")
+
+        async def successful_function():
+            return "success"
+
+        with pytest.raises(ValueError):
+            await cb.call(counted_failure)
+        await asyncio.sleep(0.2)
+
+        with pytest.raises(RuntimeError):
+            await cb.call(uncounted_failure)
+        assert cb.state == CircuitState.HALF_OPEN
+
+        assert await cb.call(successful_function) == "success"
+        assert cb.state == CircuitState.CLOSED
+
     def test_manual_reset(self):
         """Test manual circuit breaker reset"""
         cb = CircuitBreaker()
@@ -142,3 +220,208 @@ class TestCircuitBreaker:
 
         assert cb.state == CircuitState.CLOSED
         assert cb.failure_count == 0
+
+
+class TestSlidingWindowCircuitBreaker:
+
+    @pytest.mark.asyncio
+    async def test_opens_on_slow_call_rate(self):
+        """Test that successful but slow calls open the breaker"""
+        cb = CircuitBreaker(
+            window_size=4,
+            minimum_calls=4,
+            slow_call_rate_threshold=0.5,
+            slow_call_duration=0.02,
+        )
+
+        async def fast_function():
+            return "fast"
+
+        async def slow_function():
+            await asyncio.sleep(0.03)
+            return "slow"
+
+        assert await cb.call(fast_function) == "fast"
+        assert await cb.call(fast_function) == "fast"
+        assert await cb.call(slow_function) == "slow"
+        assert cb.state == CircuitState.CLOSED
+
+        assert await cb.call(slow_function) == "slow"
+        assert cb.state == CircuitState.OPEN
+
+        with pytest.raises(CircuitBreakerOpenError):
+            await cb.call(fast_function)
+
+    @pytest.mark.asyncio
+    async def test_opens_on_failure_rate_not_consecutive_failures(self):
+        """Test that interleaved failures trip on rate, not on a streak"""
+        cb = CircuitBreaker(
+            failure_threshold=100,
+            window_size=10,
+            minimum_calls=6,
+            failure_rate_threshold=0.5,
+        )
+
+        async def failing_function():
+            raise Exception("Test failure")
+
+        async def successful_function():
+            return "success"
+
+        for _ in range(2):
+            await cb.call(successful_function)
+            with pytest.raises(Exception):
+                await cb.call(failing_function)
+        assert cb.state == CircuitState.CLOSED
+        assert cb.get_status()["window"]["calls"] == 4
+
+        await cb.call(successful_function)
+        with pytest.raises(Exception):
+            await cb.call(failing_function)
+        assert cb.state == CircuitState.OPEN
+
+    @pytest.mark.asyncio
+    async def test_time_window_forgets_old_calls(self):
+        """Test that calls older than window_seconds leave the window"""
+        cb = CircuitBreaker(
+            window_seconds=0.05, minimum_calls=2, failure_rate_threshold=0.5
+        )
+
+        async def failing_function():
+            raise Exception("Test failure")
+
+        async def successful_function():
+            return "success"
+
+        with pytest.raises(Exception):
+            await cb.call(failing_function)
+        await asyncio.sleep(0.1)
+
+        await cb.call(successful_function)
+        await cb.call(successful_function)
+        assert cb.state == CircuitState.CLOSED
+        assert cb.get_status()["window"]["failure_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_slow_probe_reopens(self):
+        """Test that a HALF_OPEN probe slower than the limit keeps it open"""
+        cb = CircuitBreaker(
+            timeout_duration=0.05, window_size=10, slow_call_duration=0.02
+        )
+        cb.state = CircuitState.OPEN
+        cb.last_failure_time = time.time() - 1
+
+        async def slow_function():
+            await asyncio.sleep(0.03)
+            return "slow"
+
+        assert await cb.call(slow_function) == "slow"
+        assert cb.state == CircuitState.OPEN
+
+
+class TestSharedCircuitBreaker:
+
+    @pytest.fixture
+    def backend(self):
+        backend = AsyncMock()
+        backend.poll_interval = 0.05
+        backend.load.return_value = SharedState(CircuitState.CLOSED, 0, 0.0)
+        backend.acquire_probe.return_value = True
+        return backend
+
+    @pytest.mark.asyncio
+    async def test_failures_use_shared_counts(self, backend):
+        """Test that the fleet-wide failure count decides when to open"""
+        cb = CircuitBreaker(failure_threshold=3, backend=backend)
+        backend.record_failure.return_value = SharedState(
+            CircuitState.OPEN, 3, time.time()
+        )
+
+        async def failing_function():
+            raise Exception("Test failure")
+
+        with pytest.raises(Exception):
+            await cb.call(failing_function)
+
+        backend.record_failure.assert_called_once_with(3, False)
+        assert cb.state == CircuitState.OPEN
+        assert cb.failure_count == 3
+
+    @pytest.mark.asyncio
+    async def test_poll_opens_breaker_tripped_elsewhere(self, backend):
+        """Test that an OPEN state written by another instance is adopted"""
+        cb = CircuitBreaker(timeout_duration=30, backend=backend)
+        await cb.start()
+        backend.load.return_value = SharedState(CircuitState.OPEN, 3, time.time())
+        await asyncio.sleep(0.1)
+        await cb.stop()
+
+        async def any_function():
+            return "should not execute"
+
+        with pytest.raises(CircuitBreakerOpenError):
+            await cb.call(any_function)
+        assert cb.get_status()["backend"] == "redis"
+
+    @pytest.mark.asyncio
+    async def test_probe_claimed_by_another_instance(self, backend):
+        """Test that HALF_OPEN fails fast while another instance probes"""
+        cb = CircuitBreaker(failure_threshold=1, timeout_duration=0.1, backend=backend)
+        cb.state = CircuitState.OPEN
+        cb.last_failure_time = time.time() - 1
+        backend.acquire_probe.return_value = False
+        calls = 0
+
+        async def successful_function():
+            nonlocal calls
+            calls += 1
+            return "success"
+
+        with pytest.raises(CircuitBreakerOpenError):
+            await cb.call(successful_function)
+
+        assert calls == 0
+        assert cb.state == CircuitState.OPEN
+        backend.record_success.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_probe_success_resets_shared_state(self, backend):
+        """Test that a successful probe closes the breaker for the fleet"""
+        cb = CircuitBreaker(failure_threshold=1, timeout_duration=0.1, backend=backend)
+        cb.state = CircuitState.OPEN
+        cb.last_failure_time = time.time() - 1
+
+        async def successful_function():
+            return "success"
+
+        assert await cb.call(successful_function) == "success"
+        assert cb.state == CircuitState.CLOSED
+        backend.acquire_probe.assert_called_once()
+        backend.record_success.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_claim_releases_probe(self, backend):
+        """Test that cancelling during the shared probe claim frees the probe"""
+        cb = CircuitBreaker(failure_threshold=1, timeout_duration=0.1, backend=backend)
+        cb.state = CircuitState.OPEN
+        cb.last_failure_time = time.time() - 1
+        claimed = asyncio.Event()
+
+        async def slow_claim(ttl):
+            claimed.set()
+            await asyncio.sleep(10)
+
+        async def successful_function():
+            return "success"
+
+        backend.acquire_probe.side_effect = slow_claim
+        probe = asyncio.create_task(cb.call(successful_function))
+        await claimed.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert cb.state == CircuitState.HALF_OPEN
+        backend.acquire_probe.side_effect = None
+        assert await cb.call(successful_function) == "success"
+        assert cb.state == CircuitState.CLOSED
@@ -0,0 +1,71 @@
+from datetime import date
+
+from app.services import rates
+from app.services.rate_columns import RateColumns
+
+DATOS = [
+    ("11/07/2025", "18.5900"),
+    ("12/07/2025", "N/E"),
+    ("13/07/2025", "N/E"),
+    ("14/07/2025", "18.6000"),
+    ("15/07/2025", "18.6500"),
+    ("16/07/2025", "N/E"),
+    ("17/07/2025", "18.6800"),
+    ("18/07/2025", "18.7200"),
+    ("19/07/2025", "18.7300"),
+]
+
+
+class TestRateColumns:
+
+    def test_parse_marks_missing_and_malformed_rows(self):
+        """Test that N/E, bad numbers and bad dates are masked, not raised"""
+        columns = RateColumns.from_datos(
+            [
+                ("18/07/2025", "18.7200"),
+                ("19/07/2025", "N/E"),
+                ("31/02/2025", "18.7000"),
+                ("not a date", "18.7000"),
+                ("21/07/2025", "abc"),
+                ("22/07/2025", "-1"),
+            ]
+        )
+
+        assert len(columns) == 6
+        assert list(columns.valid) == [1, 0, 0, 0, 0, 0]
+        assert columns.ordinals[0] == date(2025, 7, 18).toordinal()
+        assert columns.rates[0] == 18.72
+
+    def test_business_days_sorted_and_sliced(self):
+        """Test weekday filtering, newest-first order and slicing on arrays"""
+        window = RateColumns.from_datos(DATOS).business_days().sorted(reverse=True)
+
+        assert [r.date for r in window[:2].to_models()] == [
+            date(2025, 7, 18),
+            date(2025, 7, 17),
+        ]
+        assert len(window) == 5
+        assert window.to_models()[-1].date == date(2025, 7, 11)
+
+    def test_unsorted_input_is_sorted(self):
+        """Test that rows out of date order are reordered"""
+        columns = RateColumns.from_datos(list(reversed(DATOS))).sorted()
+
+        assert list(columns.ordinals) == sorted(columns.ordinals)
+        assert columns.to_models()[0].date == date(2025, 7, 11)
+
+    def test_matches_model_parsing(self):
+        """Test that dicts and models agree with the per-row parsing path"""
+        window = RateColumns.from_datos(DATOS).business_days().sorted(reverse=True)
+        models = window.to_models()
+
+        assert window.to_dicts() == [rates._rate_to_dict(rate) for rate in models]
+        assert models[0].source == "banxico"
+
+    def test_from_payload_without_datos(self):
+        """Test that an empty series yields empty columns"""
+        payload = {"bmx": {"series": [{"idSerie": "SF43718", "datos": []}]}}
+        columns = RateColumns.from_payload(payload)
+
+        assert len(columns) == 0
+        assert columns.business_days().sorted(reverse=True).to_models() == []
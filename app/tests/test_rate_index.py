@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.rate_index import RateIndex
+
+RATES = [
+    (date(2025, 7, 14), 18.60),
+    (date(2025, 7, 15), 18.65),
+    (date(2025, 7, 17), 18.68),
+    (date(2025, 7, 18), 18.72),
+    (date(2025, 7, 21), 18.55),
+]
+
+
+class TestRateIndex:
+
+    def test_last_n_aggregates(self):
+        """Test average/min/max/count over the most recent N rates"""
+        index = RateIndex(RATES)
+        stats = index.last(3)
+
+        assert stats.count == 3
+        assert stats.start_date == date(2025, 7, 17)
+        assert stats.end_date == date(2025, 7, 21)
+        assert stats.average == pytest.approx((18.68 + 18.72 + 18.55) / 3)
+        assert stats.min == 18.55
+        assert stats.max == 18.72
+
+    def test_last_n_larger_than_series(self):
+        """Test that N beyond the series length covers every rate"""
+        index = RateIndex(RATES)
+        assert index.last(90).count == len(RATES)
+        assert index.last(0) is None
+        assert RateIndex().last(5) is None
+
+    def test_between_dates_including_gaps(self):
+        """Test date ranges whose bounds fall on missing days"""
+        index = RateIndex(RATES)
+
+        stats = index.between(date(2025, 7, 16), date(2025, 7, 20))
+        assert stats.count == 2
+        assert stats.average == pytest.approx((18.68 + 18.72) / 2)
+
+        assert index.between(date(2025, 7, 1), date(2025, 8, 1)).count == 5
+        assert index.between(date(2025, 7, 19), date(2025, 7, 20)) is None
+        assert index.between(date(2025, 8, 1), date(2025, 8, 5)) is None
+
+    def test_incremental_append_matches_full_build(self):
+        """Test that appending new rates keeps every aggregate correct"""
+        start = date(2024, 1, 1)
+        series = [
+            (start + timedelta(days=i), 17 + (i * 7 % 13) / 10) for i in range(50)
+        ]
+        index = RateIndex(series[:20])
+        index.extend(series)
+
+        for n in range(1, 51):
+            window = [rate for _, rate in series[-n:]]
+            stats = index.last(n)
+            assert stats.average == pytest.approx(sum(window) / n)
+            assert stats.min == min(window)
+            assert stats.max == max(window)
+
+    def test_append_rejects_older_dates(self):
+        """Test that out-of-order appends are rejected"""
+        index = RateIndex(RATES)
+        with pytest.raises(ValueError):
+            index.append(date(2025, 7, 1), 18.0)
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.rate_limiter import (
+    Quota,
+    RateLimitExceededError,
+    RedisTokenBucket,
+    TokenBucket,
+)
+
+
+class TestTokenBucket:
+
+    @pytest.mark.asyncio
+    async def test_burst_then_paced_at_refill_rate(self):
+        """Test that the capacity is granted at once and the rest at the rate"""
+        bucket = TokenBucket(capacity=3, rate=50)
+
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        burst = time.monotonic() - started
+        await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+        total = time.monotonic() - started
+
+        assert burst < 0.02
+        # 5 more tokens at 50/s take ~0.1s
+        assert 0.08 <= total < 0.5
+        assert bucket.get_stats()["acquired"] == 8
+
+    def test_for_quota_never_exceeds_quota(self):
+        """Test that burst plus refill over the period equals the quota"""
+        bucket = TokenBucket.for_quota(requests=200, period=300, burst=20)
+
+        assert bucket.capacity == 20
+        assert bucket.capacity + bucket.rate * 300 == pytest.approx(200)
+
+    def test_invalid_configuration(self):
+        """Test that a bucket that could never grant a token is rejected"""
+        with pytest.raises(ValueError):
+            TokenBucket(capacity=0, rate=1)
+        with pytest.raises(ValueError):
+            TokenBucket.for_quota(requests=10, period=60, burst=10)
+
+
+class TestRedisTokenBucket:
+
+    @pytest.fixture
+    def script(self):
+        script = AsyncMock()
+        client = MagicMock()
+        client.register_script.return_value = script
+        with patch("app.core.rate_limiter.redis_client", MagicMock(client=client)):
+            yield script
+
+    @pytest.fixture
+    def limiter(self):
+        return RedisTokenBucket(
+            "banxico",
+            [Quota(200, 300, 20), Quota(10000, 86400, 1000)],
+            max_wait=0.1,
+        )
+
+    @pytest.mark.asyncio
+    async def test_allowed_call_reports_remaining_budget(self, script, limiter):
+        """Test that one script call takes a token from every quota"""
+        script.return_value = [1, "0", "19", "999"]
+
+        await limiter.acquire()
+
+        script.assert_awaited_once()
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["ratelimit:banxico:300", "ratelimit:banxico:86400"]
+        # capacity, refill rate and key ttl per quota
+        assert kwargs["args"][:2] == [20, 0.6]
+        status = limiter.get_status()
+        assert [q["remaining"] for q in status["quotas"]] == [19.0, 999.0]
+        assert status["allowed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_waits_briefly_for_the_next_token(self, script, limiter):
+        """Test that a token due within max_wait is waited for"""
+        script.side_effect = [[0, "0.05", "0.97", "990"], [1, "0", "0.0", "989"]]
+
+        await limiter.acquire()
+
+        assert script.await_count == 2
+        assert limiter.get_status()["waited_seconds"] == 0.05
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_quota_refills_too_late(self, script, limiter):
+        """Test that the call is refused with the time until the next token"""
+        script.return_value = [0, "12.5", "0.2", "0"]
+
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            await limiter.acquire()
+
+        assert exc_info.value.retry_after == 12.5
+        assert limiter.get_status()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_lets_calls_through(self, script, limiter):
+        """Test that an unreachable Redis does not block Banxico calls"""
+        script.side_effect = ConnectionError("Redis down")
+
+        await limiter.acquire()
+
+        assert limiter.get_status()["rejected"] == 0
@@ -0,0 +1,130 @@
+import datetime
+from unittest.mock import ANY, AsyncMock, patch
+
+import pytest
+
+from app.services import health
+from app.services.scheduler import RefreshJob, RefreshScheduler, get_timestamp
+
+
+def utc(hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime(2025, 7, 18, hour, minute, tzinfo=datetime.timezone.utc)
+
+
+class TestRefreshScheduler:
+
+    @pytest.fixture(autouse=True)
+    def lease(self):
+        """Redis SET NX used for the fleet-wide lease, granted by default"""
+        client = AsyncMock()
+        client.set.return_value = True
+        with patch("app.services.scheduler.redis_client", AsyncMock(client=client)):
+            yield client.set
+
+    @pytest.mark.asyncio
+    async def test_run_due_jobs_records_success(self):
+        """Test that a due job runs and its outcome is recorded"""
+        refresh = AsyncMock()
+        scheduler = RefreshScheduler(
+            jobs=[RefreshJob(name="rates:current", func=refresh, interval=240)]
+        )
+
+        await scheduler.run_due_jobs()
+
+        refresh.assert_awaited_once()
+        job = scheduler.jobs[0]
+        assert job.runs == 1
+        assert job.last_status == "success"
+        assert job.next_run > job.last_finished_at
+
+    @pytest.mark.asyncio
+    async def test_run_due_jobs_records_failure(self):
+        """Test that a failing job is reported without stopping the scheduler"""
+        refresh = AsyncMock(side_effect=Exception("Banxico down"))
+        scheduler = RefreshScheduler(
+            jobs=[RefreshJob(name="rates:current", func=refresh, interval=240)]
+        )
+
+        await scheduler.run_due_jobs()
+
+        last_run = scheduler.get_status()["jobs"][0]["last_run"]
+        assert last_run["status"] == "error"
+        assert last_run["error"] == "Banxico down"
+        assert scheduler.jobs[0].failures == 1
+
+    @pytest.mark.asyncio
+    async def test_job_not_rerun_before_interval(self):
+        """Test that a job is skipped until its interval elapses"""
+        refresh = AsyncMock()
+        scheduler = RefreshScheduler(
+            jobs=[RefreshJob(name="rates:current", func=refresh, interval=240)]
+        )
+
+        with patch.object(scheduler, "in_publication_window", return_value=False):
+            await scheduler.run_due_jobs()
+            await scheduler.run_due_jobs()
+
+        assert refresh.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_job_leased_by_another_instance_is_skipped(self, lease):
+        """Test that only the instance holding the lease calls Banxico"""
+        refresh = AsyncMock()
+        scheduler = RefreshScheduler(
+            jobs=[RefreshJob(name="db:sync", func=refresh, interval=3600)]
+        )
+        lease.return_value = None
+
+        with patch.object(scheduler, "in_publication_window", return_value=False):
+            await scheduler.run_due_jobs()
+            await scheduler.run_due_jobs()
+
+        refresh.assert_not_awaited()
+        lease.assert_awaited_once_with("scheduler:lease:db:sync", ANY, nx=True, ex=3600)
+        job = scheduler.jobs[0]
+        assert job.skipped == 1
+        assert job.runs == 0
+        assert job.next_run > get_timestamp()
+
+    @pytest.mark.asyncio
+    async def test_job_runs_when_lease_cannot_be_checked(self, lease):
+        """Test that an unreachable Redis does not stop cache refreshes"""
+        refresh = AsyncMock()
+        scheduler = RefreshScheduler(
+            jobs=[RefreshJob(name="rates:current", func=refresh, interval=240)]
+        )
+        lease.side_effect = ConnectionError("Redis down")
+
+        await scheduler.run_due_jobs()
+
+        refresh.assert_awaited_once()
+
+    def test_publication_window_tightens_interval(self):
+        """Test the faster cadence around Banxico's publication time"""
+        scheduler = RefreshScheduler(jobs=[])
+        job = RefreshJob(
+            name="rates:historical:window", func=AsyncMock(), interval=3000
+        )
+
+        assert scheduler.in_publication_window(utc(18, 30))
+        assert not scheduler.in_publication_window(utc(9))
+        assert scheduler._interval_for(job, utc(18, 30)) == 60
+        assert scheduler._interval_for(job, utc(9)) == 3000
+
+    @pytest.mark.asyncio
+    async def test_status_reported_in_health(self):
+        """Test that the scheduler status is included in the health check"""
+        with (
+            patch(
+                "app.services.health.check_banxico_status",
+                return_value={"status": "healthy", "source": "banxico"},
+            ),
+            patch(
+                "app.services.health.check_redis_status",
+                return_value={"status": "healthy", "source": "redis"},
+            ),
+        ):
+            result = await health.full_health_check()
+
+        assert "jobs" in result["scheduler"]
+        assert result["scheduler"]["jobs"][0]["name"] == "rates:current"
@@ -1,14 +1,26 @@
-from datetime import date
-from unittest.mock import AsyncMock, patch
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from sqlalchemy.dialects import mysql
 
+from app.core.circuit_breaker import CircuitState
+from app.core.database import DatabaseManager
+from app.core.local_cache import LocalCache
+from app.core.rate_limiter import RateLimitExceededError, TokenBucket
 from app.schemas.banxico import BanxicoResponse
 from app.schemas.rates import ExchangeRateData
-from app.services import health, rates
+from app.services import backfill, health, rates, sync
 from app.services.banxico import BanxicoAPI
+from app.services.database import BulkSaveResult, DatabaseService, _upsert_statement
+from app.services.rate_columns import RateColumns
 
 
 class TestBanxicoService:
@@ -72,13 +84,257 @@ class TestBanxicoService:
 
             assert exc_info.value.status_code == 502
 
+    @pytest.mark.asyncio
+    async def test_open_breaker_fails_fast(self, banxico_service):
+        """Test that an open breaker rejects with 503 without calling Banxico"""
+        banxico_service.circuit_breaker.failure_threshold = 1
+        mock_get = AsyncMock(side_effect=httpx.TimeoutException("Timeout"))
+
+        with patch("httpx.AsyncClient.get", mock_get):
+            with pytest.raises(HTTPException):
+                await banxico_service.fetch_series()
+
+            with pytest.raises(HTTPException) as exc_info:
+                await banxico_service.fetch_series()
+
+        assert exc_info.value.status_code == 503
+        assert int(exc_info.value.headers["Retry-After"]) > 0
+        mock_get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_call_is_not_sent(self, banxico_service):
+        """Test that an exhausted quota fails with 503 before calling Banxico"""
+        banxico_service.rate_limiter = AsyncMock()
+        banxico_service.rate_limiter.acquire.side_effect = RateLimitExceededError(
+            "Rate limit 'banxico' exhausted", retry_after=12.5
+        )
+        mock_get = AsyncMock()
+
+        with patch("httpx.AsyncClient.get", mock_get):
+            with pytest.raises(HTTPException) as exc_info:
+                await banxico_service.fetch_series()
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "13"
+        mock_get.assert_not_called()
+        # Our own quota is not an upstream failure
+        assert banxico_service.circuit_breaker.failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_spends_no_token(self, banxico_service):
+        """Test that a rejected call never waits for or takes a quota token"""
+        breaker = banxico_service.circuit_breaker
+        breaker.state = CircuitState.OPEN
+        breaker.last_failure_time = time.time()
+        banxico_service.rate_limiter = AsyncMock()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await banxico_service.fetch_series()
+        with pytest.raises(HTTPException):
+            async for _ in banxico_service.stream_series("01/07/2025", "18/07/2025"):
+                pass
+
+        assert exc_info.value.status_code == 503
+        banxico_service.rate_limiter.acquire.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_probe_is_released(self, banxico_service):
+        """Test that a probe refused a token lets the next call probe instead"""
+        breaker = banxico_service.circuit_breaker
+        breaker.state = CircuitState.HALF_OPEN
+        banxico_service.rate_limiter = AsyncMock()
+        banxico_service.rate_limiter.acquire.side_effect = RateLimitExceededError(
+            "Rate limit 'banxico' exhausted", retry_after=1.0
+        )
+
+        with pytest.raises(HTTPException):
+            await banxico_service.fetch_series()
+
+        assert not breaker._probe_in_flight
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_quota_wait_is_not_timed_by_the_breaker(self, banxico_service):
+        """Test that the token is taken by the admitted probe and not counted as slow"""
+        banxico_service.client  # created outside the timed call
+        breaker = banxico_service.circuit_breaker
+        breaker.slow_call_duration = 0.02
+        breaker.window_size, breaker.minimum_calls = 1, 1
+        breaker.state = CircuitState.HALF_OPEN
+        probe_held = []
+
+        async def slow_acquire(max_wait=None):
+            probe_held.append(breaker._probe_in_flight)
+            await asyncio.sleep(0.05)
+
+        banxico_service.rate_limiter = AsyncMock()
+        banxico_service.rate_limiter.acquire.side_effect = slow_acquire
+        response = httpx.Response(
+            200,
+            json={
+                "bmx": {
+                    "series": [{"datos": [{"fecha": "18/07/2025", "dato": "18.72"}]}]
+                }
+            },
+            request=httpx.Request("GET", "https://banxico.test"),
+        )
+
+        with patch("httpx.AsyncClient.get", AsyncMock(return_value=response)):
+            await banxico_service.fetch_series_columns("2025-07-18", "2025-07-18")
+
+        assert probe_held == [True]
+        assert breaker.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_no_data_does_not_trip_breaker(self, banxico_service):
+        """Test that a 404 for an empty range is not counted as a failure"""
+        banxico_service.circuit_breaker.failure_threshold = 1
+        response = httpx.Response(
+            200,
+            json={"bmx": {"series": [{"idSerie": "SF43718", "datos": []}]}},
+            request=httpx.Request("GET", "https://banxico.test"),
+        )
+
+        with patch("httpx.AsyncClient.get", AsyncMock(return_value=response)):
+            with pytest.raises(HTTPException) as exc_info:
+                await banxico_service.fetch_series("2025-07-19", "2025-07-20")
+
+        assert exc_info.value.status_code == 404
+        assert banxico_service.circuit_breaker.failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_fetch_series_columns_skips_models(self, banxico_service):
+        """Test that the columnar mode decodes datos straight into arrays"""
+        response = httpx.Response(
+            200,
+            json={
+                "bmx": {
+                    "series": [
+                        {
+                            "idSerie": "SF43718",
+                            "titulo": "Tipo de cambio",
+                            "datos": [
+                                {"fecha": "17/07/2025", "dato": "18.6800"},
+                                {"fecha": "18/07/2025", "dato": "N/E"},
+                            ],
+                        }
+                    ]
+                }
+            },
+            request=httpx.Request("GET", "https://banxico.test"),
+        )
+
+        with patch("httpx.AsyncClient.get", AsyncMock(return_value=response)):
+            columns = await banxico_service.fetch_series_columns(
+                "2025-07-17", "2025-07-18"
+            )
+
+        assert isinstance(columns, RateColumns)
+        assert list(columns.rates)[0] == 18.68
+        assert list(columns.valid) == [1, 0]
+
+    @pytest.mark.asyncio
+    async def test_stream_series_yields_points_incrementally(self, banxico_service):
+        """Test that streaming yields data points from a chunked body"""
+        body = json.dumps(
+            {
+                "bmx": {
+                    "series": [
+                        {
+                            "idSerie": "SF43718",
+                            "titulo": "Tipo de cambio",
+                            "datos": [
+                                {"fecha": "17/07/2025", "dato": "18.6800"},
+                                {"fecha": "18/07/2025", "dato": "18.7200"},
+                            ],
+                        }
+                    ]
+                }
+            }
+        ).encode()
+
+        async def chunks():
+            for offset in range(0, len(body), 16):
+                yield body[offset : offset + 16]
+
+        response = httpx.Response(
+            200, content=chunks(), request=httpx.Request("GET", "https://banxico.test")
+        )
+
+        with patch("httpx.AsyncClient.send", AsyncMock(return_value=response)):
+            points = [
+                point
+                async for point in banxico_service.stream_series(
+                    "2025-07-17", "2025-07-18"
+                )
+            ]
+
+        assert [(p.fecha, p.dato) for p in points] == [
+            ("17/07/2025", "18.6800"),
+            ("18/07/2025", "18.7200"),
+        ]
+        assert response.is_closed
+
+    @pytest.mark.asyncio
+    async def test_stream_series_truncated_body(self, banxico_service):
+        """Test that a body cut off mid-array is an upstream failure"""
+        response = httpx.Response(
+            200,
+            content=b'{"bmx":{"series":[{"datos":[{"fecha":"17/07/2025","dato":"18.68"}',
+            request=httpx.Request("GET", "https://banxico.test"),
+        )
+
+        with patch("httpx.AsyncClient.send", AsyncMock(return_value=response)):
+            with pytest.raises(HTTPException) as exc_info:
+                async for _ in banxico_service.stream_series(
+                    "2025-07-17", "2025-07-18"
+                ):
+                    pass
+
+        assert exc_info.value.status_code == 502
+        assert banxico_service.circuit_breaker.failure_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_series_without_datos_is_empty(self, banxico_service):
+        """Test that a range Banxico has no data for yields nothing"""
+        response = httpx.Response(
+            200,
+            content=b'{"bmx":{"series":[{"idSerie":"SF43718","titulo":"Tipo"}]}}',
+            request=httpx.Request("GET", "https://banxico.test"),
+        )
+
+        with patch("httpx.AsyncClient.send", AsyncMock(return_value=response)):
+            points = [
+                point
+                async for point in banxico_service.stream_series(
+                    "2025-07-19", "2025-07-20"
+                )
+            ]
+
+        assert points == []
+        assert banxico_service.circuit_breaker.failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_client_is_pooled_across_calls(self, banxico_service):
+        """Test that fetch_series reuses one long-lived HTTP client"""
+        client = banxico_service.client
+        assert banxico_service.client is client
+        assert not client.is_closed
+
+        await banxico_service.close()
+
+        assert client.is_closed
+        assert banxico_service.client is not client
+        await banxico_service.close()
+
 
 class TestRatesService:
 
     @pytest.mark.asyncio
     async def test_get_current_exchange_rate_cache_miss(self):
         """Test current rate with cache miss"""
-        mock_redis = AsyncMock()
+        mock_redis = AsyncMock(local_cache=None)
         mock_redis.get.return_value = None
 
         mock_banxico = AsyncMock()
@@ -107,10 +363,147 @@ class TestRatesService:
             assert result.rate == 18.7200
             mock_banxico.fetch_series.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_get_current_exchange_rate_coalesces_misses(self):
+        """Test that concurrent cache misses share a single Banxico call"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = None
+
+        async def slow_fetch(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return BanxicoResponse.model_validate(
+                {
+                    "bmx": {
+                        "series": [
+                            {
+                                "idSerie": "SF43718",
+                                "titulo": "Tipo de cambio",
+                                "datos": [{"fecha": "18/07/2025", "dato": "18.7200"}],
+                            }
+                        ]
+                    }
+                }
+            )
+
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series.side_effect = slow_fetch
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+        ):
+            results = await asyncio.gather(
+                *(rates.get_current_exchange_rate() for _ in range(5))
+            )
+
+        assert all(r.rate == 18.7200 for r in results)
+        mock_banxico.fetch_series.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_current_exchange_rate_fresh_hit(self):
+        """Test that a fresh cache entry is served without calling Banxico"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = json.dumps(
+            {
+                "fresh_until": time.time() + 60,
+                "data": {"date": "2025-07-18", "rate": 18.72, "source": "banxico"},
+            }
+        )
+        mock_banxico = AsyncMock()
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+        ):
+            result = await rates.get_current_exchange_rate()
+
+        assert result.rate == 18.72
+        mock_banxico.fetch_series.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_current_exchange_rate_stale_while_revalidate(self):
+        """Test that a stale entry is returned at once and refreshed in background"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = json.dumps(
+            {
+                "fresh_until": time.time() - 1,
+                "data": {"date": "2025-07-17", "rate": 18.68, "source": "banxico"},
+            }
+        )
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series.return_value = BanxicoResponse.model_validate(
+            {
+                "bmx": {
+                    "series": [
+                        {
+                            "idSerie": "SF43718",
+                            "titulo": "Tipo de cambio",
+                            "datos": [{"fecha": "18/07/2025", "dato": "18.7200"}],
+                        }
+                    ]
+                }
+            }
+        )
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+        ):
+            result = await rates.get_current_exchange_rate()
+            assert result.rate == 18.68
+
+            await asyncio.gather(*rates._refresh_tasks)
+
+        mock_banxico.fetch_series.assert_called_once()
+        key, ttl, value = mock_redis.setex.call_args.args
+        assert key == "rates:current"
+        assert ttl == rates.CURRENT_RATE_HARD_TTL
+        assert json.loads(value)["data"]["rate"] == 18.72
+
+    @pytest.mark.asyncio
+    async def test_cancel_refreshes_stops_background_fetches(self):
+        """Test that shutdown cancels refreshes before clients are closed"""
+        started = asyncio.Event()
+
+        async def slow_load():
+            started.set()
+            await asyncio.sleep(10)
+
+        rates._schedule_refresh("rates:current", slow_load)
+        await started.wait()
+
+        await rates.cancel_refreshes()
+
+        assert not rates._refresh_tasks
+        assert rates.rates_flight.in_flight() == []
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_backs_off(self):
+        """Test that stale reads during an outage do not retry upstream each time"""
+        attempts = 0
+
+        async def failing_load():
+            nonlocal attempts
+            attempts += 1
+            raise HTTPException(
+                status_code=503, detail="down", headers={"Retry-After": "120"}
+            )
+
+        try:
+            for _ in range(20):
+                rates._schedule_refresh("rates:test", failing_load)
+                await asyncio.gather(*rates._refresh_tasks, return_exceptions=True)
+
+            assert attempts == 1
+            retry_at = rates._refresh_backoff["rates:test"] - time.monotonic()
+            assert 100 < retry_at <= 120
+        finally:
+            rates._refresh_backoff.clear()
+
     @pytest.mark.asyncio
     async def test_get_current_exchange_rate_no_data(self):
         """Test current rate when Banxico returns no data"""
-        mock_redis = AsyncMock()
+        mock_redis = AsyncMock(local_cache=None)
         mock_redis.get.return_value = None
 
         mock_banxico = AsyncMock()
@@ -127,26 +520,13 @@ class TestRatesService:
     @pytest.mark.asyncio
     async def test_get_historical_rates_success(self):
         """Test successful historical rates retrieval"""
-        mock_redis = AsyncMock()
+        mock_redis = AsyncMock(local_cache=None)
         mock_redis.get.return_value = None
 
         mock_banxico = AsyncMock()
-        mock_banxico.fetch_series.return_value.bmx.series = [
-            type(
-                "obj",
-                (object,),
-                {
-                    "datos": [
-                        type(
-                            "obj", (object,), {"fecha": "18/07/2025", "dato": "18.7200"}
-                        ),
-                        type(
-                            "obj", (object,), {"fecha": "17/07/2025", "dato": "18.6800"}
-                        ),
-                    ]
-                },
-            )
-        ]
+        mock_banxico.fetch_series_columns.return_value = RateColumns.from_datos(
+            [("18/07/2025", "18.7200"), ("17/07/2025", "18.6800")]
+        )
 
         with (
             patch("app.services.rates.redis_client", mock_redis),
@@ -158,6 +538,321 @@ class TestRatesService:
             assert len(result) <= 2
             assert all(isinstance(rate, ExchangeRateData) for rate in result)
 
+    @pytest.mark.asyncio
+    async def test_historical_window_skips_models_without_database(self):
+        """Test that no models are built for a database that is not in use"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = None
+
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.return_value = RateColumns.from_datos(
+            [("18/07/2025", "18.7200"), ("17/07/2025", "18.6800")]
+        )
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+            patch("app.services.rates.database_enabled", return_value=False),
+            patch.object(RateColumns, "to_models") as to_models,
+        ):
+            result = await rates.get_historical_rates(days=2)
+
+        assert [rate.rate for rate in result] == [18.72, 18.68]
+        to_models.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_historical_queries_share_one_window(self):
+        """Test that every `days` value is sliced from one cached window"""
+        store = {}
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.side_effect = lambda key, **kwargs: store.get(key)
+        mock_redis.setex.side_effect = lambda key, ttl, value: store.update(
+            {key: value}
+        )
+
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.return_value = RateColumns.from_payload(
+            {
+                "bmx": {
+                    "series": [
+                        {
+                            "idSerie": "SF43718",
+                            "titulo": "Tipo de cambio",
+                            "datos": [
+                                {"fecha": "14/07/2025", "dato": "18.6000"},
+                                {"fecha": "15/07/2025", "dato": "18.6500"},
+                                {"fecha": "16/07/2025", "dato": "N/E"},
+                                {"fecha": "17/07/2025", "dato": "18.6800"},
+                                {"fecha": "18/07/2025", "dato": "18.7200"},
+                                {"fecha": "19/07/2025", "dato": "18.7300"},
+                            ],
+                        }
+                    ]
+                }
+            }
+        )
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+        ):
+            two_days = await rates.get_historical_rates(days=2)
+            all_days = await rates.get_historical_rates(days=90)
+            average = await rates.get_average_rate(days=3)
+
+        assert [r.date for r in two_days] == [date(2025, 7, 18), date(2025, 7, 17)]
+        assert len(all_days) == 4
+        assert abs(average - (18.72 + 18.68 + 18.65) / 3) < 1e-9
+        mock_banxico.fetch_series_columns.assert_called_once()
+        assert list(store) == [rates.HISTORICAL_WINDOW_KEY]
+
+    @pytest.mark.asyncio
+    async def test_batch_reads_all_keys_with_one_mget(self):
+        """Test that a batch hit costs one MGET and no per-key GETs"""
+        fresh_until = time.time() + 60
+        current = rates.CachedEntry.from_data(
+            {"date": "2025-07-18", "rate": 18.72, "source": "banxico"}, fresh_until
+        )
+        window = rates.CachedEntry.from_data(
+            [
+                {"date": "2025-07-18", "rate": 18.72, "source": "banxico"},
+                {"date": "2025-07-17", "rate": 18.68, "source": "banxico"},
+            ],
+            fresh_until,
+        )
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.mget.return_value = [
+            rates._encode_entry(current),
+            rates._encode_entry(window),
+        ]
+        mock_banxico = AsyncMock()
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+        ):
+            items = await rates.get_batch_bodies(
+                [("current", None), ("historical", 1), ("average", 2)]
+            )
+
+        mock_redis.mget.assert_awaited_once_with(
+            [rates.CURRENT_RATE_KEY, rates.HISTORICAL_WINDOW_KEY]
+        )
+        mock_redis.get.assert_not_called()
+        mock_banxico.fetch_series_columns.assert_not_called()
+        assert [item.status for item in items] == [200, 200, 200]
+        assert json.loads(items[0].body)["rate"] == 18.72
+        assert [r["date"] for r in json.loads(items[1].body)] == ["2025-07-18"]
+        assert json.loads(items[2].body) == 18.7
+
+    @pytest.mark.asyncio
+    async def test_batch_shares_upstream_fetch_and_isolates_errors(self):
+        """Test that sub-queries on one key load it once and fail alone"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.mget.return_value = [None, None]
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series.side_effect = HTTPException(
+            status_code=503, detail="Banxico API rate limit reached"
+        )
+        mock_banxico.fetch_series_columns.return_value = RateColumns.from_datos(
+            [("17/07/2025", "18.6800"), ("18/07/2025", "18.7200")]
+        )
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.banxico_api", mock_banxico),
+        ):
+            items = await rates.get_batch_bodies(
+                [("current", None), ("historical", 10), ("average", 15)]
+            )
+
+        assert items[0] == rates.BatchItem(503, detail="Banxico API rate limit reached")
+        assert [item.status for item in items[1:]] == [200, 200]
+        mock_banxico.fetch_series_columns.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_read_path_serves_from_l1(self):
+        """Test that an L1 hit skips Redis and records the serving tier"""
+        local_cache = LocalCache(max_entries=8, default_ttl=30)
+        local_cache.set(
+            rates.CURRENT_RATE_KEY,
+            json.dumps(
+                {
+                    "fresh_until": time.time() + 60,
+                    "data": {"date": "2025-07-18", "rate": 18.72, "source": "banxico"},
+                }
+            ),
+        )
+        mock_redis = AsyncMock(local_cache=local_cache)
+        trace = rates.ReadTrace()
+
+        with patch("app.services.rates.redis_client", mock_redis):
+            result = await rates.get_current_exchange_rate(trace=trace)
+
+        assert result.rate == 18.72
+        assert trace.tier == "l1"
+        assert list(trace.timings_ms) == ["l1"]
+        mock_redis.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_read_path_falls_back_to_database(self):
+        """Test that a Redis miss is served from Aurora and backfills Redis"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = None
+        mock_db = AsyncMock()
+        mock_db.get_recent_rates.return_value = (
+            [ExchangeRateData(date=date(2025, 7, 18), rate=18.72)],
+            datetime.now(timezone.utc),
+        )
+        mock_banxico = AsyncMock()
+        trace = rates.ReadTrace()
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.database_service", mock_db),
+            patch("app.services.rates.banxico_api", mock_banxico),
+            patch("app.services.rates.database_enabled", return_value=True),
+        ):
+            result = await rates.get_current_exchange_rate(trace=trace)
+
+        assert result.rate == 18.72
+        assert trace.tier == "database"
+        assert list(trace.timings_ms) == ["redis", "database"]
+        mock_banxico.fetch_series.assert_not_called()
+        key, _, value = mock_redis.setex.call_args.args
+        assert key == rates.CURRENT_RATE_KEY
+        assert json.loads(value)["data"]["rate"] == 18.72
+
+    @pytest.mark.asyncio
+    async def test_database_tier_off_when_startup_failed(self):
+        """Test that a database unreachable at startup is never queried"""
+        manager = DatabaseManager()
+        manager.engine = MagicMock()
+        manager.engine.begin.side_effect = ConnectionError("Aurora unreachable")
+        manager.session_maker = MagicMock()
+
+        with (
+            patch("app.services.rates.settings.DATABASE_ENABLED", True),
+            patch("app.services.rates.db_manager", manager),
+        ):
+            with pytest.raises(ConnectionError):
+                await manager.create_tables()
+            assert not rates.database_enabled()
+
+            manager.engine.begin.side_effect = None
+            manager.engine.begin.return_value = AsyncMock()
+            await manager.create_tables()
+            assert rates.database_enabled()
+
+    @pytest.mark.asyncio
+    async def test_read_path_backfills_database_from_banxico(self):
+        """Test that a miss on every tier calls Banxico and saves to Aurora"""
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = None
+        mock_db = AsyncMock()
+        mock_db.get_recent_rates.return_value = ([], None)
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series.return_value = BanxicoResponse.model_validate(
+            {
+                "bmx": {
+                    "series": [
+                        {
+                            "idSerie": "SF43718",
+                            "titulo": "Tipo de cambio",
+                            "datos": [{"fecha": "18/07/2025", "dato": "18.7200"}],
+                        }
+                    ]
+                }
+            }
+        )
+        trace = rates.ReadTrace()
+
+        with (
+            patch("app.services.rates.redis_client", mock_redis),
+            patch("app.services.rates.database_service", mock_db),
+            patch("app.services.rates.banxico_api", mock_banxico),
+            patch("app.services.rates.database_enabled", return_value=True),
+        ):
+            result = await rates.get_current_exchange_rate(trace=trace)
+
+        assert result.rate == 18.72
+        assert trace.tier == "banxico"
+        assert list(trace.timings_ms) == ["redis", "database", "banxico"]
+        assert "banxico;dur=" in trace.server_timing()
+        assert (
+            REGISTRY.get_sample_value(
+                "rates_cache_lookups_total",
+                {"family": "current", "tier": "banxico", "result": "hit"},
+            )
+            >= 1
+        )
+        mock_db.save_exchange_rates.assert_called_once_with([result])
+
+    def test_cache_envelope_round_trip(self):
+        """Test that the response body is sliced out of the cached envelope"""
+        entry = rates.CachedEntry.from_data(
+            {"date": "2025-07-18", "rate": 18.72, "source": "banxico"}, 1752868800.25
+        )
+        encoded = rates._encode_entry(entry)
+
+        assert json.loads(encoded)["data"]["rate"] == 18.72
+        assert rates._decode_entry("test:envelope", encoded) == entry
+        legacy = json.dumps({"fresh_until": entry.fresh_until, "data": entry.data})
+        assert rates._decode_entry("test:legacy", legacy) == entry
+
+    @pytest.mark.asyncio
+    async def test_current_rate_body_served_from_cache(self):
+        """Test that a cache hit returns the stored body bytes unchanged"""
+        entry = rates.CachedEntry.from_data(
+            {"date": "2025-07-18", "rate": 18.72, "source": "banxico"},
+            time.time() + 60,
+        )
+        mock_redis = AsyncMock(local_cache=None)
+        mock_redis.get.return_value = rates._encode_entry(entry)
+
+        with patch("app.services.rates.redis_client", mock_redis):
+            encoded = await rates.get_current_rate_body()
+
+        assert encoded.body == b'{"date":"2025-07-18","rate":18.72,"source":"banxico"}'
+        assert encoded.fresh_until == entry.fresh_until
+
+    def test_window_bodies_are_encoded_once(self):
+        """Test that historical and average bodies are memoized per window"""
+        window = rates.HistoricalWindow.from_rates(
+            [
+                ExchangeRateData(date=date(2025, 7, 18), rate=18.72),
+                ExchangeRateData(date=date(2025, 7, 17), rate=18.68),
+            ]
+        )
+
+        body = window.rates_body(1)
+        assert json.loads(body) == [
+            {"date": "2025-07-18", "rate": 18.72, "source": "banxico"}
+        ]
+        assert window.rates_body(1) is body
+        assert window.average_body(2) == b"18.7"
+        assert rates.HistoricalWindow.from_rates([]).average_body(2) is None
+
+    @pytest.mark.asyncio
+    async def test_body_etag_follows_cached_data(self):
+        """Test that ETags are stable per body and change with the data"""
+        window = rates.HistoricalWindow.from_rates(
+            [ExchangeRateData(date=date(2025, 7, 18), rate=18.72)],
+            fresh_until=time.time() + 60,
+        )
+        with patch(
+            "app.services.rates._get_historical_window",
+            new=AsyncMock(return_value=window),
+        ):
+            first = await rates.get_average_rate_body(days=1)
+            again = await rates.get_average_rate_body(days=1)
+
+        assert first.etag == again.etag
+        assert first.etag.startswith('"') and first.etag.endswith('"')
+        assert 59 <= first.max_age <= 60
+        assert rates.peek_fresh_body("average:1") == first
+        assert rates._etag(b"18.73") != first.etag
+
     @pytest.mark.asyncio
     async def test_get_average_rate_success(self):
         """Test successful average rate calculation"""
@@ -166,7 +861,10 @@ class TestRatesService:
             ExchangeRateData(date=date(2025, 7, 17), rate=18.80, source="banxico"),
         ]
 
-        with patch("app.services.rates.get_historical_rates", return_value=mock_rates):
+        with patch(
+            "app.services.rates._get_historical_window",
+            return_value=rates.HistoricalWindow.from_rates(mock_rates),
+        ):
             result = await rates.get_average_rate(days=2)
 
             expected_average = (18.70 + 18.80) / 2
@@ -175,7 +873,10 @@ class TestRatesService:
     @pytest.mark.asyncio
     async def test_get_average_rate_no_data(self):
         """Test average rate when no historical data available"""
-        with patch("app.services.rates.get_historical_rates", return_value=[]):
+        with patch(
+            "app.services.rates._get_historical_window",
+            return_value=rates.HistoricalWindow.from_rates([]),
+        ):
             result = await rates.get_average_rate(days=15)
             assert result is None
 
@@ -256,4 +957,416 @@ class TestHealthService:
 
             assert result["status"] == "healthy"
             assert len(result["services"]) == 2
+            assert "single_flight" in result["cache"]
             assert "checked_at" in result
+
+
+class TestSyncService:
+
+    @pytest.fixture
+    def banxico_columns(self):
+        return RateColumns.from_datos(
+            [("17/07/2025", "18.6800"), ("18/07/2025", "18.7200")]
+        )
+
+    @pytest.mark.asyncio
+    async def test_sync_fetches_only_missing_range(self, banxico_columns):
+        """Test that sync starts from the latest stored date and saves in bulk"""
+        mock_db = AsyncMock()
+        mock_db.get_latest_exchange_rate.return_value = ExchangeRateData(
+            date=date(2025, 7, 17), rate=18.68, source="banxico"
+        )
+        mock_db.save_exchange_rates.return_value = BulkSaveResult(inserted=1, updated=1)
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.return_value = banxico_columns
+
+        with (
+            patch("app.services.sync.database_service", mock_db),
+            patch("app.services.sync.banxico_api", mock_banxico),
+        ):
+            result = await sync.sync_exchange_rates()
+
+        assert result.status == "success"
+        assert (result.inserted, result.updated) == (1, 1)
+        assert (
+            mock_banxico.fetch_series_columns.call_args.kwargs["start_date"]
+            == "2025-07-17"
+        )
+        saved_rates = mock_db.save_exchange_rates.call_args.args[0]
+        assert [r.date for r in saved_rates] == [date(2025, 7, 18), date(2025, 7, 17)]
+
+    @pytest.mark.asyncio
+    async def test_sync_empty_table_uses_initial_range(self, banxico_columns):
+        """Test that an empty table is filled from SYNC_INITIAL_DAYS back"""
+        mock_db = AsyncMock()
+        mock_db.get_latest_exchange_rate.return_value = None
+        mock_db.save_exchange_rates.return_value = BulkSaveResult(inserted=2)
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.return_value = banxico_columns
+
+        with (
+            patch("app.services.sync.database_service", mock_db),
+            patch("app.services.sync.banxico_api", mock_banxico),
+        ):
+            await sync.sync_exchange_rates(initial_days=30)
+
+        expected_start = date.today() - timedelta(days=30)
+        assert mock_banxico.fetch_series_columns.call_args.kwargs[
+            "start_date"
+        ] == expected_start.strftime("%Y-%m-%d")
+
+    @pytest.mark.asyncio
+    async def test_sync_up_to_date_when_banxico_has_no_data(self):
+        """Test that a 404 from Banxico means there is nothing new to store"""
+        mock_db = AsyncMock()
+        mock_db.get_latest_exchange_rate.return_value = None
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.side_effect = HTTPException(status_code=404)
+
+        with (
+            patch("app.services.sync.database_service", mock_db),
+            patch("app.services.sync.banxico_api", mock_banxico),
+        ):
+            result = await sync.sync_exchange_rates()
+
+        assert result.status == "up_to_date"
+        mock_db.save_exchange_rates.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_sync_aborts_when_latest_rate_lookup_fails(self):
+        """Test that a database error is not taken for an empty table"""
+        mock_db = AsyncMock()
+        mock_db.get_latest_exchange_rate.side_effect = ConnectionError("Aurora down")
+        mock_banxico = AsyncMock()
+
+        with (
+            patch("app.services.sync.database_service", mock_db),
+            patch("app.services.sync.banxico_api", mock_banxico),
+        ):
+            result = await sync.sync_exchange_rates()
+            with pytest.raises(RuntimeError, match="Aurora down"):
+                await sync.run_sync_job()
+
+        assert result.status == "failed"
+        mock_db.get_latest_exchange_rate.assert_called_with(raise_errors=True)
+        mock_banxico.fetch_series_columns.assert_not_called()
+
+
+class TestBackfillService:
+
+    @pytest.fixture
+    def mock_db(self):
+        mock_db = AsyncMock()
+        mock_db.save_exchange_rates.side_effect = lambda rates: BulkSaveResult(
+            inserted=len(rates)
+        )
+        return mock_db
+
+    @staticmethod
+    def _columns(start_date, end_date):
+        # One rate per day of the requested range, weekends included
+        start = date.fromisoformat(start_date)
+        days = (date.fromisoformat(end_date) - start).days + 1
+        return RateColumns.from_datos(
+            ((start + timedelta(days=i)).strftime("%d/%m/%Y"), "18.5000")
+            for i in range(days)
+        )
+
+    def test_split_range_covers_range_without_gaps(self):
+        """Test that chunks are consecutive, inclusive and bounded by the end"""
+        chunks = backfill.split_range(date(2024, 1, 1), date(2024, 1, 10), 4)
+
+        assert chunks == [
+            (date(2024, 1, 1), date(2024, 1, 4)),
+            (date(2024, 1, 5), date(2024, 1, 8)),
+            (date(2024, 1, 9), date(2024, 1, 10)),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_backfill_fetches_chunks_concurrently(self, mock_db, tmp_path):
+        """Test that every chunk is fetched, saved in bulk and counted"""
+        in_flight = peak = 0
+
+        async def fetch(start_date, end_date):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return self._columns(start_date, end_date)
+
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.side_effect = fetch
+        checkpoint = backfill.Checkpoint(tmp_path / "checkpoint.json")
+
+        with (
+            patch("app.services.backfill.database_service", mock_db),
+            patch("app.services.backfill.banxico_api", mock_banxico),
+        ):
+            result = await backfill.backfill_exchange_rates(
+                date(2024, 1, 1),
+                date(2024, 1, 28),
+                chunk_days=7,
+                concurrency=2,
+                checkpoint=checkpoint,
+                limiter=TokenBucket(capacity=10, rate=100),
+            )
+
+        assert result.status == "success"
+        assert (result.chunks, result.failed) == (4, 0)
+        # 20 weekdays in four full weeks
+        assert result.fetched == result.inserted == 20
+        assert result.rows_per_second > 0
+        assert peak == 2
+        # A finished backfill leaves no checkpoint behind
+        assert not checkpoint.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_backfill_resumes_from_checkpoint(self, mock_db, tmp_path):
+        """Test that a failed chunk is retried on resume and the others are not"""
+        calls = []
+
+        async def flaky_fetch(start_date, end_date):
+            calls.append(start_date)
+            if start_date == "2024-01-08" and len(calls) <= 4:
+                raise HTTPException(status_code=503, detail="Banxico unavailable")
+            return self._columns(start_date, end_date)
+
+        mock_banxico = AsyncMock()
+        mock_banxico.fetch_series_columns.side_effect = flaky_fetch
+        args = (date(2024, 1, 1), date(2024, 1, 28))
+        kwargs = {"chunk_days": 7, "limiter": TokenBucket(capacity=10, rate=100)}
+
+        with (
+            patch("app.services.backfill.database_service", mock_db),
+            patch("app.services.backfill.banxico_api", mock_banxico),
+        ):
+            first = await backfill.backfill_exchange_rates(
+                *args, checkpoint=backfill.Checkpoint(tmp_path / "cp.json"), **kwargs
+            )
+            checkpoint = backfill.Checkpoint(tmp_path / "cp.json")
+            assert checkpoint.load()
+            assert len(checkpoint.completed) == 3
+
+            second = await backfill.backfill_exchange_rates(
+                *args, checkpoint=checkpoint, **kwargs
+            )
+
+        assert (first.status, first.failed, first.fetched) == ("failed", 1, 15)
+        assert (second.status, second.resumed, second.fetched) == ("success", 3, 5)
+        assert calls[4:] == ["2024-01-08"]
+
+
+class _IndexResult(list):
+    """Result of the rate index queries: stamp row, changed rows, full scan"""
+
+    def one(self):
+        return self[0]
+
+    def all(self):
+        return list(self)
+
+
+def _index_row(day, rate):
+    return type("Row", (), {"date": datetime(2024, 1, day), "rate": rate})()
+
+
+def _index_stamp(count, first_day, minute):
+    return _IndexResult(
+        [(count, datetime(2024, 1, first_day), datetime(2024, 2, 1, 0, minute))]
+    )
+
+
+class TestDatabaseService:
+
+    @pytest.fixture
+    def mock_session(self):
+        session = AsyncMock()
+
+        @asynccontextmanager
+        async def get_session():
+            yield session
+
+        with patch("app.services.database.db_manager") as mock_manager:
+            mock_manager.get_session = get_session
+            yield session
+
+    def test_upsert_statement_is_single_multi_row_insert(self):
+        """Test that the bulk path compiles to INSERT ... ON DUPLICATE KEY UPDATE"""
+        statement = _upsert_statement(
+            [
+                ExchangeRateData(date=date(2025, 7, 17), rate=18.68),
+                ExchangeRateData(date=date(2025, 7, 18), rate=18.72),
+            ]
+        )
+        sql = str(statement.compile(dialect=mysql.dialect()))
+
+        assert sql.startswith("INSERT INTO exchange_rates")
+        assert sql.count("VALUES (") == 1
+        assert sql.count("(%s, %s, %s, %s, %s)") == 2
+        assert "ON DUPLICATE KEY UPDATE" in sql
+
+    @pytest.mark.asyncio
+    async def test_save_exchange_rates_counts_inserts_and_updates(self, mock_session):
+        """Test chunking and inserted/updated accounting from affected rows"""
+        rates_to_save = [
+            ExchangeRateData(date=date(2025, 7, day), rate=18.0 + day / 100)
+            for day in range(1, 6)
+        ]
+        # Chunk of 3 with one update (4 rows affected), chunk of 2 all new
+        mock_session.execute.side_effect = [
+            type("Result", (), {"rowcount": 4})(),
+            type("Result", (), {"rowcount": 2})(),
+        ]
+
+        result = await DatabaseService().save_exchange_rates(
+            rates_to_save, chunk_size=3
+        )
+
+        assert mock_session.execute.call_count == 2
+        assert (result.inserted, result.updated) == (4, 1)
+
+    @pytest.mark.asyncio
+    async def test_iter_rate_batches_uses_keyset_queries(self, mock_session):
+        """Test that batches continue after the last date seen, up to limit"""
+
+        def rows(*days):
+            return type(
+                "Result",
+                (),
+                {
+                    "all": lambda self: [
+                        type(
+                            "Row",
+                            (),
+                            {
+                                "date": datetime(2024, 1, day),
+                                "rate": 17.0,
+                                "source": "banxico",
+                            },
+                        )()
+                        for day in days
+                    ]
+                },
+            )()
+
+        mock_session.execute.side_effect = [rows(2, 3), rows(4, 5), rows(8)]
+
+        batches = [
+            [rate.date.day for rate in batch]
+            async for batch in DatabaseService().iter_rate_batches(
+                date(2024, 1, 1), date(2024, 1, 31), limit=5, batch_size=2
+            )
+        ]
+
+        assert batches == [[2, 3], [4, 5], [8]]
+        queries = [
+            str(
+                call.args[0].compile(
+                    dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}
+                )
+            )
+            for call in mock_session.execute.call_args_list
+        ]
+        assert "exchange_rates.date >= '2024-01-01 00:00:00'" in queries[0]
+        assert "exchange_rates.date > '2024-01-05 23:59:59.999999'" in queries[2]
+        # The last batch only asks for what is left of the limit
+        assert queries[2].endswith("LIMIT 1")
+
+    @pytest.mark.asyncio
+    async def test_save_exchange_rates_failure(self, mock_session):
+        """Test that a database error reports nothing saved"""
+        mock_session.execute.side_effect = Exception("Connection lost")
+
+        result = await DatabaseService().save_exchange_rates(
+            [ExchangeRateData(date=date(2025, 7, 18), rate=18.72)]
+        )
+
+        assert result.saved == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_index_picks_up_backfills_and_corrections(self, mock_session):
+        """Test that older rows and corrected rates reach the aggregate index"""
+
+        service = DatabaseService()
+        full = _IndexResult(
+            [_index_row(10, 17.0), _index_row(11, 17.2), _index_row(12, 17.4)]
+        )
+        backfilled = _IndexResult([_index_row(8, 16.0), _index_row(9, 16.2), *full])
+        corrected = _IndexResult(
+            [*backfilled[:3], _index_row(11, 18.2), _index_row(12, 17.4)]
+        )
+        mock_session.execute.side_effect = [
+            _index_stamp(3, 10, 0),
+            full,
+            # Backfill of older dates: first date moved, index rebuilt
+            _index_stamp(5, 8, 1),
+            backfilled,
+            # Correction of an indexed date: changed row is not newer, rebuilt
+            _index_stamp(5, 8, 2),
+            _IndexResult([_index_row(11, 18.2)]),
+            corrected,
+            # Newer rate only: appended without a rebuild
+            _index_stamp(6, 8, 3),
+            _IndexResult([_index_row(15, 18.0)]),
+            # Nothing changed: only the stamp query runs
+            _index_stamp(6, 8, 3),
+        ]
+
+        january = (date(2024, 1, 1), date(2024, 1, 31))
+        with patch("app.services.database.settings.DATABASE_INDEX_CHECK_INTERVAL", 0):
+            assert (await service.get_rate_stats(*january)).count == 3
+            stats = await service.get_rate_stats(*january)
+            assert (stats.count, stats.min) == (5, 16.0)
+            stats = await service.get_rate_stats(*january)
+            assert stats.max == 18.2
+            assert stats.average == pytest.approx(
+                (16.0 + 16.2 + 17.0 + 18.2 + 17.4) / 5
+            )
+            assert (await service.get_rate_stats(*january)).count == 6
+            assert (await service.get_rate_stats(*january)).count == 6
+        assert mock_session.execute.call_count == 10
+
+    @pytest.mark.asyncio
+    async def test_rate_index_checks_are_throttled(self, mock_session):
+        """Test that reads reuse the index and local writes invalidate it"""
+        service = DatabaseService()
+        january = (date(2024, 1, 1), date(2024, 1, 31))
+        mock_session.execute.side_effect = [
+            _index_stamp(1, 10, 0),
+            _IndexResult([_index_row(10, 17.0)]),
+            type("Result", (), {"rowcount": 2})(),
+            _index_stamp(1, 10, 1),
+            _IndexResult([_index_row(10, 17.5)]),
+        ]
+
+        assert (await service.get_rate_stats(*january)).average == 17.0
+        # Within DATABASE_INDEX_CHECK_INTERVAL: no query at all
+        assert (await service.get_rate_stats(*january)).average == 17.0
+        assert mock_session.execute.call_count == 2
+
+        await service.save_exchange_rates(
+            [ExchangeRateData(date=date(2024, 1, 10), rate=17.5)]
+        )
+        assert (await service.get_rate_stats(*january)).average == 17.5
+        assert mock_session.execute.call_count == 5
+
+    @pytest.mark.asyncio
+    async def test_rate_index_distrusts_stamps_of_the_current_second(
+        self, mock_session
+    ):
+        """Test that a write in the stamp's second cannot hide behind it"""
+        service = DatabaseService()
+        just_now = datetime.now(timezone.utc).replace(tzinfo=None)
+        stamp = _IndexResult([(1, datetime(2024, 1, 10), just_now)])
+        mock_session.execute.side_effect = [
+            stamp,
+            _IndexResult([_index_row(10, 17.0)]),
+            stamp,
+            _IndexResult([_index_row(10, 17.5)]),
+        ]
+        january = (date(2024, 1, 1), date(2024, 1, 31))
+
+        assert (await service.get_rate_stats(*january)).average == 17.0
+        # Same stamp, but it may not cover a correction in that same second
+        assert (await service.get_rate_stats(*january)).average == 17.5
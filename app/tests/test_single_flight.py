@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test that concurrent callers for the same key run the function once"""
+        sf = SingleFlight()
+        executions = 0
+
+        async def fetch():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(*(sf.do("key", fetch) for _ in range(10)))
+
+        assert results == ["result"] * 10
+        assert executions == 1
+        assert sf.get_stats() == {
+            "calls": 10,
+            "executions": 1,
+            "coalesced": 9,
+            "in_flight": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_error_is_shared_with_waiters(self):
+        """Test that every coalesced caller receives the leader's exception"""
+        sf = SingleFlight()
+
+        async def failing_fetch():
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(
+            *(sf.do("key", failing_fetch) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert sf.executions == 1
+        assert sf.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_different_keys_do_not_coalesce(self):
+        """Test that calls for different keys execute independently"""
+        sf = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(sf.do("a", fetch, 1), sf.do("b", fetch, 2))
+
+        assert results == [1, 2]
+        assert sf.executions == 2
+        assert sf.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_key_released_after_completion(self):
+        """Test that a finished flight does not serve later callers"""
+        sf = SingleFlight()
+
+        async def fetch():
+            return "fresh"
+
+        await sf.do("key", fetch)
+        await sf.do("key", fetch)
+
+        assert sf.executions == 2
+        assert sf.in_flight() == []
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self):
+        """Test that the shared fetch outlives the caller that started it"""
+        sf = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        leader = asyncio.create_task(sf.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(sf.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == "result"
+        assert leader.cancelled()
+        assert sf.executions == 1
+        assert sf.in_flight() == []
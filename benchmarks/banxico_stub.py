@@ -0,0 +1,220 @@
+"""
+Local stand-in for the Banxico SIE API used by the benchmarks.
+
+Serves ``/{series}/datos/oportuno`` and ``/{series}/datos/{start}/{end}`` with
+Banxico-shaped JSON over HTTP/1.1 keep-alive, and counts accepted TCP
+connections and requests so benchmarks can show connection reuse.
+
+A fraction of requests can be failed on purpose (``failure_rate``) to exercise
+the circuit breaker and stale-serving paths: ``error`` answers HTTP 500,
+``timeout`` holds the request past any client timeout, and ``reset`` drops the
+connection without a response.
+
+Run standalone:
+    python -m benchmarks.banxico_stub --port 8081
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import ssl
+from datetime import date, datetime, timedelta
+
+FAILURE_MODES = ("error", "timeout", "reset")
+
+# Long enough to outlast the Banxico client timeout
+HANG_SECONDS = 60.0
+
+
+def _parse_range_date(value: str) -> date:
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unsupported date format: {value}")
+
+
+def build_payload(start: date, end: date, series_id: str = "SF43718") -> dict:
+    """Banxico-shaped payload with one point per calendar day (weekends as N/E)."""
+    datos = []
+    current = start
+    while current <= end:
+        if current.weekday() < 5:
+            dato = f"{17.0 + (current.toordinal() % 400) / 200:.4f}"
+        else:
+            dato = "N/E"
+        datos.append({"fecha": current.strftime("%d/%m/%Y"), "dato": dato})
+        current += timedelta(days=1)
+
+    return {
+        "bmx": {
+            "series": [
+                {
+                    "idSerie": series_id,
+                    "titulo": "Tipo de cambio Pesos por dólar E.U.A.",
+                    "datos": datos,
+                }
+            ]
+        }
+    }
+
+
+class BanxicoStub:
+    """Minimal asyncio HTTP/1.1 server that mimics the Banxico series endpoints."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        ssl_context: ssl.SSLContext | None = None,
+        failure_rate: float = 0.0,
+        failure_mode: str = "error",
+        seed: int | None = None,
+    ):
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f"Unknown failure mode: {failure_mode}")
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.ssl_context = ssl_context
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self._random = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self.failures = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._handlers: set[asyncio.Task] = set()
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.ssl_context else "http"
+        return f"{scheme}://{self.host}:{self.port}/SieAPIRest/service/v1/series"
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, ssl=self.ssl_context
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Drop kept-alive and held connections so no handler outlives the stub
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def reset_counters(self):
+        self.connections = 0
+        self.requests = 0
+        self.failures = 0
+
+    def _route(self, path: str) -> tuple[int, dict]:
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if "datos" not in parts:
+            return 404, {"error": "not found"}
+
+        index = parts.index("datos")
+        series_id = parts[index - 1]
+        tail = parts[index + 1 :]
+        if tail == ["oportuno"]:
+            # Like Banxico, the latest published (business-day) value
+            latest = date.today()
+            while latest.weekday() >= 5:
+                latest -= timedelta(days=1)
+            return 200, build_payload(latest, latest, series_id)
+        if len(tail) == 2:
+            try:
+                start, end = (_parse_range_date(v) for v in tail)
+            except ValueError as e:
+                return 400, {"error": str(e)}
+            return 200, build_payload(start, end, series_id)
+        return 404, {"error": "not found"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                _, path, _ = request_line.split(" ", 2)
+                headers = {
+                    k.strip().lower(): v.strip()
+                    for k, v in (
+                        line.split(":", 1) for line in header_lines if ":" in line
+                    )
+                }
+                self.requests += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                if self.failure_rate and self._random.random() < self.failure_rate:
+                    self.failures += 1
+                    if self.failure_mode == "timeout":
+                        await asyncio.sleep(HANG_SECONDS)
+                    if self.failure_mode != "error":
+                        break
+                    status, payload = 500, {"error": "injected failure"}
+                else:
+                    status, payload = self._route(path)
+                body = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+
+async def _serve(args: argparse.Namespace):
+    ssl_context = None
+    if args.certfile and args.keyfile:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.certfile, args.keyfile)
+
+    stub = BanxicoStub(
+        args.host,
+        args.port,
+        args.latency,
+        ssl_context,
+        failure_rate=args.failure_rate,
+        failure_mode=args.failure_mode,
+    )
+    await stub.start()
+    print(f"Banxico stub listening on {stub.base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-mode", choices=FAILURE_MODES, default="error")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    asyncio.run(_serve(parser.parse_args()))
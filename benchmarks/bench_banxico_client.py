@@ -0,0 +1,122 @@
+"""
+Compare a fresh ``httpx.AsyncClient`` per Banxico call (the previous behaviour)
+against the pooled, long-lived client owned by ``BanxicoAPI``.
+
+Both modes hit a local ``BanxicoStub``; the stub counts accepted connections so
+the handshake savings are visible next to the latency numbers. ``--tls`` serves
+the stub over HTTPS with a throwaway self-signed certificate (needs the
+``openssl`` CLI) to include the TLS handshake in the comparison.
+
+    python -m benchmarks.bench_banxico_client --requests 200 --tls
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+from app.services.banxico import BanxicoAPI
+from benchmarks.banxico_stub import BanxicoStub
+
+
+def _self_signed_context(workdir: str) -> tuple[ssl.SSLContext, str]:
+    certfile = os.path.join(workdir, "cert.pem")
+    keyfile = os.path.join(workdir, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", keyfile, "-out", certfile, "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile)
+    return context, certfile
+
+
+def _summary(latencies: list[float], stub: BanxicoStub, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": stub.requests,
+        "connections": stub.connections,
+        "total_s": round(elapsed, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+    }
+
+
+async def _per_call(url: str, params: dict) -> None:
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+
+
+async def _run(mode: str, stub: BanxicoStub, requests: int, concurrency: int) -> dict:
+    api = BanxicoAPI()
+    api.base_url = stub.base_url
+    url = f"{stub.base_url}/{api.series_id}/datos/oportuno"
+    params = {"mediaType": "json"}
+
+    async def one() -> float:
+        started = time.perf_counter()
+        if mode == "per_call":
+            await _per_call(url, params)
+        else:
+            await api.fetch_series()
+        return time.perf_counter() - started
+
+    stub.reset_counters()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded() -> float:
+        async with semaphore:
+            return await one()
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(bounded() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await api.close()
+    return _summary(latencies, stub, elapsed)
+
+
+async def main(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as workdir:
+        ssl_context = None
+        if args.tls:
+            ssl_context, certfile = _self_signed_context(workdir)
+            os.environ["SSL_CERT_FILE"] = certfile
+
+        stub = BanxicoStub(latency=args.latency, ssl_context=ssl_context)
+        await stub.start()
+        try:
+            results = {
+                "tls": args.tls,
+                "concurrency": args.concurrency,
+                "per_call": await _run(
+                    "per_call", stub, args.requests, args.concurrency
+                ),
+                "pooled": await _run("pooled", stub, args.requests, args.concurrency),
+            }
+        finally:
+            await stub.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banxico client pooling benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub seconds")
+    parser.add_argument("--tls", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Peak Python memory of reading a long Banxico range: the buffered
+``fetch_series`` (whole body, then pydantic models), the columnar
+``fetch_series_columns`` and the incremental ``stream_series``, which should
+stay flat however many years are requested.
+
+The ``BanxicoStub`` runs in a child process so its own payload building is not
+counted. Each read runs twice: once timed, once under ``tracemalloc`` for the
+peak, since tracing skews timings.
+
+    python -m benchmarks.bench_banxico_stream --years 1 5 10 20
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import httpx
+
+from app.services.banxico import BanxicoAPI
+from benchmarks.loadtest import _free_port
+
+
+async def _buffered(api: BanxicoAPI, start: str, end: str) -> int:
+    response = await api.fetch_series(start, end)
+    return len(response.bmx.series[0].datos)
+
+
+async def _columnar(api: BanxicoAPI, start: str, end: str) -> int:
+    return len(await api.fetch_series_columns(start, end))
+
+
+async def _streamed(api: BanxicoAPI, start: str, end: str) -> int:
+    count = 0
+    async for _ in api.stream_series(start, end):
+        count += 1
+    return count
+
+
+async def _measure(read, api: BanxicoAPI, start: str, end: str) -> dict:
+    # Timed without tracing: tracemalloc slows allocation-heavy code unevenly
+    started = time.perf_counter()
+    points = await read(api, start, end)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    await read(api, start, end)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "points": points,
+        "peak_kib": round(peak / 1024, 1),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+
+
+async def _wait_ready(base_url: str):
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f"{base_url}/SF43718/datos/oportuno")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise TimeoutError("Banxico stub did not start")
+
+
+async def main(args: argparse.Namespace):
+    port = _free_port()
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.banxico_stub", "--port", str(port)]
+    )
+    api = BanxicoAPI()
+    api.base_url = f"http://127.0.0.1:{port}/SieAPIRest/service/v1/series"
+    results = {}
+    try:
+        await _wait_ready(api.base_url)
+        # Open the pooled connection outside the measurements
+        await api.fetch_series()
+        end = date.today()
+        for years in args.years:
+            start = (end - timedelta(days=365 * years)).isoformat()
+            results[f"{years}y"] = {
+                name: await _measure(read, api, start, end.isoformat())
+                for name, read in (
+                    ("buffered", _buffered),
+                    ("columnar", _columnar),
+                    ("streamed", _streamed),
+                )
+            }
+    finally:
+        await api.close()
+        stub.terminate()
+        stub.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banxico range read memory benchmark")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10, 20])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Compare the per-row ``save_exchange_rate`` path (SELECT + INSERT/UPDATE and a
+commit per rate) against the chunked ``save_exchange_rates`` bulk upsert.
+
+Needs the MySQL/Aurora database from the settings (``docker-compose up mysql``).
+Rates are written to a synthetic date range far in the past and deleted
+afterwards, so the benchmark can run against a database that holds real data.
+
+    python -m benchmarks.bench_bulk_upsert --rows 365
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import time
+
+from sqlalchemy import delete
+
+from app.core.database import ExchangeRate, db_manager
+from app.schemas.rates import ExchangeRateData
+from app.services.database import DatabaseService
+
+START_DATE = datetime.date(1990, 1, 1)
+
+
+def _rates(rows: int, offset: float = 0.0) -> list[ExchangeRateData]:
+    return [
+        ExchangeRateData(
+            date=START_DATE + datetime.timedelta(days=i),
+            rate=round(18.0 + (i % 100) / 100 + offset, 4),
+        )
+        for i in range(rows)
+    ]
+
+
+async def _clear(rows: int):
+    end_date = START_DATE + datetime.timedelta(days=rows)
+    async with db_manager.get_session() as session:
+        await session.execute(
+            delete(ExchangeRate).where(
+                ExchangeRate.date >= START_DATE, ExchangeRate.date < end_date
+            )
+        )
+
+
+async def _per_row(service: DatabaseService, rates: list[ExchangeRateData]) -> dict:
+    started = time.perf_counter()
+    saved = sum([await service.save_exchange_rate(rate) for rate in rates])
+    elapsed = time.perf_counter() - started
+    return {"saved": saved, "total_s": round(elapsed, 4)}
+
+
+async def _bulk(service: DatabaseService, rates: list[ExchangeRateData]) -> dict:
+    started = time.perf_counter()
+    result = await service.save_exchange_rates(rates)
+    elapsed = time.perf_counter() - started
+    return {
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "total_s": round(elapsed, 4),
+    }
+
+
+async def main(args: argparse.Namespace):
+    await db_manager.init_db()
+    service = DatabaseService()
+    results = {"rows": args.rows}
+    try:
+        await db_manager.create_tables()
+        for name, save in (("per_row", _per_row), ("bulk", _bulk)):
+            await _clear(args.rows)
+            results[name] = {
+                # Fresh inserts, then the same dates again with new rates
+                "insert": await save(service, _rates(args.rows)),
+                "update": await save(service, _rates(args.rows, offset=0.5)),
+            }
+    finally:
+        await _clear(args.rows)
+        await db_manager.close_db()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exchange rate bulk upsert benchmark")
+    parser.add_argument("--rows", type=int, default=365)
+    asyncio.run(main(parser.parse_args()))
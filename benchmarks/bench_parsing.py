@@ -0,0 +1,234 @@
+"""
+Micro-benchmarks for the CPU work done on every Banxico cache miss: decoding
+and validating the ``BanxicoResponse``, the per-item business-day loop in
+``_parse_business_days`` (``_parse_date``, ``float(dato)``, weekday filter,
+``ExchangeRateData`` construction, sort), the columnar ``RateColumns`` path
+that replaces both for long ranges, and encoding/decoding the cached
+historical window.
+
+Payloads come from ``banxico_stub.build_payload`` and span several years of
+daily points, like a backfill or a long sync. Each case reports the median
+per-call time over ``--repeat`` runs (and the best, for reference). Medians
+are also expressed relative to a fixed pure-Python calibration loop, which is
+what the regression check compares, so a baseline recorded on one machine
+stays meaningful on another.
+
+Results are compared with ``--baseline``. A case more than ``--threshold``
+slower is measured again up to ``--confirm`` times and only counts as a
+regression when every re-run is slower too, so one noisy moment on a shared
+runner does not fail the job. The script exits with status 1 on a confirmed
+regression. ``--history`` appends every run as one JSON line.
+
+    python -m benchmarks.bench_parsing
+    python -m benchmarks.bench_parsing --years 1 5 10 --history bench-history.jsonl
+    python -m benchmarks.bench_parsing --update-baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+
+import orjson
+
+from app.schemas.banxico import BanxicoResponse
+from app.schemas.rates import ExchangeRateData
+from app.services import rates
+from app.services.rate_columns import RateColumns
+from benchmarks.banxico_stub import build_payload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "parsing.json")
+
+# Cached windows always hold the last MAX_HISTORICAL_DAYS business days
+WINDOW_DAYS = rates.MAX_HISTORICAL_DAYS
+
+
+def _calibration():
+    """Fixed interpreter-bound work used as the unit of the relative timings"""
+    return sum(int(s) for s in map(str, range(2000)))
+
+
+def _parse_business_days(response: BanxicoResponse) -> list[ExchangeRateData]:
+    """The model path: business days of a validated response, newest first"""
+    datos = response.bmx.series[0].datos
+    columns = RateColumns.from_datos((item.fecha, item.dato) for item in datos)
+    return columns.business_days().sorted(reverse=True).to_models()
+
+
+def _cases(
+    years: list[int], only: list[str] | None = None
+) -> dict[str, Callable[[], object]]:
+    cases: dict[str, Callable[[], object]] = {}
+    end = date(2025, 7, 18)
+
+    for n in years:
+        payload = build_payload(end - timedelta(days=365 * n), end)
+        raw = json.dumps(payload).encode()
+        response = BanxicoResponse.model_validate(payload)
+        datos = response.bmx.series[0].datos
+
+        cases[f"decode_and_validate[{n}y]"] = (
+            lambda raw=raw: BanxicoResponse.model_validate(json.loads(raw))
+        )
+        cases[f"model_validate[{n}y]"] = (
+            lambda payload=payload: BanxicoResponse.model_validate(payload)
+        )
+        cases[f"parse_dates[{n}y]"] = lambda datos=datos: [
+            rates._parse_date(item.fecha) for item in datos
+        ]
+        cases[f"parse_business_days[{n}y]"] = (
+            lambda response=response: _parse_business_days(response)
+        )
+        # Columnar mode end to end: bytes to the newest-first business days
+        cases[f"columnar_parse[{n}y]"] = lambda raw=raw: (
+            RateColumns.from_payload(orjson.loads(raw))
+            .business_days()
+            .sorted(reverse=True)
+        )
+
+    window = _parse_business_days(
+        BanxicoResponse.model_validate(build_payload(end - timedelta(days=150), end))
+    )[:WINDOW_DAYS]
+    entry = rates.CachedEntry.from_data([rates._rate_to_dict(r) for r in window], 0.0)
+
+    cases["encode_window_entry"] = lambda: rates.CachedEntry.from_data(
+        [rates._rate_to_dict(rate) for rate in window], 0.0
+    )
+    cases["decode_window_entry"] = lambda: rates.HistoricalWindow.from_rates(
+        [rates._rate_from_dict(item) for item in entry.data]
+    )
+    if only is not None:
+        return {name: cases[name] for name in only if name in cases}
+    return cases
+
+
+def _time(func: Callable[[], object], repeat: int) -> dict:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = [total / number * 1e6 for total in timer.repeat(repeat, number)]
+    return {
+        "median_us": round(statistics.median(runs), 3),
+        "min_us": round(min(runs), 3),
+    }
+
+
+def run(years: list[int], repeat: int, only: list[str] | None = None) -> dict:
+    # Calibrate next to every case and take the median, so a noisy moment on
+    # a shared runner skews neither one case nor every relative timing
+    calibrations, results = [], {}
+    for name, func in _cases(years, only).items():
+        calibrations.append(_time(_calibration, repeat)["median_us"])
+        results[name] = _time(func, repeat)
+
+    unit = round(statistics.median(calibrations), 3)
+    results = {"calibration": {"median_us": unit, "min_us": None}, **results}
+    for result in results.values():
+        result["relative"] = round(result["median_us"] / unit, 4)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> dict:
+    """Relative slowdown per case present in both runs; flags regressions"""
+    report = {}
+    for name, result in current.items():
+        if name == "calibration" or name not in baseline:
+            continue
+        ratio = result["relative"] / baseline[name]["relative"]
+        report[name] = {
+            "change_pct": round((ratio - 1) * 100, 1),
+            "regressed": ratio > 1 + threshold,
+        }
+    return report
+
+
+def confirm(
+    report: dict, baseline: dict, args: argparse.Namespace
+) -> tuple[dict, list[str]]:
+    """
+    Re-measure the cases flagged by the first run; a regression stands only
+    when it shows up in every re-run, and each re-run's change is recorded
+    """
+    flagged = [name for name, c in report.items() if c["regressed"]]
+    for _ in range(args.confirm):
+        if not flagged:
+            break
+        rerun = compare(run(args.years, args.repeat, flagged), baseline, args.threshold)
+        for name in flagged:
+            report[name].setdefault("rerun_change_pct", []).append(
+                rerun[name]["change_pct"]
+            )
+        flagged = [name for name in flagged if rerun[name]["regressed"]]
+
+    for name, c in report.items():
+        c["regressed"] = name in flagged
+    return report, flagged
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    cases = run(args.years, args.repeat)
+    regressions: list[str] = []
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "elapsed_s": round(time.perf_counter() - started, 1),
+        "cases": cases,
+    }
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {k: results[k] for k in ("commit", "python", "cases")}, f, indent=2
+            )
+            f.write("\n")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["threshold_pct"] = args.threshold * 100
+        results["comparison"], regressions = confirm(
+            compare(cases, baseline["cases"], args.threshold), baseline["cases"], args
+        )
+
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(results) + "\n")
+    print(json.dumps(results, indent=2))
+
+    if regressions:
+        print(f"Regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parsing hot-path micro-benchmarks")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--confirm", type=int, default=2, help="Re-runs a regression must repeat in"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--history", help="Append results as JSON lines")
+    sys.exit(main(parser.parse_args()))
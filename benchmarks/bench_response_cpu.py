@@ -0,0 +1,138 @@
+"""
+Per-request CPU time of the rates endpoints on a warm cache, comparing the
+model path (decode the cached JSON, build pydantic models, let FastAPI
+validate and re-serialize them through ``response_model``) with the current
+endpoints that return the pre-encoded cached body bytes as they are.
+
+Both apps are called directly as ASGI applications (no HTTP client or
+socket) against the real ``RedisClient`` backed by ``InMemoryRedis`` and a
+local ``BanxicoStub``, so the numbers are the application's own CPU time per
+request. Each measurement is the best of several rounds to damp noise.
+
+    python -m benchmarks.bench_response_cpu --requests 5000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, FastAPI, Query
+
+from app.api.v1 import api_router
+from app.core.redis import redis_client
+from app.schemas.rates import ExchangeRateData
+from app.services import rates as rate_service
+from app.services.banxico import banxico_api
+from benchmarks.banxico_stub import BanxicoStub
+from benchmarks.redis_stub import InMemoryRedis
+
+ENDPOINTS = (
+    "/api/v1/rates/current",
+    "/api/v1/rates/historical?days=90",
+    "/api/v1/rates/average?days=15",
+)
+
+
+def _model_app() -> FastAPI:
+    """The endpoints as they were before serving cached bytes"""
+    router = APIRouter(prefix="/api/v1/rates")
+
+    @router.get("/current", response_model=ExchangeRateData)
+    async def current():
+        return await rate_service.get_current_exchange_rate()
+
+    @router.get("/historical", response_model=list[ExchangeRateData])
+    async def historical(days: int = Query(default=10, ge=1, le=90)):
+        return await rate_service.get_historical_rates(days=days)
+
+    @router.get("/average", response_model=float)
+    async def average(days: int = Query(default=15, ge=1, le=90)):
+        return round(await rate_service.get_average_rate(days=days), 4)
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def _bytes_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    return app
+
+
+async def _call(app: FastAPI, path: str) -> int:
+    """Run one GET through the ASGI app and return its status code"""
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": route,
+        "raw_path": route.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _measure(app: FastAPI, path: str, requests: int, rounds: int) -> dict:
+    # Warm up: the first call fills the cache from the stub, the rest are hits
+    for _ in range(50):
+        assert await _call(app, path) == 200
+
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.process_time()
+        for _ in range(requests):
+            await _call(app, path)
+        best = min(best, time.process_time() - started)
+    return {"cpu_us_per_request": round(best / requests * 1e6, 2)}
+
+
+async def main(args: argparse.Namespace):
+    stub = BanxicoStub()
+    await stub.start()
+    banxico_api.base_url = stub.base_url
+    redis_client._client = InMemoryRedis()
+
+    results = {"requests": args.requests, "rounds": args.rounds, "endpoints": {}}
+    try:
+        model_app, bytes_app = _model_app(), _bytes_app()
+        for path in ENDPOINTS:
+            model = await _measure(model_app, path, args.requests, args.rounds)
+            raw = await _measure(bytes_app, path, args.requests, args.rounds)
+            saved = 1 - raw["cpu_us_per_request"] / model["cpu_us_per_request"]
+            results["endpoints"][path] = {
+                "model": model,
+                "bytes": raw,
+                "cpu_saved_pct": round(saved * 100, 1),
+            }
+    finally:
+        await banxico_api.close()
+        await stub.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rates endpoint CPU benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
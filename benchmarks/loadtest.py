@@ -0,0 +1,321 @@
+"""
+End-to-end load test of the rates endpoints against local stand-ins.
+
+Starts the real FastAPI app under uvicorn in a child process, backed by
+``InMemoryRedis`` (or the Redis server from the settings with ``--redis
+server``), and points its Banxico client at a ``BanxicoStub`` running in this
+process with configurable latency and failure injection. Load comes from
+``--clients`` driver processes holding ``--concurrency`` keep-alive
+connections in total, each looping over the endpoints as fast as responses
+arrive (closed loop), so the app, the upstream stub and the load generator do
+not share an event loop.
+
+Throughput, error counts and latency percentiles, overall and per endpoint,
+are written as JSON together with the commit and the run configuration, so
+results from different commits can be compared directly. Set the usual
+environment variables (e.g. ``CACHE_CURRENT_RATE_TTL``, ``L1_CACHE_ENABLED``)
+to load-test other configurations.
+
+    python -m benchmarks.loadtest --concurrency 200 --duration 30 --clients 4
+    python -m benchmarks.loadtest --banxico-failure-rate 0.2 --banxico-failure-mode timeout
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.banxico_stub import FAILURE_MODES, BanxicoStub
+
+ENDPOINTS = (
+    "/api/v1/rates/current",
+    "/api/v1/rates/historical?days=10",
+    "/api/v1/rates/average?days=15",
+)
+
+# Service objectives from the README
+TARGET_RPS = 5000
+TARGET_P99_MS = 500.0
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def _summarize(latencies: list[float], statuses: Counter, duration: float) -> dict:
+    ordered = sorted(latencies)
+    errors = sum(
+        n
+        for status, n in statuses.items()
+        if not (status.isdigit() and 200 <= int(status) < 400)
+    )
+    summary = {
+        "requests": len(ordered),
+        "errors": errors,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "rps": round(len(ordered) / duration, 1),
+        "statuses": dict(sorted(statuses.items())),
+        "latency_ms": {},
+    }
+    if ordered:
+        summary["latency_ms"] = {
+            **{f"p{pct:g}": round(_percentile(ordered, pct), 2) for pct in PERCENTILES},
+            "mean": round(sum(ordered) / len(ordered), 2),
+            "max": round(ordered[-1], 2),
+        }
+    return summary
+
+
+# Driver processes
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    offset: int,
+    measure_from: float,
+    deadline: float,
+    samples: dict[str, tuple[list[float], Counter]],
+):
+    paths = ENDPOINTS[offset % len(ENDPOINTS) :] + ENDPOINTS[: offset % len(ENDPOINTS)]
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            status = str((await client.get(path)).status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if started >= measure_from:
+            latencies, statuses = samples[path]
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+
+async def _drive_async(
+    base_url: str, concurrency: int, warmup: float, duration: float
+) -> dict:
+    samples = {path: ([], Counter()) for path in ENDPOINTS}
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30.0
+    ) as client:
+        measure_from = time.perf_counter() + warmup
+        deadline = measure_from + duration
+        await asyncio.gather(
+            *(
+                _worker(client, i, measure_from, deadline, samples)
+                for i in range(concurrency)
+            )
+        )
+    return samples
+
+
+def _drive(base_url: str, concurrency: int, warmup: float, duration: float) -> dict:
+    """One load generator process; returns raw latencies and statuses per path"""
+    return asyncio.run(_drive_async(base_url, concurrency, warmup, duration))
+
+
+# App server process
+
+
+async def _serve(args: argparse.Namespace):
+    import uvicorn
+
+    from app.core.redis import redis_client
+    from app.services.banxico import banxico_api
+    from benchmarks.redis_stub import InMemoryRedis
+    from main import app
+
+    banxico_api.base_url = args.banxico_url
+    if args.redis == "memory":
+        redis_client._client = InMemoryRedis()
+
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False
+    )
+    await uvicorn.Server(config).serve()
+
+
+def _start_server(args: argparse.Namespace, port: int, banxico_url: str):
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.loadtest",
+        "--serve",
+        "--port",
+        str(port),
+        "--banxico-url",
+        banxico_url,
+        "--redis",
+        args.redis,
+    ]
+    return subprocess.Popen(command, env={**os.environ, "LOG_LEVEL": "WARNING"})
+
+
+async def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"App server exited with code {server.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"App server not ready after {timeout}s")
+
+
+async def _stop_server(server: subprocess.Popen):
+    # Wait off the event loop: the stub serving the app's last calls runs on it
+    server.send_signal(signal.SIGTERM)
+    try:
+        await asyncio.to_thread(server.wait, 10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        await asyncio.to_thread(server.wait)
+
+
+# Orchestration
+
+
+def _merge(parts: list[dict], duration: float) -> dict:
+    totals: tuple[list[float], Counter] = ([], Counter())
+    endpoints = {}
+    for path in ENDPOINTS:
+        latencies, statuses = [], Counter()
+        for part in parts:
+            part_latencies, part_statuses = part[path]
+            latencies.extend(part_latencies)
+            statuses.update(part_statuses)
+        totals[0].extend(latencies)
+        totals[1].update(statuses)
+        endpoints[path] = _summarize(latencies, statuses, duration)
+    return {"overall": _summarize(*totals, duration), "endpoints": endpoints}
+
+
+async def main(args: argparse.Namespace):
+    stub = BanxicoStub(
+        latency=args.banxico_latency,
+        failure_rate=args.banxico_failure_rate,
+        failure_mode=args.banxico_failure_mode,
+        seed=0,
+    )
+    await stub.start()
+    port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = _start_server(args, port, stub.base_url)
+
+    loop = asyncio.get_running_loop()
+    per_client = [
+        args.concurrency // args.clients + (i < args.concurrency % args.clients)
+        for i in range(args.clients)
+    ]
+    try:
+        await _wait_ready(base_url, server)
+        # Spawned, not forked: forked drivers would inherit the stub's sockets
+        # and keep "reset" connections open on the app's side
+        with ProcessPoolExecutor(
+            max_workers=args.clients, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            parts = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        pool, _drive, base_url, n, args.warmup, args.duration
+                    )
+                    for n in per_client
+                    if n
+                )
+            )
+    finally:
+        await _stop_server(server)
+        await stub.stop()
+
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "concurrency": args.concurrency,
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "redis": args.redis,
+            "banxico_latency_s": args.banxico_latency,
+            "banxico_failure_rate": args.banxico_failure_rate,
+            "banxico_failure_mode": args.banxico_failure_mode,
+        },
+        **_merge(parts, args.duration),
+        "banxico": {"requests": stub.requests, "failures": stub.failures},
+    }
+    overall = results["overall"]
+    results["slo"] = {
+        "target_rps": TARGET_RPS,
+        "target_p99_ms": TARGET_P99_MS,
+        "throughput_met": overall["rps"] >= TARGET_RPS,
+        "latency_met": overall["latency_ms"].get("p99", float("inf")) < TARGET_P99_MS,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rates endpoints load test")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=1, help="Driver processes")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds")
+    parser.add_argument("--redis", choices=("memory", "server"), default="memory")
+    parser.add_argument("--banxico-latency", type=float, default=0.05)
+    parser.add_argument("--banxico-failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--banxico-failure-mode", choices=FAILURE_MODES, default="error"
+    )
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--banxico-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(_serve(args))
+    else:
+        asyncio.run(main(args))
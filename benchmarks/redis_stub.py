@@ -0,0 +1,104 @@
+"""
+In-memory stand-in for the ``redis.asyncio.Redis`` commands used by the app.
+
+Assign an instance to ``redis_client._client`` so the real ``RedisClient``
+(and its L1 tier) runs against process memory instead of a Redis server.
+Values are returned as stored, matching ``decode_responses=True`` for strings.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+
+class InMemoryPubSub:
+    """Subscription that never receives a message; there is only one process"""
+
+    async def subscribe(self, *channels: str):
+        pass
+
+    async def unsubscribe(self, *channels: str):
+        pass
+
+    async def get_message(
+        self, ignore_subscribe_messages: bool = False, timeout: float | None = 0.0
+    ) -> None:
+        if timeout:
+            await asyncio.sleep(timeout)
+        return None
+
+    async def listen(self) -> AsyncIterator[dict]:
+        # Block like an idle subscription until the listener is cancelled
+        await asyncio.Event().wait()
+        yield {}
+
+    async def aclose(self):
+        pass
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self._data: dict[str, Any] = {}
+        self._expires: dict[str, float] = {}
+        self.commands = 0
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    async def ping(self) -> bool:
+        self.commands += 1
+        return True
+
+    async def get(self, key: str) -> Any:
+        self.commands += 1
+        return self._data[key] if self._alive(key) else None
+
+    async def mget(self, keys: list[str]) -> list[Any]:
+        self.commands += 1
+        return [self._data[key] if self._alive(key) else None for key in keys]
+
+    async def set(self, key: str, value: Any, ex: int | None = None) -> bool:
+        self.commands += 1
+        self._data[key] = value
+        if ex:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    async def setex(self, key: str, time_: int, value: Any) -> bool:
+        return await self.set(key, value, ex=time_)
+
+    async def delete(self, *keys: str) -> int:
+        self.commands += 1
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return removed
+
+    async def exists(self, key: str) -> int:
+        self.commands += 1
+        return int(self._alive(key))
+
+    async def publish(self, channel: str, message: str) -> int:
+        self.commands += 1
+        return 0
+
+    def pubsub(self, **kwargs) -> InMemoryPubSub:
+        # Keeps the L1 invalidation listener idle instead of failing and
+        # clearing L1 on every retry, which would skew L1 hit ratios
+        return InMemoryPubSub()
+
+    async def close(self):
+        pass
+
+    async def aclose(self):
+        pass
@@ -1,22 +1,57 @@
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.config import settings
 from app.api.v1 import api_router
+from app.core.config import settings
+from app.core.database import db_manager
+from app.core.metrics import MetricsMiddleware, render
+from app.core.redis import redis_client
+from app.services import rates
+from app.services.banxico import banxico_api
+from app.services.scheduler import refresh_scheduler
 
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
-    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients on startup and release their connections on shutdown"""
+    await banxico_api.start()
+    await redis_client.start_invalidation_listener()
+    if settings.DATABASE_ENABLED or settings.SYNC_ENABLED:
+        try:
+            await db_manager.init_db()
+            await db_manager.create_tables()
+        except Exception as e:
+            # db_manager.ready stays False, so reads skip the database tier
+            logger.error(f"Database unavailable at startup: {e}")
+    await refresh_scheduler.start()
+    try:
+        yield
+    finally:
+        await refresh_scheduler.stop()
+        # Refreshes still running would reopen or log errors on closed clients
+        await rates.cancel_refreshes()
+        await banxico_api.close()
+        await redis_client.close()
+        await db_manager.close_db()
+        logger.info("Shutdown complete")
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,8 +62,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+
 @app.get("/", tags=["Root"])
 async def root():
     """API root endpoint"""
@@ -38,9 +77,19 @@ async def root():
         "environment": settings.ENVIRONMENT,
         "debug": settings.DEBUG,
         "docs": "/docs" if not settings.is_production else "disabled",
-        "health": f"{settings.API_V1_PREFIX}/health"
+        "health": f"{settings.API_V1_PREFIX}/health",
     }
 
+
 @app.get("/health", tags=["Health"])
 async def simple_health():
     return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint"""
+        body, content_type = render()
+        return Response(content=body, media_type=content_type)